@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from jobfrica_backend.caching import bump_model_version, bump_object_version, bump_user_version
+from jobs.models import Job
+from .models import Application
+
+
+def _adjust(field, delta):
+    # Never drive a counter negative from a stale instance; reconciliation fixes drift
+    if delta < 0:
+        return Greatest(F(field) + delta, Value(0))
+    return F(field) + delta
+
+
+def _counter_updates(status, delta):
+    field = Job.APPLICATION_STATUS_COUNTERS[status]
+    return {field: _adjust(field, delta)}
+
+
+def _apply_deltas(deltas):
+    """Apply {counter field: {job_id: delta}} to the jobs with a single UPDATE."""
+    job_ids = {job_id for per_job in deltas.values() for job_id, delta in per_job.items() if delta}
+    if not job_ids:
+        return
+    Job.objects.filter(pk__in=job_ids).update(updated_at=timezone.now(), **{
+        field: Case(
+            *[When(pk=job_id, then=_adjust(field, delta)) for job_id, delta in per_job.items() if delta],
+            default=F(field),
+            output_field=Job._meta.get_field(field),
+        )
+        for field, per_job in deltas.items()
+    })
+
+
+class _ChangedApplications:
+    """
+    Jobs and users whose cached payloads changed with their applications in the
+    current transaction; their versions are bumped together once it commits.
+    """
+
+    def __init__(self):
+        self.job_ids = set()
+        self.user_ids = set()
+        self.employer_ids = set()
+        # Being deleted by a cascade whose counters were settled in pre_delete
+        self.deleting_job_ids = set()
+        self.deleting_application_ids = set()
+
+    def __call__(self):
+        if not (self.job_ids or self.user_ids or self.employer_ids):
+            return
+        # Employers of jobs deleted since are already in employer_ids
+        self.employer_ids.update(Job.objects.filter(pk__in=self.job_ids).values_list('employer_id', flat=True))
+        # Only the changed jobs' own payloads are invalidated (see JobViewSet.object_version_model);
+        # job lists pick up new counters with their next job write or cache expiry
+        bump_object_version(Job, self.job_ids)
+        bump_model_version(Application)
+        bump_user_version(self.user_ids | self.employer_ids, 'applications')
+        # Employers' own job lists show the counters
+        bump_user_version(self.employer_ids, 'jobs')
+
+
+def _changed_applications():
+    """The _ChangedApplications of the current transaction, queued on commit once."""
+    connection = transaction.get_connection()
+    batch = getattr(connection, '_changed_applications', None)
+    # A rolled back transaction drops its callbacks, so only reuse a batch still queued
+    if batch is None or not any(func is batch for _, func, _ in connection.run_on_commit):
+        batch = connection._changed_applications = _ChangedApplications()
+        transaction.on_commit(batch)
+    return batch
+
+
+def _application_changed(application):
+    batch = _changed_applications()
+    batch.job_ids.add(application.job_id)
+    batch.user_ids.add(application.applicant_id)
+
+
+def record_application_created(application):
+    """Count a new application against its job."""
+    Job.objects.filter(pk=application.job_id).update(
+        updated_at=timezone.now(),
+        application_count=_adjust('application_count', 1),
+        **_counter_updates(application.status, 1),
+    )
+    _application_changed(application)
+
+
+def record_application_deleted(application):
+    """Remove a deleted application from its job's counters."""
+    batch = _changed_applications()
+    if application.job_id in batch.deleting_job_ids or application.pk in batch.deleting_application_ids:
+        return
+    Job.objects.filter(pk=application.job_id).update(
+        updated_at=timezone.now(),
+        application_count=_adjust('application_count', -1),
+        **_counter_updates(application.status, -1),
+    )
+    _application_changed(application)
+
+
+def record_application_updated(application):
+    """An edit that leaves the status alone still changes the application's payload."""
+    _application_changed(application)
+
+
+def record_bulk_status_change(changes, new_status):
+    """
+    Move many applications to `new_status` in the counters with a single UPDATE.
+    `changes` holds (job_id, old_status, applicant_id, employer_id) per moved application.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    batch = None
+    for job_id, old_status, applicant_id, employer_id in changes:
+        if old_status == new_status:
+            continue
+        deltas[Job.APPLICATION_STATUS_COUNTERS[old_status]][job_id] -= 1
+        deltas[Job.APPLICATION_STATUS_COUNTERS[new_status]][job_id] += 1
+        batch = batch or _changed_applications()
+        batch.job_ids.add(job_id)
+        batch.user_ids.add(applicant_id)
+        batch.employer_ids.add(employer_id)
+    _apply_deltas(deltas)
+
+
+def record_job_deleting(job):
+    """
+    A job is about to be deleted with its applications: their counters go with the
+    job, so their post_delete handling is skipped.
+    """
+    batch = _changed_applications()
+    batch.deleting_job_ids.add(job.pk)
+    batch.employer_ids.add(job.employer_id)
+    batch.user_ids.update(Application.objects.filter(job=job).values_list('applicant_id', flat=True))
+
+
+def record_user_deleting(user):
+    """
+    A user is about to be deleted with their applications: take them off their
+    jobs' counters with one UPDATE instead of one per application.
+    """
+    batch = _changed_applications()
+    deltas = defaultdict(lambda: defaultdict(int))
+    rows = Application.objects.filter(applicant=user).exclude(job_id__in=batch.deleting_job_ids)
+    for pk, job_id, status in rows.values_list('pk', 'job_id', 'status'):
+        deltas['application_count'][job_id] -= 1
+        deltas[Job.APPLICATION_STATUS_COUNTERS[status]][job_id] -= 1
+        batch.deleting_application_ids.add(pk)
+        batch.job_ids.add(job_id)
+    _apply_deltas(deltas)
@@ -0,0 +1,67 @@
+"""
+Streaming CSV / JSON Lines export of applications.
+
+Rows are read from a server-side cursor in chunks of `chunk_size`, so exporting any
+number of applications keeps memory flat (see jobfrica_backend.streaming).
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from jobfrica_backend.streaming import Echo
+from .models import Application
+
+FORMATS = ('csv', 'jsonl')
+# Output column -> .values() lookup
+COLUMNS = {
+    'id': 'id',
+    'job_id': 'job_id',
+    'job_title': 'job__title',
+    'company': 'job__company',
+    'applicant_id': 'applicant_id',
+    'applicant_email': 'applicant__email',
+    'applicant_first_name': 'applicant__first_name',
+    'applicant_last_name': 'applicant__last_name',
+    'status': 'status',
+    'applied_at': 'applied_at',
+    'resume': 'resume',
+    'cover_letter': 'cover_letter',
+}
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _rows(queryset, chunk_size):
+    storage = Application._meta.get_field('resume').storage
+    rows = queryset.order_by('pk').values_list(*COLUMNS.values()).iterator(chunk_size=chunk_size)
+    for values in rows:
+        row = dict(zip(COLUMNS, values))
+        if row['resume']:
+            row['resume'] = storage.url(row['resume'])
+        yield row
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # A leading quote makes spreadsheets show the text instead of evaluating it
+        return "'" + value
+    return value
+
+
+def export_applications(queryset, file_format, chunk_size=2000):
+    """Yields the applications of `queryset` in `file_format`, a line of text at a time."""
+    rows = _rows(queryset, chunk_size)
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(COLUMNS)
+        for row in rows:
+            if row['applied_at'] is not None:
+                row['applied_at'] = row['applied_at'].isoformat()
+            yield writer.writerow([_csv_cell(value) for value in row.values()])
+        return
+
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
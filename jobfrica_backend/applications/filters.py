@@ -0,0 +1,14 @@
+import django_filters
+
+from .models import Application
+
+
+class ApplicationExportFilter(django_filters.FilterSet):
+    """Filters accepted by the application export: ?job=&status=&applied_after=&applied_before="""
+    status = django_filters.MultipleChoiceFilter(choices=Application.STATUS_CHOICES)
+    applied_after = django_filters.IsoDateTimeFilter(field_name='applied_at', lookup_expr='gte')
+    applied_before = django_filters.IsoDateTimeFilter(field_name='applied_at', lookup_expr='lt')
+
+    class Meta:
+        model = Application
+        fields = ['job', 'status', 'applied_after', 'applied_before']
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_application_updated_at'),
+        ('jobs', '0011_job_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['applied_at'], name='application_applied_0de066_idx'),
+        ),
+    ]
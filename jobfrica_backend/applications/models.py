@@ -2,6 +2,12 @@ from django.db import models
 from jobs.models import Job
 from users.models import CustomUser
 
+class ApplicationQuerySet(models.QuerySet):
+    def with_job_summary(self):
+        """Join each application's job with what JobListSerializer needs."""
+        return self.select_related('job', 'job__category', 'job__employer')
+
+
 # Create your models here.
 class Application(models.Model):
     STATUS_CHOICES = (
@@ -12,12 +18,26 @@ class Application(models.Model):
         ('accepted', 'Accepted'),
         ('withdrawn', 'Withdrawn'),
     )
+    # Statuses an employer may move an application to from each status; rejected,
+    # accepted and withdrawn applications are final
+    EMPLOYER_STATUS_TRANSITIONS = {
+        'applied': {'under_review', 'shortlisted', 'rejected', 'accepted'},
+        'under_review': {'shortlisted', 'rejected', 'accepted'},
+        'shortlisted': {'under_review', 'rejected', 'accepted'},
+        'rejected': set(),
+        'accepted': set(),
+        'withdrawn': set(),
+    }
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='applications')
     cover_letter = models.TextField(blank=True, null=True)
     resume = models.FileField(upload_to='applications/resumes/', blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='applied')
     applied_at = models.DateTimeField(auto_now_add=True)
+    # Bulk status moves set it too (see applications.transitions)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ApplicationQuerySet.as_manager()
 
     class Meta:
         db_table = 'applications'
@@ -26,6 +46,7 @@ class Application(models.Model):
             models.Index(fields=['applicant', 'applied_at']),
             models.Index(fields=['applicant', 'status']),
             models.Index(fields=['job', 'status']),
+            models.Index(fields=['applied_at']),
         ]
     
     def __str__(self):
@@ -1,6 +1,9 @@
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from .models import Application
-from jobs.serializers import JobListSerializer
+from jobfrica_backend.fastpath import ValuesSerializer
+from jobs.serializers import JobListSerializer, JobListValuesSerializer
+from users.models import CustomUser
 
 class ApplicationSerializer(serializers.ModelSerializer):
     job = JobListSerializer(read_only=True)
@@ -8,9 +11,37 @@ class ApplicationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Application
-        fields = '__all__'
+        # updated_at only feeds conditional GETs
+        exclude = ['updated_at']
         read_only_fields = ('applicant', 'applied_at', 'status')
     
+class ApplicationValuesSerializer(ValuesSerializer):
+    """ApplicationSerializer over .values() rows; jobs.tests checks the output stays identical."""
+    serializer_class = ApplicationSerializer
+    values = (
+        'id', *JobListValuesSerializer.lookups('job__'), 'applicant__id', 'applicant__role',
+        'cover_letter', 'resume', 'status', 'applied_at',
+    )
+    applicant_fields = ('id', 'role')
+
+    @cached_property
+    def job_serializer(self):
+        return JobListValuesSerializer(context=self.context, prefix=self.prefix + 'job__')
+
+    def to_representation(self, row):
+        prefix = self.prefix
+        return {
+            'id': row[prefix + 'id'],
+            'job': self.job_serializer.to_representation(row),
+            # StringRelatedField renders str(applicant), built here from the selected columns
+            'applicant': str(self.related(row, 'applicant', CustomUser, self.applicant_fields)),
+            'cover_letter': row[prefix + 'cover_letter'],
+            'resume': self.file(row, 'resume', 'resume', Application._meta.get_field('resume')),
+            'status': row[prefix + 'status'],
+            'applied_at': self.field(row, 'applied_at', 'applied_at'),
+        }
+
+
 class ApplicationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
@@ -34,4 +65,9 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
         applicant = self.context['request'].user
         if Application.objects.filter(job=job, applicant=applicant).exists():
             raise serializers.ValidationError("You have already applied for this job.")
-        return data
\ No newline at end of file
+        return data
+
+
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from jobs.models import Job
+from users.models import CustomUser
+from .counters import (record_application_created, record_application_deleted, record_application_updated,
+                       record_job_deleting, record_user_deleting)
+from .models import Application
+
+
+@receiver(post_save, sender=Application)
+def application_created(sender, instance, created, **kwargs):
+    if created:
+        record_application_created(instance)
+    else:
+        record_application_updated(instance)
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    record_application_deleted(instance)
+
+
+# Deleting a job or a user cascades to their applications; settle the counters once up front
+
+@receiver(pre_delete, sender=Job)
+def job_deleting(sender, instance, **kwargs):
+    record_job_deleting(instance)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_deleting(sender, instance, **kwargs):
+    record_user_deleting(instance)
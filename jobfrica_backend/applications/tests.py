@@ -1,3 +1,480 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from importlib import import_module
+from urllib.parse import quote
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobfrica_backend.caching import get_versions, model_version_key
+from jobs.models import Job, JobCategory
+from notifications.models import NotificationEvent
+from users.models import CustomUser
+from .counters import record_bulk_status_change
+from .export import export_applications
+from .models import Application
+from .transitions import INVALID_TRANSITION, NOT_FOUND, UNCHANGED, UPDATED, bulk_update_status
 
 # Create your tests here.
+def create_job(employer, category, **kwargs):
+    fields = {
+        'title': 'Backend Developer',
+        'description': 'Build and maintain APIs.',
+        'company': 'Acme',
+        'location': 'Lagos',
+        'job_type': 'full_time',
+        'experience_level': 'mid',
+    }
+    fields.update(kwargs)
+    return Job.objects.create(employer=employer, category=category, **fields)
+
+
+class ApplicationCounterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker')
+            for i in range(3)
+        ]
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.job = create_job(self.employer, self.category)
+
+    def counters(self):
+        return Job.objects.filter(pk=self.job.pk).values('application_count', *Job.APPLICATION_STATUS_COUNTERS.values()).get()
+
+    def assert_counters(self, **expected):
+        counters = {field: 0 for field in self.counters()}
+        counters.update(expected)
+        self.assertEqual(self.counters(), counters)
+
+    def apply(self, seeker, **kwargs):
+        return Application.objects.create(job=self.job, applicant=seeker, **kwargs)
+
+    def test_signals_follow_create_status_change_and_delete(self):
+        first = self.apply(self.seekers[0])
+        self.apply(self.seekers[1])
+        self.apply(self.seekers[2], status='withdrawn')
+        self.assert_counters(application_count=3, applied_count=2, withdrawn_count=1)
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.post(f'/api/applications/{first.pk}/update_status/', {'status': 'shortlisted'})
+        self.assertEqual(response.status_code, 200)
+        self.assert_counters(application_count=3, applied_count=1, shortlisted_count=1, withdrawn_count=1)
+
+        # Deletes count against the status the deleted instance was loaded with
+        first.refresh_from_db()
+        first.delete()
+        self.assert_counters(application_count=2, applied_count=1, withdrawn_count=1)
+
+    def test_saving_a_stale_job_keeps_the_counters(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        self.apply(self.seekers[0])
+
+        stale.title = 'Senior Backend Developer'
+        stale.save()
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch(f'/api/jobs/{self.job.pk}/', {'location': 'Accra'})
+        self.assertEqual(response.status_code, 200)
+
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.title, job.location), ('Senior Backend Developer', 'Accra'))
+        self.assert_counters(application_count=1, applied_count=1)
+
+    def test_applying_only_invalidates_the_job_itself(self):
+        cache.clear()
+        other = create_job(self.employer, self.category, title='Frontend Developer')
+        job_version = get_versions([model_version_key(Job)])
+        detail = self.client.get(f'/api/jobs/{self.job.pk}/')
+        other_detail = self.client.get(f'/api/jobs/{other.pk}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apply(self.seekers[0])
+
+        self.assertEqual(get_versions([model_version_key(Job)]), job_version)
+        response = self.client.get(f'/api/jobs/{other.pk}/', HTTP_IF_NONE_MATCH=other_detail['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f'/api/jobs/{self.job.pk}/', HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['application_count'], 1)
+
+    def test_saves_write_only_what_was_asked(self):
+        self.apply(self.seekers[0])
+        partial = Job.objects.only('title').get(pk=self.job.pk)
+        partial.title = 'Senior Backend Developer'
+        with CaptureQueriesContext(connection) as queries:
+            partial.save()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'FROM "jobs"' in q['sql']])
+
+        job = Job.objects.get(pk=self.job.pk)
+        job.title = 'Staff Backend Developer'
+        job.location = 'Accra'
+        job.application_count = 0
+        job.save(update_fields=['title'])
+
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.title, job.location), ('Staff Backend Developer', 'Lagos'))
+        self.assertEqual(Job.objects.filter(search_vector='staff').get(), job)
+        self.assert_counters(application_count=1, applied_count=1)
+
+    def test_cascades_settle_counters_in_bulk(self):
+        other = create_job(self.employer, self.category, title='Frontend Developer')
+        for seeker in self.seekers:
+            self.apply(seeker)
+        Application.objects.create(job=other, applicant=self.seekers[0], status='shortlisted')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.seekers[0].delete()
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE "jobs"')]), 1)
+        self.assert_counters(application_count=2, applied_count=2)
+        self.assertEqual(Job.objects.get(pk=other.pk).application_count, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.job.delete()
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "jobs"')])
+
+    def test_reconcile_repairs_drift(self):
+        self.apply(self.seekers[0])
+        self.apply(self.seekers[1], status='rejected')
+        Job.objects.filter(pk=self.job.pk).update(application_count=7, applied_count=0, accepted_count=3)
+
+        out = io.StringIO()
+        call_command('reconcile_application_counters', dry_run=True, stdout=out)
+        self.assertIn('Found 1 jobs', out.getvalue())
+        self.assert_counters(application_count=7, accepted_count=3, rejected_count=1)
+
+        call_command('reconcile_application_counters', batch_size=1, stdout=io.StringIO())
+        self.assert_counters(application_count=2, applied_count=1, rejected_count=1)
+
+    def test_migration_backfills_existing_jobs(self):
+        self.apply(self.seekers[0])
+        self.apply(self.seekers[1], status='shortlisted')
+        untouched = create_job(self.employer, self.category, title='No applicants')
+        Job.objects.update(application_count=0, applied_count=0, shortlisted_count=0)
+
+        migration = import_module('jobs.migrations.0010_backfill_application_counters')
+        migration.backfill_counters(apps, None)
+        self.assert_counters(application_count=2, applied_count=1, shortlisted_count=1)
+        self.assertEqual(Job.objects.get(pk=untouched.pk).application_count, 0)
+
+
+class ApplicationConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seeker = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        self.other = CustomUser.objects.create(email='other@example.com', role='job_seeker')
+        self.job = create_job(self.employer, JobCategory.objects.create(name='Engineering'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application = Application.objects.create(job=self.job, applicant=self.seeker)
+
+    def get(self, url, user, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get(url, **headers)
+
+    def assert_changed(self, etag):
+        response = self.get('/api/applications/', self.seeker, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_304_until_the_nested_job_changes(self):
+        response = self.get('/api/applications/', self.seeker)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get('/api/applications/', self.seeker, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get('/api/applications/', self.seeker, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        # ETags are per user
+        self.assertNotEqual(self.get('/api/applications/', self.employer)['ETag'], etag)
+
+        # The employer renames the job
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = 'Staff Engineer'
+            self.job.save()
+        response = self.assert_changed(etag)
+        self.assertEqual(response.data['results'][0]['job']['title'], 'Staff Engineer')
+
+        # Someone else applies, which moves the nested application_count
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=self.job, applicant=self.other)
+        response = self.assert_changed(etag)
+        self.assertEqual(response.data['results'][0]['job']['application_count'], 2)
+
+    def test_writes_elsewhere_keep_the_etag(self):
+        etag = self.get('/api/applications/', self.seeker)['ETag']
+        unrelated = create_job(self.employer, self.job.category, title='Designer')
+        with self.captureOnCommitCallbacks(execute=True):
+            unrelated.title = 'Senior Designer'
+            unrelated.save()
+            Application.objects.create(job=unrelated, applicant=self.other)
+        self.assertEqual(self.get('/api/applications/', self.seeker, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A status move through the bulk path is an UPDATE without save()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_update_status(self.employer, [self.application.pk], 'shortlisted')
+        response = self.assert_changed(etag)
+        self.assertEqual(response.data['results'][0]['status'], 'shortlisted')
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.category.name = 'Platform'
+            self.job.category.save()
+        self.assertEqual(self.assert_changed(etag).data['results'][0]['job']['category']['name'], 'Platform')
+
+    def test_wildcard_on_a_missing_application(self):
+        url = f'/api/applications/{self.application.pk}/'
+        self.assertEqual(self.get(url, self.seeker, HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.get(url, self.other, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+class ApplicationExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.rival = CustomUser.objects.create(email='rival@example.com', role='employer')
+        self.admin = CustomUser.objects.create(email='admin@example.com', role='admin')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker', first_name=f'Seeker, "{i}"')
+            for i in range(3)
+        ]
+        category = JobCategory.objects.create(name='Engineering')
+        self.job = create_job(self.employer, category)
+        self.other_job = create_job(self.employer, category, title='Designer')
+        self.rival_job = create_job(self.rival, category, title='Rival role')
+
+        now = timezone.now()
+        self.applications = []
+        for days_ago, job, seeker, app_status in [
+            (10, self.job, self.seekers[0], 'applied'),
+            (5, self.job, self.seekers[1], 'shortlisted'),
+            (1, self.other_job, self.seekers[0], 'rejected'),
+            (1, self.rival_job, self.seekers[2], 'applied'),
+        ]:
+            application = Application.objects.create(
+                job=job, applicant=seeker, status=app_status, cover_letter='Line one\nline "two"',
+                resume='applications/resumes/cv.pdf' if seeker == self.seekers[1] else None,
+            )
+            Application.objects.filter(pk=application.pk).update(applied_at=now - timedelta(days=days_ago))
+            self.applications.append(application)
+
+    def export(self, user, query=''):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/applications/export/{query}')
+
+    def rows(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def ids(self, user, query=''):
+        query = f'{query}&file_format=jsonl' if query else '?file_format=jsonl'
+        return [row['id'] for row in self.rows(self.export(user, query))]
+
+    def test_csv_export(self):
+        response = self.export(self.employer)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="applications.csv"')
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(row['id']) for row in rows], [application.pk for application in self.applications[:3]])
+        first, second = rows[0], rows[1]
+        self.assertEqual(first['applicant_email'], 'seeker0@example.com')
+        self.assertEqual(first['applicant_first_name'], 'Seeker, "0"')
+        self.assertEqual(first['cover_letter'], 'Line one\nline "two"')
+        self.assertEqual(first['resume'], '')
+        self.assertEqual(second['resume'], '/media/applications/resumes/cv.pdf')
+        applied_at = Application.objects.get(pk=second['id']).applied_at
+        self.assertEqual(second['applied_at'], applied_at.isoformat())
+
+    def test_csv_cells_never_start_formulas(self):
+        formula = '=HYPERLINK("http://example.com","CV")'
+        Application.objects.filter(pk=self.applications[0].pk).update(cover_letter=formula)
+        CustomUser.objects.filter(pk=self.seekers[0].pk).update(first_name='+1', last_name='@SUM(A1)')
+        CustomUser.objects.filter(pk=self.seekers[1].pk).update(first_name='-2', last_name='\tTab')
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(self.export(self.employer).streaming_content).decode())))
+        self.assertEqual(
+            [(row['applicant_first_name'], row['applicant_last_name']) for row in rows],
+            [("'+1", "'@SUM(A1)"), ("'-2", "'\tTab"), ("'+1", "'@SUM(A1)")],
+        )
+        self.assertEqual(rows[0]['cover_letter'], "'" + formula)
+        # JSON Lines carries the values as they are
+        self.assertEqual(self.rows(self.export(self.employer, '?file_format=jsonl'))[0]['cover_letter'], formula)
+
+    def test_jsonl_matches_csv(self):
+        response = self.export(self.employer, '?file_format=jsonl')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.rows(response)
+        csv_rows = list(csv.DictReader(io.StringIO(b''.join(self.export(self.employer).streaming_content).decode())))
+        self.assertEqual(len(rows), len(csv_rows))
+        for row, csv_row in zip(rows, csv_rows):
+            self.assertEqual(list(row), list(csv_row))
+            self.assertEqual({key: '' if value is None else str(value) for key, value in row.items()}, {
+                **csv_row, 'applied_at': row['applied_at'],
+            })
+
+    def test_gzip(self):
+        plain = b''.join(self.export(self.employer, '?file_format=jsonl').streaming_content)
+        response = self.export(self.employer, '?file_format=jsonl&compression=gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="applications.jsonl.gz"')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_filters(self):
+        first, second, third, _ = self.applications
+        self.assertEqual(self.ids(self.employer, f'?job={self.job.pk}'), [first.pk, second.pk])
+        self.assertEqual(self.ids(self.employer, '?status=applied&status=rejected'), [first.pk, third.pk])
+        since = (timezone.now() - timedelta(days=7)).isoformat()
+        self.assertEqual(self.ids(self.employer, f'?applied_after={quote(since)}'), [second.pk, third.pk])
+        self.assertEqual(self.ids(self.employer, f'?applied_before={quote(since)}'), [first.pk])
+
+    def test_employers_only_export_their_own_applicants(self):
+        rival_application = self.applications[3]
+        self.assertEqual(self.ids(self.rival), [rival_application.pk])
+        # Naming another employer's job yields nothing rather than its applicants
+        self.assertEqual(self.ids(self.rival, f'?job={self.job.pk}'), [])
+        self.assertEqual(self.ids(self.employer, f'?job={self.rival_job.pk}'), [])
+        self.assertEqual(self.ids(self.admin), [application.pk for application in self.applications])
+        self.assertEqual(self.export(self.seekers[0]).status_code, 403)
+
+    def test_invalid_parameters(self):
+        for query in ('?file_format=xml', '?compression=zip', '?status=hired', '?applied_after=yesterday', '?job=0'):
+            with self.subTest(query=query):
+                self.assertEqual(self.export(self.employer, query).status_code, 400)
+
+    def test_streams_in_chunks(self):
+        queryset = Application.objects.filter(job__employer=self.employer)
+        chunks = list(export_applications(queryset, 'jsonl', chunk_size=1))
+        self.assertEqual([json.loads(chunk)['id'] for chunk in chunks], [a.pk for a in self.applications[:3]])
+
+
+class StatusTransitionTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.rival = CustomUser.objects.create(email='rival@example.com', role='employer')
+        self.admin = CustomUser.objects.create(email='admin@example.com', role='admin')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker')
+            for i in range(4)
+        ]
+        category = JobCategory.objects.create(name='Engineering')
+        self.job = create_job(self.employer, category)
+        self.other_job = create_job(self.employer, category, title='Designer')
+        self.rival_job = create_job(self.rival, category, title='Rival role')
+
+    def apply(self, job, seeker, status='applied'):
+        return Application.objects.create(job=job, applicant=seeker, status=status)
+
+    def counters(self, job):
+        counters = Job.objects.filter(pk=job.pk).values(*Job.APPLICATION_STATUS_COUNTERS.values()).get()
+        return {field: count for field, count in counters.items() if count}
+
+    def status_of(self, application):
+        return Application.objects.values_list('status', flat=True).get(pk=application.pk)
+
+    def test_bulk_update_status_results(self):
+        applied = self.apply(self.job, self.seekers[0])
+        shortlisted = self.apply(self.other_job, self.seekers[1], 'shortlisted')
+        accepted = self.apply(self.job, self.seekers[2], 'accepted')
+        rivals = self.apply(self.rival_job, self.seekers[3])
+
+        ids = [rivals.pk, applied.pk, accepted.pk, shortlisted.pk, 0, applied.pk]
+        results = bulk_update_status(self.employer, ids, 'under_review')
+        self.assertEqual(results, [
+            {'id': rivals.pk, 'result': NOT_FOUND, 'status': None},
+            {'id': applied.pk, 'result': UPDATED, 'status': 'under_review'},
+            {'id': accepted.pk, 'result': INVALID_TRANSITION, 'status': 'accepted'},
+            {'id': shortlisted.pk, 'result': UPDATED, 'status': 'under_review'},
+            {'id': 0, 'result': NOT_FOUND, 'status': None},
+        ])
+        self.assertEqual(self.status_of(rivals), 'applied')
+        self.assertEqual(self.status_of(accepted), 'accepted')
+        self.assertEqual(self.counters(self.job), {'under_review_count': 1, 'accepted_count': 1})
+        self.assertEqual(self.counters(self.other_job), {'under_review_count': 1})
+        self.assertEqual(self.counters(self.rival_job), {'applied_count': 1})
+
+        event = NotificationEvent.objects.get(event='application_status_changed')
+        self.assertEqual(event.payload, {'application_ids': sorted([applied.pk, shortlisted.pk]), 'status': 'under_review'})
+
+        self.assertEqual(
+            bulk_update_status(self.employer, [applied.pk], 'under_review'),
+            [{'id': applied.pk, 'result': UNCHANGED, 'status': 'under_review'}],
+        )
+        self.assertEqual(NotificationEvent.objects.filter(event='application_status_changed').count(), 1)
+
+    def test_admins_move_any_application(self):
+        rivals = self.apply(self.rival_job, self.seekers[0])
+        [result] = bulk_update_status(self.admin, [rivals.pk], 'rejected')
+        self.assertEqual(result['result'], UPDATED)
+        self.assertEqual(self.counters(self.rival_job), {'rejected_count': 1})
+        # Final statuses stay final, for admins too
+        [result] = bulk_update_status(self.admin, [rivals.pk], 'shortlisted')
+        self.assertEqual(result['result'], INVALID_TRANSITION)
+
+    def test_record_bulk_status_change(self):
+        first = self.apply(self.job, self.seekers[0])
+        self.apply(self.job, self.seekers[1], 'under_review')
+        self.apply(self.other_job, self.seekers[2])
+        Application.objects.update(status='shortlisted')
+
+        record_bulk_status_change([
+            (self.job.pk, 'applied', first.applicant_id, self.employer.pk),
+            (self.job.pk, 'under_review', self.seekers[1].pk, self.employer.pk),
+            (self.other_job.pk, 'applied', self.seekers[2].pk, self.employer.pk),
+            # Already at the new status: not counted twice
+            (self.other_job.pk, 'shortlisted', self.seekers[2].pk, self.employer.pk),
+        ], 'shortlisted')
+        self.assertEqual(self.counters(self.job), {'shortlisted_count': 2})
+        self.assertEqual(self.counters(self.other_job), {'shortlisted_count': 1})
+
+        # Drift never drives a counter below zero
+        record_bulk_status_change([(self.rival_job.pk, 'rejected', self.seekers[3].pk, self.rival.pk)], 'accepted')
+        self.assertEqual(self.counters(self.rival_job), {'accepted_count': 1})
+
+    def test_update_status_checks_the_transition(self):
+        application = self.apply(self.job, self.seekers[0])
+        url = f'/api/applications/{application.pk}/update_status/'
+        self.client.force_authenticate(self.employer)
+
+        response = self.client.post(url, {'status': 'shortlisted'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'shortlisted')
+
+        response = self.client.post(url, {'status': 'shortlisted'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(self.job), {'shortlisted_count': 1})
+
+        self.assertEqual(self.client.post(url, {'status': 'accepted'}).status_code, 200)
+        for new_status in ('applied', 'shortlisted', 'withdrawn'):
+            with self.subTest(status=new_status):
+                response = self.client.post(url, {'status': new_status})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(self.status_of(application), 'accepted')
+        self.assertEqual(self.client.post(url, {'status': 'hired'}).status_code, 400)
+        self.assertEqual(self.counters(self.job), {'accepted_count': 1})
+
+    def test_update_status_ownership(self):
+        application = self.apply(self.job, self.seekers[0])
+        url = f'/api/applications/{application.pk}/update_status/'
+
+        self.client.force_authenticate(self.rival)
+        self.assertEqual(self.client.post(url, {'status': 'rejected'}).status_code, 404)
+        self.client.force_authenticate(self.seekers[0])
+        self.assertEqual(self.client.post(url, {'status': 'rejected'}).status_code, 403)
+        self.assertEqual(self.status_of(application), 'applied')
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(url, {'status': 'rejected'}).status_code, 200)
+        self.assertEqual(self.status_of(application), 'rejected')
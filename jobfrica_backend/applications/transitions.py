@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.fanout import application_status_changed_event, publish
+from .counters import record_bulk_status_change
+from .models import Application
+
+# Per-id outcomes reported by bulk_update_status()
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+INVALID_TRANSITION = 'invalid_transition'
+
+
+def bulk_update_status(user, application_ids, new_status):
+    """
+    Move the given applications to `new_status` on behalf of `user`.
+
+    Ownership and current statuses are read with one locking query, the allowed
+    applications are moved with one UPDATE, their counters are adjusted in bulk and
+    a single event queues the applicants' notifications (see notifications.fanout).
+    Returns one {'id', 'result', 'status'} entry per requested id, in request order.
+    """
+    application_ids = list(dict.fromkeys(application_ids))
+    with transaction.atomic():
+        applications = Application.objects.filter(pk__in=application_ids)
+        if user.role != 'admin':
+            applications = applications.filter(job__employer=user)
+        rows = {
+            row[0]: row
+            for row in applications.select_for_update(of=('self',)).values_list(
+                'pk', 'status', 'job_id', 'job__employer_id', 'applicant_id',
+            )
+        }
+
+        results, moved = [], []
+        for application_id in application_ids:
+            row = rows.get(application_id)
+            if row is None:
+                results.append({'id': application_id, 'result': NOT_FOUND, 'status': None})
+                continue
+            old_status = row[1]
+            if old_status == new_status:
+                result = UNCHANGED
+            elif new_status not in Application.EMPLOYER_STATUS_TRANSITIONS[old_status]:
+                result = INVALID_TRANSITION
+            else:
+                result = UPDATED
+                moved.append(row)
+            results.append({
+                'id': application_id,
+                'result': result,
+                'status': new_status if result == UPDATED else old_status,
+            })
+
+        if moved:
+            Application.objects.filter(pk__in=[row[0] for row in moved]).update(status=new_status, updated_at=timezone.now())
+            record_bulk_status_change(
+                [(job_id, old_status, applicant_id, employer_id)
+                 for _, old_status, job_id, employer_id, applicant_id in moved],
+                new_status,
+            )
+            publish([application_status_changed_event([row[0] for row in moved], new_status)])
+    return results
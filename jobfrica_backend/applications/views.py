@@ -1,20 +1,37 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.db import transaction
+from jobfrica_backend.caching import ConditionalGetMixin
+from jobs.models import JobCategory
+from jobfrica_backend.fastpath import FastListMixin
+from jobfrica_backend.streaming import COMPRESSIONS, streaming_file_response
+from .export import FORMATS, export_applications
+from .filters import ApplicationExportFilter
 from .models import Application
-from .serializers import ApplicationCreateSerializer, ApplicationSerializer
+from .serializers import (ApplicationCreateSerializer, ApplicationSerializer, ApplicationValuesSerializer,
+                          BulkStatusUpdateSerializer)
+from .transitions import INVALID_TRANSITION, NOT_FOUND, UPDATED, bulk_update_status
 from users.permissions import IsAdmin, IsEmployerOrAdmin, IsJobSeekerOrAdmin, IsOwnerOrAdmin
 
 # Create your views here.
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for managing job applications."""
     serializer_class = ApplicationSerializer
     queryset = Application.objects.all()
+    fast_list_serializer_class = ApplicationValuesSerializer
+    conditional_actions = ('list', 'retrieve', 'my_applications', 'all_applications')
+    # Built from the requester's own applications and their jobs, so writes elsewhere
+    # keep their validators; category renames reach the nested job without touching it
+    conditional_timestamp_field = ('updated_at', 'job__updated_at')
+    conditional_models = (JobCategory,)
+    conditional_user_scopes = ('applications',)
 
     def get_permissions(self):
         """Assign permissions based on action."""
-        if self.action in ['update', 'partial_update', 'update_status']:
+        if self.action in ['update', 'partial_update', 'update_status', 'bulk_update_status']:
             # Only employers who own the job can update applications
             return [IsEmployerOrAdmin()]
         elif self.action in ['create']:
@@ -23,6 +40,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         elif self.action in ['destroy']:
             # Only admins or application owners can delete
             return [IsOwnerOrAdmin()]
+        elif self.action in ['export']:
+            # Employers export applications to their jobs, admins every application
+            return [IsEmployerOrAdmin()]
         elif self.action in ['my_applications']:
             # Only authenticated users (job seekers) can view their applications
             return [permissions.IsAuthenticated()]
@@ -46,20 +66,21 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             return Application.objects.none()
         if user.role == 'employer':
             """Employers can see applications for their jobs"""
-            return Application.objects.filter(job__employer=user).select_related('job', 'applicant')
+            return Application.objects.filter(job__employer=user).select_related('applicant').with_job_summary()
         elif user.role == 'job_seeker':
             """Job seekers can see their own applications"""
-            return Application.objects.filter(applicant=user).select_related('job')
+            return Application.objects.filter(applicant=user).select_related('applicant').with_job_summary()
         elif user.role == 'admin':
             # Admins see all applications
-            return Application.objects.all().select_related('applicant', 'job')
+            return Application.objects.all().select_related('applicant').with_job_summary()
         return Application.objects.none()
 
     def perform_create(self, serializer):
         """Associate the applicant with the logged-in user."""
         if self.request.user.role != 'job_seeker':
             raise permissions.PermissionDenied("Only job seekers can apply for jobs")
-        serializer.save(applicant=self.request.user)
+        with transaction.atomic():
+            serializer.save(applicant=self.request.user)
 
     @action(detail=True, methods=['post', 'patch'], permission_classes=[IsEmployerOrAdmin])  
     def update_status(self, request, pk=None):
@@ -72,18 +93,41 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 {'error': 'You can only update applications for your own jobs'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        if new_status in dict(Application.STATUS_CHOICES).keys():
-            application.status = new_status
-            application.save()
-            serializer = self.get_serializer(application)
-            return Response(serializer.data)
-        
-        return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        if new_status not in dict(Application.STATUS_CHOICES):
+            return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The same locked, transition-checked move as bulk_update_status, for one id
+        [result] = bulk_update_status(request.user, [application.pk], new_status)
+        if result['result'] == NOT_FOUND:
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        if result['result'] == INVALID_TRANSITION:
+            return Response(
+                {'error': f"Cannot move an application from {result['status']} to {new_status}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        application.status = result['status']
+        serializer = self.get_serializer(application)
+        return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], permission_classes=[IsEmployerOrAdmin])
+    def bulk_update_status(self, request):
+        """Move many applications to one status, reporting the outcome for each id."""
+        serializer = BulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk_update_status(request.user, serializer.validated_data['ids'], serializer.validated_data['status'])
+        return Response({
+            'status': serializer.validated_data['status'],
+            'updated': sum(result['result'] == UPDATED for result in results),
+            'results': results,
+        })
+
     @action(detail=False, methods=['get'], permission_classes=[IsAdmin])
     def all_applications(self, request):
         """Admin can view all applications in the system."""
-        applications = Application.objects.all().select_related('job', 'applicant')
+        return self.conditional_response(self._all_applications, request)
+
+    def _all_applications(self, request):
+        applications = Application.objects.all().select_related('applicant').with_job_summary()
         page = self.paginate_queryset(applications)
         
         if page is not None:
@@ -96,8 +140,11 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_applications(self, request):
         """Job seekers can view their own applications."""
+        return self.conditional_response(self._my_applications, request)
+
+    def _my_applications(self, request):
         user = request.user
-        applications = Application.objects.filter(applicant=user).select_related('job')
+        applications = Application.objects.filter(applicant=user).select_related('applicant').with_job_summary()
         page = self.paginate_queryset(applications)
         
         if page is not None:
@@ -105,4 +152,27 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             return self.get_paginated_response(serializer.data)
         
         serializer = ApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream applications as CSV or JSON Lines, optionally gzipped and filtered by job, status and date."""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            raise ValidationError({'file_format': 'Must be csv or jsonl.'})
+        compression = request.query_params.get('compression')
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValidationError({'compression': 'Must be gzip.'})
+
+        applications = Application.objects.all()
+        if request.user.role != 'admin':
+            applications = applications.filter(job__employer=request.user)
+        filterset = ApplicationExportFilter(request.query_params, queryset=applications)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        return streaming_file_response(
+            export_applications(filterset.qs, file_format),
+            f'applications.{file_format}', content_type, compression,
+        )
@@ -0,0 +1,334 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_PREFIX = 'version:'
+
+
+def model_version_key(model):
+    return f'{VERSION_PREFIX}model:{model._meta.label_lower}'
+
+
+def user_version_key(user_id, scope):
+    return f'{VERSION_PREFIX}user:{user_id}:{scope}'
+
+
+def object_version_key(model, pk):
+    return f'{VERSION_PREFIX}object:{model._meta.label_lower}:{pk}'
+
+
+def _initial_version():
+    # Versions are clock based so an evicted counter never reuses an old value,
+    # and a version doubles as the time of the last change
+    return time.time_ns()
+
+
+def get_versions(keys):
+    """Current value of each version counter, creating missing ones."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*keys):
+    """Advance version counters, invalidating everything cached against them."""
+    current = cache.get_many(keys)
+    cache.set_many(
+        {key: max(_initial_version(), current.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def bump_model_version(*models):
+    bump_version(*(model_version_key(model) for model in models))
+
+
+def bump_user_version(user_ids, *scopes):
+    """Advance the per-user `scopes` versions of every user in `user_ids`."""
+    bump_version(*(user_version_key(user_id, scope) for user_id in user_ids for scope in scopes))
+
+
+def bump_object_version(model, pks):
+    """Advance the per-object versions of the `model` rows `pks` (see object_version_model)."""
+    bump_version(*(object_version_key(model, pk) for pk in pks))
+
+
+def object_version_keys(view, kwargs):
+    """
+    The version key of the object a detail request reads, when the view sets
+    `object_version_model`; for changes that reach one object's payload without
+    a write to its model, such as a job's application counters.
+    """
+    model = getattr(view, 'object_version_model', None)
+    lookup_url_kwarg = getattr(view, 'lookup_url_kwarg', None) or getattr(view, 'lookup_field', 'pk')
+    if model is None or lookup_url_kwarg not in kwargs:
+        return []
+    return [object_version_key(model, kwargs[lookup_url_kwarg])]
+
+
+def _store(key, build, fresh_for, stale_for, versions):
+    value = build()
+    cache.set(
+        key,
+        {'value': value, 'built_at': time.time(), 'versions': versions},
+        fresh_for + stale_for,
+    )
+    return value
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _rebuild_in_background(key, lock_key, build, fresh_for, stale_for, versions):
+    """Rebuild an entry on the process's single rebuild thread; returns its Future."""
+    global _executor
+
+    def run():
+        try:
+            _store(key, build, fresh_for, stale_for, versions)
+        except Exception:
+            logger.exception('Background rebuild of %s failed', key)
+        finally:
+            cache.delete(lock_key)
+            # The pool thread opened its own connections; don't leak them
+            connections.close_all()
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-rebuild')
+    return _executor.submit(run)
+
+
+def stale_while_revalidate(key, build, fresh_for, stale_for, models=(), wait=2.0):
+    """
+    Return the cached result of `build()`, shared by every worker through the cache.
+
+    An entry is fresh for `fresh_for` seconds and while the versions of `models` are
+    unchanged. After that it is still served for up to `stale_for` seconds while the
+    process's rebuild thread refreshes it. A lock taken with cache.add() ensures a
+    single rebuild at a time; when there is nothing to serve, other callers wait up
+    to `wait` seconds for it before building it themselves.
+    """
+    lock_key = f'{key}:rebuilding'
+    versions = get_versions([model_version_key(model) for model in models])
+    entry = cache.get(key)
+
+    if entry is not None:
+        fresh = entry['versions'] == versions and time.time() - entry['built_at'] < fresh_for
+        if not fresh and cache.add(lock_key, 1, timeout=max(int(wait) * 5, 30)):
+            _rebuild_in_background(key, lock_key, build, fresh_for, stale_for, versions)
+        return entry['value']
+
+    if cache.add(lock_key, 1, timeout=max(int(wait) * 5, 30)):
+        try:
+            return _store(key, build, fresh_for, stale_for, versions)
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+    return build()
+
+
+def rebuild_cached(key, build, fresh_for, stale_for, models=()):
+    """Rebuild a stale_while_revalidate() entry now, e.g. from a periodic command."""
+    versions = get_versions([model_version_key(model) for model in models])
+    return _store(key, build, fresh_for, stale_for, versions)
+
+
+def not_modified(request, etag, last_modified=None, exists=True):
+    """
+    True when the request's validators match the current representation.
+    `If-None-Match: *` matches any representation, so only once `exists` is known.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return (exists and '*' in tags) or etag in tags
+    if last_modified is not None:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Caches the response data of read actions for anonymous users.
+
+    Entries are keyed by the action, URL kwargs, normalized query parameters and the
+    version counters of `cache_models` (and of `object_version_model` for detail
+    actions), so any write to those models bumps a version and makes every stale
+    entry unreachable - no TTL guesswork. Responses carry
+    ETag/Last-Modified and conditional requests are answered with 304.
+    """
+    cache_models = ()
+    cache_response_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request, **kwargs):
+        query = sorted(
+            (key, sorted(values)) for key, values in request.query_params.lists()
+        )
+        versions = get_versions(
+            [model_version_key(model) for model in self.cache_models] + object_version_keys(self, kwargs)
+        )
+        signature = repr((
+            request.get_host(),
+            type(self).__module__,
+            type(self).__name__,
+            self.action,
+            sorted(kwargs.items()),
+            query,
+            versions,
+        ))
+        return 'response:' + hashlib.sha1(signature.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated or self.action not in self.cache_response_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request, **kwargs)
+        etag = quote_etag(key.split(':', 1)[1])
+        entry = cache.get(key)
+        # The ETag is derived from the versions, so it can be validated even after eviction;
+        # only cached 200s prove the resource exists
+        last_modified = entry['last_modified'] if entry is not None else None
+        if not_modified(request, etag, last_modified, exists=entry is not None):
+            return not_modified_response(etag, last_modified)
+
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {'data': response.data, 'last_modified': time.time()}
+            cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+            if not_modified(request, etag, entry['last_modified']):
+                return not_modified_response(etag, entry['last_modified'])
+        else:
+            response = Response(entry['data'])
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match/If-Modified-Since with 304 before anything is serialized.
+
+    Validators are cheap: `conditional_timestamp_field` (one field or several, such as
+    a related row's timestamp) is aggregated with Max() and Count() over the filtered queryset, and the versions of `conditional_models` and
+    of the requesting user's `conditional_user_scopes` are folded into the ETag.
+    """
+    conditional_actions = ('list', 'retrieve')
+    conditional_timestamp_field = None
+    conditional_models = ()
+    conditional_user_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_models(self):
+        return self.conditional_models
+
+    def _lookup_url_kwarg(self):
+        return getattr(self, 'lookup_url_kwarg', None) or getattr(self, 'lookup_field', 'pk')
+
+    def get_conditional_queryset(self, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self._lookup_url_kwarg()
+        if lookup_url_kwarg in kwargs:
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_validators(self, request, **kwargs):
+        """Return (etag, last_modified) describing the current representation."""
+        parts = [
+            type(self).__module__,
+            type(self).__name__,
+            getattr(self, 'action', None),
+            sorted(kwargs.items()),
+            sorted((key, sorted(values)) for key, values in request.query_params.lists()),
+            request.user.pk,
+        ]
+        timestamps = []
+
+        fields = self.conditional_timestamp_field
+        if fields:
+            fields = (fields,) if isinstance(fields, str) else tuple(fields)
+            aggregate = self.get_conditional_queryset(**kwargs).order_by().aggregate(
+                total=Count('pk'),
+                **{f'latest_{i}': Max(field) for i, field in enumerate(fields)},
+            )
+            latest = [aggregate[f'latest_{i}'] for i in range(len(fields))]
+            parts += [*latest, aggregate['total']]
+            timestamps += [value.timestamp() for value in latest if value is not None]
+
+        keys = [model_version_key(model) for model in self.get_conditional_models()]
+        keys += object_version_keys(self, kwargs)
+        if request.user.is_authenticated:
+            keys += [user_version_key(request.user.pk, scope) for scope in self.conditional_user_scopes]
+        if keys:
+            versions = get_versions(keys)
+            parts += versions
+            timestamps += [version / 1e9 for version in versions]
+
+        etag = quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+        return etag, (max(timestamps) if timestamps else None)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        action = getattr(self, 'action', None)
+        if request.method not in ('GET', 'HEAD') or (action is not None and action not in self.conditional_actions):
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_conditional_validators(request, **kwargs)
+        # A list always exists; a single object only once the handler found it
+        exists = self._lookup_url_kwarg() not in kwargs
+        if not_modified(request, etag, last_modified, exists=exists):
+            return not_modified_response(etag, last_modified)
+
+        response = handler(request, *args, **kwargs)
+        if not exists and response.status_code == status.HTTP_200_OK and not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        # A 304 here comes from an inner mixin; it must carry this mixin's validators
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,112 @@
+"""
+Email template rendering.
+
+An email named `name` is the template emails/<name>.html plus, optionally,
+emails/<name>.txt; without a text template the text body is the HTML with its tags
+stripped. EmailRenderer compiles each pair once per process and renders both bodies
+in one call, and render_many() renders a batch, spread over EMAIL_RENDER_WORKERS
+threads. Rendering is CPU-bound, so threads only pay off when contexts do I/O (such
+as lazy lookups); with one worker the batch is rendered inline. Render times are kept
+per email, see metrics().
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+DIRECTORY = 'emails'
+
+
+class EmailRenderer:
+    def __init__(self, directory=DIRECTORY, workers=None):
+        self.directory = directory
+        self.workers = workers or settings.EMAIL_RENDER_WORKERS
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._timings = {}
+        self._executor = None
+
+    def _compile(self, name):
+        html = get_template(f'{self.directory}/{name}.html')
+        try:
+            text = get_template(f'{self.directory}/{name}.txt')
+        except TemplateDoesNotExist:
+            text = None
+        return html, text
+
+    def templates(self, name):
+        """The compiled (html, text or None) templates of `name`."""
+        # Under DEBUG templates are recompiled, so edits show up without a restart
+        if settings.DEBUG:
+            return self._compile(name)
+        compiled = self._templates.get(name)
+        if compiled is None:
+            compiled = self._compile(name)
+            with self._lock:
+                compiled = self._templates.setdefault(name, compiled)
+        return compiled
+
+    def render(self, name, context):
+        """The (text, html) bodies of `name` for `context`."""
+        started = time.perf_counter()
+        html_template, text_template = self.templates(name)
+        html = html_template.render(context)
+        text = text_template.render(context) if text_template else strip_tags(html)
+        self._record(name, time.perf_counter() - started)
+        return text, html
+
+    def render_many(self, emails, return_exceptions=False):
+        """
+        Render a batch of (name, context) pairs, in the thread pool if any; results come
+        back in order. With `return_exceptions`, an email that fails to render yields
+        its exception instead of aborting the batch. Contexts should be fully loaded:
+        a pool thread touching the database would open a connection of its own.
+        """
+        emails = list(emails)
+        if len(emails) < 2 or self.workers < 2:
+            return [self._render_one(name, context, return_exceptions) for name, context in emails]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='email-render')
+        return list(self._executor.map(lambda email: self._render_one(*email, return_exceptions), emails))
+
+    def _render_one(self, name, context, return_exceptions):
+        try:
+            return self.render(name, context)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return exc
+
+    def _record(self, name, seconds):
+        with self._lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def metrics(self):
+        """{name: {'count', 'total_ms', 'mean_ms', 'max_ms'}} for the renders since start or reset()."""
+        with self._lock:
+            return {
+                name: {
+                    'count': timing['count'],
+                    'total_ms': round(timing['total'] * 1000, 3),
+                    'mean_ms': round(timing['total'] * 1000 / timing['count'], 3),
+                    'max_ms': round(timing['max'] * 1000, 3),
+                }
+                for name, timing in self._timings.items()
+            }
+
+    def reset(self):
+        """Forget the compiled templates and the timings."""
+        with self._lock:
+            self._templates.clear()
+            self._timings.clear()
+
+
+renderer = EmailRenderer()
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils.functional import cached_property
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .renderers import FastJSONRenderer
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer that renders `.values()` rows as `serializer_class` would
+    render model instances, without DRF's per-field attribute machinery.
+
+    Subclasses list the lookups they need in `values` (relative to `prefix`, so they
+    can be nested) and build each representation in `to_representation()`. Values that
+    need formatting are passed through the matching field of `serializer_class`, so
+    datetimes, decimals and files come out exactly as the regular serializer's.
+    """
+    serializer_class = None
+    values = ()
+
+    def __init__(self, instance=None, many=True, context=None, prefix=''):
+        self.instance = instance
+        self.context = context or {}
+        self.prefix = prefix
+
+    @classmethod
+    def lookups(cls, prefix=''):
+        return [prefix + lookup for lookup in cls.values]
+
+    @cached_property
+    def source_fields(self):
+        return self.serializer_class(context=self.context).fields
+
+    def field(self, row, lookup, name=None):
+        """The row value for `lookup`, formatted by the serializer field `name`."""
+        value = row[self.prefix + lookup]
+        if value is None or name is None:
+            return value
+        return self.source_fields[name].to_representation(value)
+
+    def file(self, row, lookup, name, model_field):
+        """A file column, which .values() returns as its name."""
+        value = row[self.prefix + lookup]
+        if not value:
+            return None
+        return self.source_fields[name].to_representation(FieldFile(None, model_field, value))
+
+    def related(self, row, lookup, model, fields):
+        """
+        A `model` instance holding the selected `fields` of the related object `lookup`,
+        for values the regular serializer derives from the object itself (such as str()).
+        """
+        return model(**{name: row[f'{self.prefix}{lookup}__{name}'] for name in fields})
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.instance]
+
+
+class FastListMixin:
+    """
+    Serves the list action from `.values()` rows through `fast_list_serializer_class`
+    and encodes the page with orjson, when the view is enabled in FAST_LIST_VIEWS.
+
+    The output is the same as the regular path; the switch exists so the fast path
+    can be rolled out one view at a time.
+    """
+    fast_list_serializer_class = None
+    plain_json_response = False
+    renderer_classes = [FastJSONRenderer, *[
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+        if renderer.format != 'json'
+    ]]
+
+    def fast_list_enabled(self):
+        enabled = settings.FAST_LIST_VIEWS
+        label = f'{type(self).__module__}.{type(self).__name__}'
+        return self.fast_list_serializer_class is not None and ('*' in enabled or label in enabled)
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list_enabled():
+            return super().list(request, *args, **kwargs)
+
+        serializer_class = self.fast_list_serializer_class
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer_class.lookups())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = serializer_class(rows, many=True, context=self.get_serializer_context()).data
+
+        self.plain_json_response = True
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
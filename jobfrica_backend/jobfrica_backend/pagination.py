@@ -0,0 +1,147 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def planner_row_estimate(queryset):
+    """
+    Row estimate from the Postgres planner, or None when unavailable.
+    Unfiltered tables use pg_class.reltuples; anything else asks EXPLAIN.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    query = queryset.order_by().query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # -1 means the table has never been vacuumed or analyzed
+            if row and row[0] >= 0:
+                return row[0]
+
+        sql, params = query.sql_with_params()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPage(Page):
+    """Page whose `has_next` comes from fetching one row past it, not from the count."""
+
+    def __init__(self, object_list, number, paginator, more):
+        super().__init__(object_list, number, paginator)
+        self.more = more
+
+    def has_next(self):
+        return self.more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts exactly up to a threshold and estimates beyond it.
+
+    The exact count runs under a LIMIT of threshold + 1 rows, so it is cheap whatever
+    the table size; only results above the threshold fall back to the planner
+    estimate. Exact counts are cached per query for a short TTL.
+    """
+    # True only for a count computed exactly by this request
+    count_is_exact = True
+
+    @property
+    def estimate_threshold(self):
+        return settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+
+    @property
+    def cache_ttl(self):
+        return settings.PAGINATION_COUNT_CACHE_TTL
+
+    def count_cache_key(self):
+        query = self.object_list.order_by().query
+        sql, params = query.sql_with_params()
+        signature = f'{self.object_list.db}:{sql}:{params!r}'
+        return 'pagination:count:' + hashlib.sha1(signature.encode()).hexdigest()
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+
+        key = self.count_cache_key()
+        cached = cache.get(key)
+        if cached is not None:
+            # May have gone stale since another request counted it
+            self.count_is_exact = False
+            return cached
+
+        threshold = self.estimate_threshold
+        count = self.object_list.order_by()[:threshold + 1].count()
+        if count <= threshold:
+            cache.set(key, count, self.cache_ttl)
+            return count
+
+        # Known to be above the threshold, whatever the planner thinks
+        self.count_is_exact = False
+        estimate = planner_row_estimate(self.object_list)
+        return max(estimate or 0, count)
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        # Only the lower bound can be trusted against an estimate or a cached count
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        self.count  # resolves count_is_exact
+        if self.count_is_exact:
+            return super().page(number)
+
+        # Slice without clamping to the count, and fetch one extra row to learn whether
+        # there is a next page, so a wrong count never truncates or extends the feed
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return EstimatedCountPage(objects[:self.per_page], number, self, more=len(objects) > self.per_page)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page-number pagination that reports whether `count` was counted exactly by this request."""
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_exact': self.page.paginator.count_is_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_exact'] = {
+            'type': 'boolean',
+            'example': True,
+        }
+        return response_schema
@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _unsupported(value):
+    raise TypeError(f'{type(value).__name__} is left to the standard encoder')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when the view has built its data from plain
+    JSON types (see FastListMixin), producing the same bytes as JSONRenderer.
+
+    orjson is only trusted with str/int/bool/None/list/dict payloads: datetimes are
+    passed through to the fallback, and anything it can't encode identically - or at
+    all - is rendered by JSONRenderer instead. Without orjson installed this is just
+    JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        view = renderer_context.get('view')
+        if (
+            orjson is None
+            or data is None
+            or not getattr(view, 'plain_json_response', False)
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_unsupported, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset as JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -15,6 +15,7 @@ import environ
 import os
 from datetime import timedelta
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -154,6 +155,25 @@ else:
         }
     }
 
+# Cache (local memory by default; set CACHE_URL=redis://... in production)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# Cache versions, response payloads, refresh locks and unread counters are shared
+# by every web and worker process, so a per-process cache would serve stale data
+if not DEBUG and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured('Set CACHE_URL to a shared cache such as redis://... when DEBUG is off.')
+
+# Seconds a cached anonymous response may live; versions invalidate it sooner
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=600)
+
+# Seconds the public dashboard is served as is, then served stale while it is rebuilt
+PUBLIC_DASHBOARD_FRESH_FOR = env.int('PUBLIC_DASHBOARD_FRESH_FOR', default=60)
+PUBLIC_DASHBOARD_STALE_FOR = env.int('PUBLIC_DASHBOARD_STALE_FOR', default=3600)
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -169,10 +189,53 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'jobfrica_backend.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 20,
 }
 
+# Neighbours precomputed per open job for the similar jobs endpoint
+SIMILAR_JOBS_TOP_K = env.int('SIMILAR_JOBS_TOP_K', default=10)
+# Who processes the similar-jobs refresh queue: 'worker', 'thread' or 'immediate' (see jobs.similarity)
+SIMILAR_JOBS_REFRESH_BACKEND = env('SIMILAR_JOBS_REFRESH_BACKEND', default='worker')
+# Seconds a process reuses its similar-jobs feature matrix before re-encoding the catalogue
+SIMILAR_JOBS_MATRIX_MAX_AGE = env.int('SIMILAR_JOBS_MATRIX_MAX_AGE', default=3600)
+RECOMMENDED_JOBS_TOP_N = env.int('RECOMMENDED_JOBS_TOP_N', default=20)
+
+# Notification fan-out (see notifications.fanout): 'worker', 'thread' or 'immediate'
+NOTIFICATION_FANOUT_BACKEND = env('NOTIFICATION_FANOUT_BACKEND', default='worker')
+NOTIFICATION_FANOUT_WORKERS = env.int('NOTIFICATION_FANOUT_WORKERS', default=2)
+NOTIFICATION_FANOUT_BATCH_SIZE = env.int('NOTIFICATION_FANOUT_BATCH_SIZE', default=1000)
+# How recently a job seeker must have applied in a category to hear about its new jobs
+NOTIFICATION_JOB_MATCH_DAYS = env.int('NOTIFICATION_JOB_MATCH_DAYS', default=90)
+
+# Live notification stream (see notifications.live): 'postgres' (LISTEN/NOTIFY) or 'local'
+NOTIFICATION_STREAM_BROKER = env('NOTIFICATION_STREAM_BROKER', default='postgres')
+# Seconds between heartbeats on an idle stream, and before the server ends it
+NOTIFICATION_STREAM_HEARTBEAT = env.int('NOTIFICATION_STREAM_HEARTBEAT', default=15)
+NOTIFICATION_STREAM_MAX_AGE = env.int('NOTIFICATION_STREAM_MAX_AGE', default=300)
+# Reconnection delay advertised to EventSource clients
+NOTIFICATION_STREAM_RETRY_MS = env.int('NOTIFICATION_STREAM_RETRY_MS', default=3000)
+# Seconds a stream ticket (see notifications.live) stays valid
+NOTIFICATION_STREAM_TICKET_TTL = env.int('NOTIFICATION_STREAM_TICKET_TTL', default=30)
+
+# Days read notifications stay in the live table before the purge_notifications command
+# archives them (see notifications.retention), with per-type overrides such as
+# NOTIFICATION_RETENTION_DAYS_BY_TYPE=new_job_posting=30. A type set to 0 is kept forever.
+NOTIFICATION_RETENTION_DAYS = env.int('NOTIFICATION_RETENTION_DAYS', default=90)
+NOTIFICATION_RETENTION_DAYS_BY_TYPE = env.dict(
+    'NOTIFICATION_RETENTION_DAYS_BY_TYPE', cast={'value': int}, default={'new_job_posting': 30},
+)
+# Days processed fan-out events are kept for inspection
+NOTIFICATION_EVENT_RETENTION_DAYS = env.int('NOTIFICATION_EVENT_RETENTION_DAYS', default=7)
+
+# Views whose list action is served by FastListMixin, e.g. 'jobs.views.JobViewSet', or '*'
+FAST_LIST_VIEWS = env.list('FAST_LIST_VIEWS', default=[])
+
+# Paginated counts are exact up to this many rows and planner estimates beyond it
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = env.int('PAGINATION_COUNT_ESTIMATE_THRESHOLD', default=10000)
+# Seconds an exact count is reused for the same filtered query
+PAGINATION_COUNT_CACHE_TTL = env.int('PAGINATION_COUNT_CACHE_TTL', default=30)
+
 # Spectaluar Configuration
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Jobfrica API',
@@ -295,4 +358,33 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'mediafiles')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-AUTH_USER_MODEL = 'users.CustomUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'users.CustomUser'
+
+# Email. Locally EMAIL_BACKEND can be the console backend, or the file backend
+# ('django.core.mail.backends.filebased.EmailBackend') writing to EMAIL_FILE_PATH
+EMAIL_BACKEND = env(
+    'EMAIL_BACKEND',
+    default='django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend',
+)
+EMAIL_HOST = env('EMAIL_HOST', default='localhost')
+EMAIL_PORT = env.int('EMAIL_PORT', default=587)
+EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=True)
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=10)
+EMAIL_FILE_PATH = env('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='Jobfrica <no-reply@jobfrica.vercel.app>')
+# Threads rendering a batch of emails (see jobfrica_backend.emails); 1 renders inline
+EMAIL_RENDER_WORKERS = env.int('EMAIL_RENDER_WORKERS', default=1)
+# Where links in emails point
+FRONTEND_URL = env('FRONTEND_URL', default='https://jobfrica.vercel.app')
+
+# Email outbox (see notifications.outbox): 'worker', 'thread' or 'immediate'; use
+# 'worker' only where the send_outbox_emails command is deployed
+EMAIL_OUTBOX_BACKEND = env('EMAIL_OUTBOX_BACKEND', default='thread')
+EMAIL_OUTBOX_BATCH_SIZE = env.int('EMAIL_OUTBOX_BATCH_SIZE', default=50)
+# Failed sends are retried after EMAIL_OUTBOX_RETRY_DELAY seconds, doubling each time
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6)
+EMAIL_OUTBOX_RETRY_DELAY = env.int('EMAIL_OUTBOX_RETRY_DELAY', default=60)
+# Seconds a claimed email is left to its sender before another one may claim it
+EMAIL_OUTBOX_CLAIM_TIMEOUT = env.int('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=600)
@@ -0,0 +1,54 @@
+"""
+Helpers for file exports streamed straight from a database cursor.
+
+The rows are produced lazily (typically from `.values().iterator(chunk_size=...)`),
+encoded a line at a time and regrouped into chunks of about CHUNK_SIZE bytes, so a
+worker's memory use does not depend on how many rows are exported.
+"""
+import zlib
+
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 64 * 1024
+COMPRESSIONS = ('gzip',)
+
+
+class Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def buffered(chunks, size=CHUNK_SIZE):
+    """Regroups text or bytes `chunks` into pieces of at least `size` characters/bytes."""
+    pending, length = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield pending[0][:0].join(pending)
+            pending, length = [], 0
+    if pending:
+        yield pending[0][:0].join(pending)
+
+
+def gzipped(chunks, encoding='utf-8'):
+    """Gzip-compresses text `chunks` incrementally."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def streaming_file_response(chunks, filename, content_type, compression=None):
+    """A download of the text `chunks`, gzip-compressed when `compression` is 'gzip'."""
+    if compression == 'gzip':
+        response = StreamingHttpResponse(buffered(gzipped(buffered(chunks))), content_type='application/gzip')
+        filename = f'{filename}.gz'
+    else:
+        response = StreamingHttpResponse(buffered(chunks), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
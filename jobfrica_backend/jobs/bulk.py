@@ -0,0 +1,190 @@
+"""
+Bulk job import and export.
+
+Both directions use the same CSV / JSON Lines layout: one job per row with the
+columns in FIELDS, the category given by name and skills as a list of names (joined
+with TAG_SEPARATOR in CSV). Imports are validated row by row while the upload is
+read, and valid rows are written a batch at a time: one lookup for the batch's
+categories and skills, one INSERT for the jobs, one for their tags and one UPDATE
+for their search vectors. Invalid rows are skipped and reported.
+"""
+import csv
+import io
+import json
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, OuterRef
+from django.db.models.functions import Lower
+
+from jobfrica_backend.caching import bump_model_version, bump_user_version
+from jobfrica_backend.streaming import Echo
+from notifications.fanout import job_created_event, publish
+from .models import Job, JobCategory, Skill
+from .search import update_search_vector
+from .serializers import JobImportSerializer
+from .signals import queue_similarity_refresh
+
+FORMATS = ('csv', 'jsonl')
+FIELDS = (
+    'title', 'description', 'company', 'location', 'job_type', 'experience_level',
+    'salary_min', 'salary_max', 'application_url', 'application_email', 'status',
+    'category', 'tags',
+)
+TAG_SEPARATOR = ';'
+
+
+def detect_format(filename, file_format=None):
+    """The explicit `file_format`, else the one matching the file extension, else None."""
+    if file_format:
+        return file_format if file_format in FORMATS else None
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(stream)
+    for number, record in enumerate(reader, start=1):
+        if None in record:
+            yield number, None, {'non_field_errors': ['Row has more columns than the header.']}
+            continue
+        # Empty cells mean "not given", so optional columns fall back to their defaults
+        row = {key: value.strip() for key, value in record.items() if key and value and value.strip()}
+        if 'tags' in row:
+            row['tags'] = [name.strip() for name in row['tags'].split(TAG_SEPARATOR) if name.strip()]
+        yield number, row, None
+
+
+def _jsonl_rows(stream):
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, {'non_field_errors': ['Invalid JSON.']}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {'non_field_errors': ['Expected a JSON object.']}
+            continue
+        yield number, row, None
+
+
+def read_rows(stream, file_format):
+    """Yields (row number, row, parse errors) for each record of a text stream."""
+    if file_format == 'csv':
+        return _csv_rows(stream)
+    return _jsonl_rows(stream)
+
+
+def _names(value):
+    return {value.strip().lower()} if isinstance(value, str) else set()
+
+
+def _import_batch(rows, employer, report):
+    category_names, skill_names = set(), set()
+    for _, row in rows:
+        category_names |= _names(row.get('category'))
+        tags = row.get('tags')
+        if isinstance(tags, list):
+            for name in tags:
+                skill_names |= _names(name)
+
+    context = {
+        'categories': {
+            category.key: category
+            for category in JobCategory.objects.annotate(key=Lower('name')).filter(key__in=category_names)
+        },
+        'skills': {
+            skill.key: skill
+            for skill in Skill.objects.annotate(key=Lower('name')).filter(key__in=skill_names)
+        },
+    }
+
+    jobs, tags = [], []
+    for number, row in rows:
+        serializer = JobImportSerializer(data=row, context=context)
+        if not serializer.is_valid():
+            report['errors'].append({'row': number, 'errors': serializer.errors})
+            continue
+        attrs = dict(serializer.validated_data)
+        tags.append(attrs.pop('tags', []))
+        jobs.append(Job(employer=employer, **attrs))
+
+    if not jobs:
+        return
+    with transaction.atomic():
+        Job.objects.bulk_create(jobs)
+        Job.tags.through.objects.bulk_create([
+            Job.tags.through(job_id=job.pk, skill_id=skill.pk)
+            for job, skills in zip(jobs, tags)
+            for skill in skills
+        ])
+        job_ids = [job.pk for job in jobs]
+        # bulk_create skips Job.save() and the signals, so do their work for the batch
+        update_search_vector(Job.objects.filter(pk__in=job_ids))
+        queue_similarity_refresh(job_ids)
+        publish([job_created_event(job_id) for job_id in job_ids])
+        transaction.on_commit(lambda: bump_model_version(Job))
+        transaction.on_commit(lambda: bump_user_version([employer.pk], 'jobs'))
+    report['created'] += len(jobs)
+
+
+def import_jobs(stream, file_format, employer, batch_size=500):
+    """
+    Creates a job owned by `employer` for every valid row of `stream` (a text stream
+    in `file_format`). Returns {'created': n, 'failed': n, 'errors': [{'row', 'errors'}]}.
+    """
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    batch = []
+    for number, row, errors in read_rows(stream, file_format):
+        if errors:
+            report['errors'].append({'row': number, 'errors': errors})
+            continue
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, employer, report)
+            batch = []
+    if batch:
+        _import_batch(batch, employer, report)
+    report['failed'] = len(report['errors'])
+    return report
+
+
+def _export_values(queryset, chunk_size):
+    tag_names = ArraySubquery(
+        Job.tags.through.objects.filter(job_id=OuterRef('pk')).order_by('skill__name').values('skill__name')
+    )
+    plain_fields = [field for field in FIELDS if field not in ('category', 'tags')]
+    rows = (
+        queryset.order_by('pk')
+        .values(*plain_fields, category_name=F('category__name'), tag_names=tag_names)
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        row['category'] = row.pop('category_name')
+        row['tags'] = row.pop('tag_names')
+        yield row
+
+
+def export_jobs(queryset, file_format, chunk_size=1000):
+    """Yields the jobs of `queryset` in `file_format`, a chunk of text at a time, in the layout import_jobs() reads."""
+    rows = _export_values(queryset, chunk_size)
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            row['tags'] = TAG_SEPARATOR.join(row['tags'])
+            yield writer.writerow(['' if row[field] is None else row[field] for field in FIELDS])
+        return
+
+    for row in rows:
+        yield json.dumps({field: row[field] for field in FIELDS}, cls=DjangoJSONEncoder) + '\n'
+
+
+def open_text(file):
+    """A text stream over an uploaded (binary) file; a leading BOM is ignored."""
+    return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from jobs.models import Job
+from jobs.search import refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Backfills Job.search_vector in primary-key ranges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of primary keys covered by each UPDATE')
+        parser.add_argument('--start-id', type=int, default=None,
+                            help='Resume from this job id')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every row, not only rows with an empty search_vector')
+
+    def handle(self, *args, **options):
+        queryset = Job.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(search_vector__isnull=True)
+        if options['start_id'] is not None:
+            # Rows below --start-id were done by an earlier run; don't count them as remaining
+            queryset = queryset.filter(pk__gte=options['start_id'])
+
+        remaining = queryset.count()
+        if not remaining:
+            self.stdout.write('Nothing to backfill')
+            return
+        self.stdout.write(f'Backfilling search_vector for {remaining} jobs')
+
+        done = 0
+
+        def progress(last_id, updated):
+            nonlocal done
+            done += updated
+            if updated:
+                self.stdout.write(f'  {done}/{remaining} jobs updated (through id {last_id}, resume with --start-id {last_id + 1})')
+
+        total = refresh_search_vectors(
+            queryset,
+            batch_size=options['batch_size'],
+            start_id=options['start_id'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Backfilled search_vector for {total} jobs'))
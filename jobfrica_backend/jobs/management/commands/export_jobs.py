@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.bulk import FORMATS, export_jobs
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Writes jobs as CSV or JSON Lines, in the layout import_jobs reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employer', default=None, help='Only export the jobs of the employer with this email')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', default=None, help='File to write; defaults to standard output')
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.all()
+        if options['employer']:
+            jobs = jobs.filter(employer__email=options['employer'])
+            if not jobs.exists():
+                raise CommandError(f'No jobs posted by {options["employer"]}')
+
+        if options['output'] is None:
+            for chunk in export_jobs(jobs, options['format']):
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(export_jobs(jobs, options['format']))
+        self.stdout.write(self.style.SUCCESS(f'Exported jobs to {options["output"]}'))
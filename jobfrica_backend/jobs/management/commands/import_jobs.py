@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.bulk import FORMATS, detect_format, import_jobs
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Creates jobs from a CSV or JSON Lines file, reporting the rows that failed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--employer', required=True, help='Email of the employer who will own the jobs')
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='File format; defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of rows validated and inserted together')
+
+    def handle(self, *args, **options):
+        file_format = detect_format(options['path'], options['format'])
+        if file_format is None:
+            raise CommandError('Cannot tell the file format; pass --format')
+        try:
+            employer = CustomUser.objects.get(email=options['employer'], role__in=['employer', 'admin'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f'No employer with email {options["employer"]}')
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = import_jobs(stream, file_format, employer, batch_size=options['batch_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f'  row {error["row"]}: {json.dumps(error["errors"])}')
+        self.stdout.write(self.style.SUCCESS(f'Created {report["created"]} jobs, {report["failed"]} rows failed'))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from applications.models import Application
+from jobs.models import Job
+
+
+def actual_counts():
+    """Subqueries computing each counter from the applications table."""
+    per_job = Application.objects.filter(job=OuterRef('pk')).values('job')
+
+    def count(**filters):
+        aggregate = Count('pk', filter=Q(**filters)) if filters else Count('pk')
+        return Coalesce(
+            Subquery(per_job.annotate(n=aggregate).values('n')[:1]),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+    counts = {'application_count': count()}
+    for status, field in Job.APPLICATION_STATUS_COUNTERS.items():
+        counts[field] = count(status=status)
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Repairs drift in the denormalized application counters on jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of primary keys checked per batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted jobs without fixing them')
+
+    def handle(self, *args, **options):
+        bounds = Job.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('No jobs to reconcile')
+            return
+
+        batch_size = options['batch_size']
+        counts = actual_counts()
+        drifted = Q()
+        for field in counts:
+            drifted |= ~Q(**{field: F(f'actual_{field}')})
+
+        repaired = 0
+        low = bounds['low']
+        while low <= bounds['high']:
+            batch = Job.objects.filter(pk__gte=low, pk__lt=low + batch_size)
+            drifted_ids = list(
+                batch.annotate(**{f'actual_{field}': expr for field, expr in counts.items()})
+                .filter(drifted)
+                .values_list('pk', flat=True)
+            )
+            if drifted_ids:
+                repaired += len(drifted_ids)
+                self.stdout.write(f'  {len(drifted_ids)} drifted jobs between ids {low} and {low + batch_size - 1}')
+                if not options['dry_run']:
+                    Job.objects.filter(pk__in=drifted_ids).update(updated_at=timezone.now(), **counts)
+            low += batch_size
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {repaired} jobs with drifted application counters'))
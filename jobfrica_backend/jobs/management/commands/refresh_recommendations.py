@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from jobs.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the precomputed job recommendations of every job seeker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Number of job seekers scored against the open jobs at a time')
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} job seekers')
+
+        total = refresh_recommendations(batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Refreshed recommendations for {total} job seekers'))
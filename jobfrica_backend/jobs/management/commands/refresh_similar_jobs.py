@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from jobs.similarity import refresh_all, refresh_queued
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the precomputed similar-job neighbour lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every open job instead of processing the refresh queue')
+        parser.add_argument('--limit', type=int, default=1000,
+                            help='Maximum number of queued jobs processed per run')
+        parser.add_argument('--batch-size', type=int, default=256,
+                            help='Number of jobs scored against the catalogue at a time')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            def progress(done, total):
+                self.stdout.write(f'  {done}/{total} jobs')
+
+            total = refresh_all(batch_size=options['batch_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt similar jobs for {total} open jobs'))
+            return
+
+        changed, recomputed = refresh_queued(limit=options['limit'], batch_size=options['batch_size'])
+        if not changed:
+            self.stdout.write('Nothing queued')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {changed} changed jobs, recomputed {recomputed} neighbour lists'
+        ))
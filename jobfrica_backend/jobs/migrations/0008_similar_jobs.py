@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_job_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityRefreshQueue',
+            fields=[
+                ('job_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'similarity_refresh_queue',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar_jobs', to='jobs.job')),
+                ('similar_job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'similar_jobs',
+                'constraints': [models.UniqueConstraint(fields=('job', 'rank'), name='similar_jobs_job_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Application status -> counter field, as of 0006_job_application_counters
+STATUS_COUNTERS = {
+    'applied': 'applied_count',
+    'under_review': 'under_review_count',
+    'shortlisted': 'shortlisted_count',
+    'rejected': 'rejected_count',
+    'accepted': 'accepted_count',
+    'withdrawn': 'withdrawn_count',
+}
+BATCH_SIZE = 1000
+
+
+def backfill_counters(apps, schema_editor):
+    """The aggregate of reconcile_application_counters, for the jobs that predate the counters."""
+    Job = apps.get_model('jobs', 'Job')
+    Application = apps.get_model('applications', 'Application')
+    per_job = Application.objects.filter(job=OuterRef('pk')).values('job')
+
+    def count(**filters):
+        aggregate = Count('pk', filter=Q(**filters)) if filters else Count('pk')
+        return Coalesce(
+            Subquery(per_job.annotate(n=aggregate).values('n')[:1]),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+    counts = {'application_count': count()}
+    for status, field in STATUS_COUNTERS.items():
+        counts[field] = count(status=status)
+
+    # Jobs without applications already hold the right counts: 0
+    job_ids = list(Application.objects.order_by('job_id').values_list('job_id', flat=True).distinct())
+    for start in range(0, len(job_ids), BATCH_SIZE):
+        Job.objects.filter(pk__in=job_ids[start:start + BATCH_SIZE]).update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_recommended_jobs'),
+        ('applications', '0003_alter_application_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
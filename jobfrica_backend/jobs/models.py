@@ -56,13 +56,45 @@ class Job(models.Model):
     category = models.ForeignKey(JobCategory, on_delete=models.PROTECT, related_name='jobs')
     tags = models.ManyToManyField(Skill, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last change to the job's payload, counters included (see applications.counters)
+    updated_at = models.DateTimeField(auto_now=True)
     # Search optimization fields
     search_vector = SearchVectorField(null=True)
+    # Denormalized application counters, kept in step by applications.counters
+    application_count = models.PositiveIntegerField(default=0)
+    applied_count = models.PositiveIntegerField(default=0)
+    under_review_count = models.PositiveIntegerField(default=0)
+    shortlisted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    withdrawn_count = models.PositiveIntegerField(default=0)
+
+    # Application status -> counter field
+    APPLICATION_STATUS_COUNTERS = {
+        'applied': 'applied_count',
+        'under_review': 'under_review_count',
+        'shortlisted': 'shortlisted_count',
+        'rejected': 'rejected_count',
+        'accepted': 'accepted_count',
+        'withdrawn': 'withdrawn_count',
+    }
+    # Only ever moved by F() updates in applications.counters; never written by save()
+    COUNTER_FIELDS = frozenset({'application_count', *APPLICATION_STATUS_COUNTERS.values()})
+
+    # Fields whose values feed search_vector
+    SEARCH_SOURCE_FIELDS = {'title', 'company', 'description', 'category', 'category_id'}
+    # Fields that feed jobs.similarity, besides tags
+    SIMILARITY_SOURCE_FIELDS = {
+        'status', 'category', 'category_id', 'location', 'experience_level', 'salary_min', 'salary_max',
+    }
 
     class Meta:
         db_table = 'jobs'
         indexes = [
             models.Index(fields=['created_at']),
+            # Keyset pagination of the feed walks (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='jobs_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='jobs_status_created_id_idx'),
             models.Index(fields=['category']),
             models.Index(fields=['status']),
             models.Index(fields=['location']),
@@ -73,3 +105,85 @@ class Job(models.Model):
 
     def __str__(self):
         return f"{self.title} at {self.company.name}"
+
+    def save(self, *args, **kwargs):
+        """
+        Write search_vector in the same statement that saves the job. Saving an
+        existing job never writes the counters: they are dropped from an explicit
+        update_fields and otherwise written back as themselves, so saving an instance
+        loaded earlier doesn't undo the increments committed since.
+        """
+        from .search import instance_search_vector
+
+        update_fields = kwargs.get('update_fields')
+        refresh_vector = update_fields is None or bool(self.SEARCH_SOURCE_FIELDS & set(update_fields))
+        if refresh_vector:
+            self.search_vector = instance_search_vector(self)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'search_vector'}
+
+        counters = {}
+        if not self._state.adding and not kwargs.get('force_insert'):
+            if update_fields is not None:
+                # auto_now is only written when listed
+                kwargs['update_fields'] = [
+                    field for field in {*update_fields, 'updated_at'} if field not in self.COUNTER_FIELDS
+                ]
+            else:
+                # Deferred counters aren't saved at all; loaded ones become "col = col"
+                counters = {field: self.__dict__[field] for field in self.COUNTER_FIELDS if field in self.__dict__}
+                self.__dict__.update({field: models.F(field) for field in counters})
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self.__dict__.update(counters)
+        if refresh_vector:
+            # The stored value was computed by the database; defer it until accessed
+            self.__dict__.pop('search_vector', None)
+
+
+class SimilarJob(models.Model):
+    """One of the precomputed nearest neighbours of an open job, maintained by jobs.similarity."""
+    # Indexed by the (job, rank) constraint
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_jobs', db_index=False)
+    similar_job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_to')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'similar_jobs'
+        constraints = [
+            # Also the index the similar endpoint reads in rank order
+            models.UniqueConstraint(fields=['job', 'rank'], name='similar_jobs_job_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} ~ {self.similar_job_id} ({self.score:.3f})"
+
+
+class SimilarityRefreshQueue(models.Model):
+    """Jobs whose neighbour lists must be recomputed; ids outlive deleted jobs."""
+    job_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'similarity_refresh_queue'
+
+
+class RecommendedJob(models.Model):
+    """One of the precomputed job recommendations of a job seeker, maintained by jobs.recommendations."""
+    # Indexed by the (user, rank) constraint
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='recommended_jobs', db_index=False)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='recommended_to')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'recommended_jobs'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='recommended_jobs_user_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.job_id} ({self.score:.3f})"
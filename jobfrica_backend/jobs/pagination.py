@@ -0,0 +1,166 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from jobfrica_backend.pagination import EstimatedCountPagination
+
+
+class JobFeedPagination(EstimatedCountPagination):
+    """
+    Page-number pagination for the job feed, with an opt-in keyset mode.
+
+    Sending `?cursor=` (empty for the first page) on the list endpoint switches to
+    keyset pagination on (ordering field, id): each page is an index range scan
+    instead of an OFFSET, and no COUNT(*) is run. The response then carries only
+    `next`, `previous` and `results`; follow the links to walk the feed. The cursor
+    only holds the first ordering term, so later terms are replaced by `id`.
+
+    Both modes sort NULLs last and break ties on `id`, in the direction of the first
+    ordering term, so rows keep the same place from page to page and switching
+    modes doesn't reorder the feed.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Ordering fields usable as the keyset; `id` breaks ties so the order is total
+    keyset_fields = {
+        'created_at': lambda value: datetime.fromisoformat(value),
+        'salary_min': Decimal,
+        'salary_max': Decimal,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            getattr(view, 'action', None) == 'list'
+            and self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(self.with_tiebreaker(queryset), request, view)
+        return self.paginate_keyset(queryset, request)
+
+    @staticmethod
+    def with_tiebreaker(queryset):
+        """
+        `queryset` in the keyset order: NULLs last in either direction, with `id`
+        appended unless the ordering is already total.
+        """
+        ordering = list(queryset.query.order_by)
+        if not ordering:
+            return queryset
+        terms = [term for term in ordering if isinstance(term, str)]
+        descending = terms[0].startswith('-') if terms else True
+        order = [
+            F(term.lstrip('-')).desc(nulls_last=True) if term.startswith('-') else F(term).asc(nulls_last=True)
+            if isinstance(term, str) and term != '?' else term
+            for term in ordering
+        ]
+        if not any(term.lstrip('-') in ('id', 'pk') for term in terms):
+            order.append(F('id').desc() if descending else F('id').asc())
+        return queryset.order_by(*order)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        field, descending = self.get_keyset_ordering(queryset)
+        cursor = self.decode_cursor(request, field)
+
+        # Walking backwards reverses the ordering and the rows are flipped afterwards
+        reverse = cursor is not None and cursor['reverse']
+        forward_desc = descending != reverse
+        if cursor is not None:
+            queryset = queryset.filter(self.beyond(field, cursor['value'], cursor['id'], forward_desc, reverse))
+
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        # `id` is the tiebreaker beyond() relies on; it must always be the second key
+        if forward_desc:
+            order = [F(field).desc(**nulls), F('id').desc()]
+        else:
+            order = [F(field).asc(**nulls), F('id').asc()]
+        rows = list(queryset.order_by(*order)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = cursor is not None if not reverse else has_more
+        self.next_link = self.encode_cursor(field, rows[-1], reverse=False) if rows and has_next else None
+        self.previous_link = None
+        if rows and has_previous:
+            self.previous_link = self.encode_cursor(field, rows[0], reverse=True)
+        return rows
+
+    def get_keyset_ordering(self, queryset):
+        ordering = [term for term in queryset.query.order_by if isinstance(term, str)]
+        term = ordering[0] if ordering else '-created_at'
+        field = term.lstrip('-')
+        if field not in self.keyset_fields:
+            raise ValidationError({self.cursor_query_param: f'Cursor pagination is not available when ordering by {field}.'})
+        return field, term.startswith('-')
+
+    @staticmethod
+    def beyond(field, value, pk, descending, reverse):
+        """
+        Rows after (value, pk) in the direction being walked.
+        NULLs sort last going forward, so they come first when walking backwards.
+        """
+        op = 'lt' if descending else 'gt'
+        if not reverse:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, f'id__{op}': pk})
+            return (
+                Q(**{f'{field}__{op}': value})
+                | Q(**{field: value, f'id__{op}': pk})
+                | Q(**{f'{field}__isnull': True})
+            )
+        if value is None:
+            return Q(**{f'{field}__isnull': False}) | Q(**{f'{field}__isnull': True, f'id__{op}': pk})
+        return Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(urlsafe_b64decode(padded.encode('ascii')))
+            if payload['f'] != field:
+                raise ValueError('cursor belongs to another ordering')
+            value = payload['v']
+            return {
+                'value': None if value is None else self.keyset_fields[field](value),
+                'id': int(payload['id']),
+                'reverse': bool(payload.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, ArithmeticError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, field, row, reverse):
+        # Rows are model instances, or dicts on the .values() fast path
+        value, pk = (row[field], row['id']) if isinstance(row, dict) else (getattr(row, field), row.pk)
+        payload = {
+            'f': field,
+            'v': None if value is None else (value.isoformat() if isinstance(value, datetime) else str(value)),
+            'id': pk,
+        }
+        if reverse:
+            payload['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode('ascii').rstrip('=')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
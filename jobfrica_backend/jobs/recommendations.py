@@ -0,0 +1,100 @@
+"""
+Precomputed job recommendations for job seekers.
+
+A job seeker's profile is the mean feature vector (see jobs.similarity) of the jobs
+they applied to, plus their UserProfile location. Profiles are scored against every
+open job with one sparse matrix product per batch of users, and the top
+RECOMMENDED_JOBS_TOP_N open jobs they have not applied to are stored in
+RecommendedJob. Users the pipeline has not covered yet get a query-based fallback
+from the recommended endpoint.
+"""
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from scipy import sparse
+
+from applications.models import Application
+from users.models import CustomUser, UserProfile
+from .models import Job, RecommendedJob
+from .similarity import WEIGHTS, FeatureMatrix, location_key, top_scores
+
+# Share of the location block given to the location on the user's profile
+PROFILE_LOCATION_WEIGHT = 0.5
+
+
+def top_n():
+    return settings.RECOMMENDED_JOBS_TOP_N
+
+
+def _profiles(features, user_ids):
+    """Sparse profile rows for `user_ids` and the jobs each of them applied to."""
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+    applied = {user_id: set() for user_id in user_ids}
+    rows, cols = [], []
+    for user_id, job_id in Application.objects.filter(applicant_id__in=user_ids).values_list('applicant_id', 'job_id'):
+        applied[user_id].add(job_id)
+        if job_id in features.position:
+            rows.append(position[user_id])
+            cols.append(features.position[job_id])
+
+    # Averages the applied jobs' vectors
+    counts = np.bincount(rows, minlength=len(user_ids)).astype(np.float64)
+    weights = 1 / counts[rows] if rows else []
+    applications = sparse.csr_matrix((weights, (rows, cols)), shape=(len(user_ids), len(features)))
+    profiles = (applications @ features.matrix).tolil()
+
+    location_value = math.sqrt(WEIGHTS['location']) * PROFILE_LOCATION_WEIGHT
+    locations = UserProfile.objects.filter(user_id__in=user_ids).exclude(location__isnull=True)
+    for user_id, location in locations.values_list('user_id', 'location'):
+        column = features.columns.get(('location', location_key(location)))
+        if column is not None:
+            profiles[position[user_id], column] += location_value
+    return profiles.tocsr(), applied
+
+
+def refresh_recommendations(batch_size=200, progress=None):
+    """Recompute every job seeker's recommendations, one committed batch of users at a time."""
+    features = FeatureMatrix(
+        Job.objects.filter(Q(status='open') | Q(Exists(Application.objects.filter(job=OuterRef('pk')))))
+    )
+    open_positions = np.flatnonzero(features.is_open)
+    open_ids = features.job_ids[open_positions]
+    open_matrix = features.matrix[open_positions].T.tocsc()
+    n = top_n()
+
+    seekers = CustomUser.objects.filter(role='job_seeker').filter(
+        Exists(Application.objects.filter(applicant=OuterRef('pk')))
+    )
+    user_ids = list(seekers.order_by('pk').values_list('pk', flat=True))
+    # Recommendations of users who are no longer covered would go stale
+    RecommendedJob.objects.exclude(user__in=seekers).delete()
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        profiles, applied = _profiles(features, batch)
+        scores = (profiles @ open_matrix).tocsr()
+        computed_at = timezone.now()
+
+        entries = []
+        for row, user_id in enumerate(batch):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            columns, values = scores.indices[begin:end], scores.data[begin:end]
+            keep = (values > 0) & ~np.isin(open_ids[columns], list(applied[user_id]))
+            columns, values = columns[keep], values[keep]
+            for rank, i in enumerate(top_scores(columns, values, open_ids, n), start=1):
+                entries.append(RecommendedJob(
+                    user_id=user_id, job_id=int(open_ids[columns[i]]),
+                    score=round(float(values[i]), 6), rank=rank, computed_at=computed_at,
+                ))
+
+        with transaction.atomic():
+            RecommendedJob.objects.filter(user_id__in=batch).delete()
+            RecommendedJob.objects.bulk_create(entries, batch_size=1000)
+        if progress is not None:
+            progress(min(start + batch_size, len(user_ids)), len(user_ids))
+    return len(user_ids)
+
@@ -0,0 +1,140 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Max, Min, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from .models import Job, JobCategory
+
+# Text search configuration used for both indexing and querying
+SEARCH_CONFIG = 'english'
+
+
+def _tag_names(job_id):
+    """Space separated skill names attached to the job."""
+    return Coalesce(
+        Subquery(
+            Job.tags.through.objects.filter(job_id=job_id)
+            .values('job_id')
+            .annotate(names=StringAgg('skill__name', delimiter=' '))
+            .values('names')[:1]
+        ),
+        Value(''),
+        output_field=TextField(),
+    )
+
+
+def _category_name(category_id):
+    """Name of the job's category."""
+    return Coalesce(
+        Subquery(JobCategory.objects.filter(pk=category_id).values('name')[:1]),
+        Value(''),
+        output_field=TextField(),
+    )
+
+
+def _weighted_vector(title, company, tags, category, description):
+    return (
+        SearchVector(title, weight='A', config=SEARCH_CONFIG)
+        + SearchVector(company, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(tags, weight='C', config=SEARCH_CONFIG)
+        + SearchVector(category, weight='C', config=SEARCH_CONFIG)
+        + SearchVector(description, weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def search_vector_expression():
+    """
+    Weighted tsvector for a job row.
+    Title ranks highest, then company, then skills/category, then description.
+    """
+    return _weighted_vector(
+        'title',
+        'company',
+        _tag_names(OuterRef('pk')),
+        _category_name(OuterRef('category_id')),
+        'description',
+    )
+
+
+def instance_search_vector(job):
+    """
+    Same vector as search_vector_expression(), built from the job's in-memory values
+    so it can be written by the INSERT/UPDATE that saves the job. Deferred fields
+    aren't saved, so the UPDATE reads them from the row instead of loading them.
+    """
+    deferred = job.get_deferred_fields()
+
+    def text(name):
+        return F(name) if name in deferred else Value(getattr(job, name) or '')
+
+    category_id = OuterRef('category_id') if 'category_id' in deferred else job.category_id
+    return _weighted_vector(
+        text('title'),
+        text('company'),
+        _tag_names(job.pk) if job.pk else Value(''),
+        _category_name(category_id),
+        text('description'),
+    )
+
+
+def update_search_vector(queryset):
+    """Recompute search_vector for every job in the queryset with a single UPDATE."""
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def refresh_search_vectors(queryset, batch_size=1000, start_id=None, progress=None):
+    """
+    Recompute search_vector in primary-key ranges of `batch_size`.
+    Each range is its own short UPDATE, so no lock is held across the whole table.
+    `progress(last_id, updated)` is called after every range; returns the total updated.
+    """
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    low = bounds['low'] if start_id is None else max(start_id, bounds['low'])
+    total = 0
+    while low <= bounds['high']:
+        high = low + batch_size
+        updated = update_search_vector(queryset.filter(pk__gte=low, pk__lt=high))
+        total += updated
+        if progress is not None:
+            progress(min(high, bounds['high'] + 1) - 1, updated)
+        low = high
+    return total
+
+
+class JobSearchFilter(filters.BaseFilterBackend):
+    """
+    Full-text search over Job.search_vector.
+    Reads `?q=` (and the legacy `?search=`) and annotates each row with `search_rank`.
+    """
+    search_param = 'q'
+    legacy_search_param = 'search'
+
+    def get_search_terms(self, request):
+        terms = request.query_params.get(self.search_param)
+        if terms is None:
+            terms = request.query_params.get(self.legacy_search_param, '')
+        return terms.strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+
+class JobOrderingFilter(filters.OrderingFilter):
+    """Orders search results by relevance unless the client asks for an explicit ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', '-created_at']
+        return super().get_ordering(request, queryset, view)
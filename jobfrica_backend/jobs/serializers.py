@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from jobfrica_backend.fastpath import ValuesSerializer
+from users.models import CustomUser
 from .models import Job, JobCategory, Skill
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -36,7 +38,43 @@ class JobListSerializer(serializers.ModelSerializer):
         ]
     
     def get_application_count(self, obj: Job) -> int:
-        return obj.applications.count()
+        return obj.application_count
+
+
+class JobListValuesSerializer(ValuesSerializer):
+    """JobListSerializer over .values() rows; jobs.tests checks the output stays identical."""
+    serializer_class = JobListSerializer
+    values = (
+        'id', 'title', 'company', 'location', 'experience_level', 'job_type',
+        'category_id', 'category__name', 'salary_min', 'salary_max',
+        'application_count', 'employer__id', 'created_at',
+    )
+    employer_fields = ('id',)
+
+    def to_representation(self, row):
+        prefix = self.prefix
+        category_id = row[prefix + 'category_id']
+        # posted_by_name is employer.username, read off the same model the regular path uses
+        posted_by_name = self.related(row, 'employer', CustomUser, self.employer_fields).username
+        return {
+            'id': row[prefix + 'id'],
+            'title': row[prefix + 'title'],
+            'company': row[prefix + 'company'],
+            'location': row[prefix + 'location'],
+            'experience_level': row[prefix + 'experience_level'],
+            'job_type': row[prefix + 'job_type'],
+            'category': None if category_id is None else {
+                'id': category_id,
+                'name': row[prefix + 'category__name'],
+            },
+            'salary_min': self.field(row, 'salary_min', 'salary_min'),
+            'salary_max': self.field(row, 'salary_max', 'salary_max'),
+            'application_count': row[prefix + 'application_count'],
+            'posted_by_name': None if posted_by_name is None else (
+                self.source_fields['posted_by_name'].to_representation(posted_by_name)
+            ),
+            'created_at': self.field(row, 'created_at', 'created_at'),
+        }
 
 class JobDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
@@ -51,8 +89,12 @@ class JobDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Job
-        fields = '__all__'
-        read_only_fields = ['posted_by', 'search_vector', 'created_at']
+        # updated_at only feeds conditional GETs
+        exclude = ['updated_at']
+        read_only_fields = [
+            'posted_by', 'search_vector', 'created_at',
+            *Job.APPLICATION_STATUS_COUNTERS.values(),
+        ]
     
     def get_posted_by(self, obj: Job) -> dict:
         """Return employer data for the job"""
@@ -63,7 +105,7 @@ class JobDetailSerializer(serializers.ModelSerializer):
         }
     
     def get_application_count(self, obj: Job) -> int:
-        return obj.applications.count()
+        return obj.application_count
     
 
 class JobCreateSerializer(serializers.ModelSerializer):
@@ -76,4 +118,41 @@ class JobCreateSerializer(serializers.ModelSerializer):
             'salary_min', 'salary_max', 'status', 'tags'
         ]
         read_only_fields = ['id', 'posted_by', 'created_at']
-        
\ No newline at end of file
+        
+
+class JobImportSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk job import (see jobs.bulk). Category and skills are given by
+    name and resolved against the `categories` and `skills` maps in the context,
+    which jobs.bulk fills with one lookup per batch.
+    """
+    category = serializers.CharField()
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+
+    class Meta:
+        model = Job
+        fields = [
+            'title', 'description', 'company', 'location', 'job_type', 'experience_level',
+            'salary_min', 'salary_max', 'application_url', 'application_email', 'status',
+            'category', 'tags',
+        ]
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value.strip().lower())
+        if category is None:
+            raise serializers.ValidationError(f'Unknown category "{value}".')
+        return category
+
+    def validate_tags(self, value):
+        skills = self.context['skills']
+        unknown = [name for name in value if name.strip().lower() not in skills]
+        if unknown:
+            raise serializers.ValidationError(f'Unknown skills: {", ".join(unknown)}.')
+        # Duplicates would collide in the through table
+        return list({skills[name.strip().lower()].pk: skills[name.strip().lower()] for name in value}.values())
+
+    def validate(self, attrs):
+        salary_min, salary_max = attrs.get('salary_min'), attrs.get('salary_max')
+        if salary_min is not None and salary_max is not None and salary_min > salary_max:
+            raise serializers.ValidationError({'salary_max': 'Must not be lower than salary_min.'})
+        return attrs
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from jobfrica_backend.caching import bump_model_version, bump_user_version
+from .models import Job, JobCategory, SimilarJob, SimilarityRefreshQueue, Skill
+from .search import refresh_search_vectors, update_search_vector
+from .similarity import schedule_refresh
+
+
+class _SearchVectorRefresh:
+    """Job ids waiting for a search_vector refresh when the transaction commits."""
+
+    def __init__(self):
+        self.job_ids = set()
+
+    def __call__(self):
+        update_search_vector(Job.objects.filter(pk__in=self.job_ids))
+
+
+def queue_search_vector_refresh(job_ids):
+    """
+    Recompute search_vector for `job_ids` once the current transaction commits.
+    Ids queued within the same transaction are flushed together in one UPDATE.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        update_search_vector(Job.objects.filter(pk__in=job_ids))
+        return
+
+    batch = getattr(connection, '_search_vector_refresh', None)
+    # A rolled back transaction drops its callbacks, so only reuse a batch still queued
+    if batch is None or not any(func is batch for _, func, _ in connection.run_on_commit):
+        batch = connection._search_vector_refresh = _SearchVectorRefresh()
+        transaction.on_commit(batch)
+    batch.job_ids.update(job_ids)
+
+
+def queue_similarity_refresh(job_ids):
+    """Mark jobs whose similar-job neighbour lists are out of date (see jobs.similarity)."""
+    SimilarityRefreshQueue.objects.bulk_create(
+        [SimilarityRefreshQueue(job_id=job_id) for job_id in job_ids],
+        ignore_conflicts=True,
+    )
+    schedule_refresh()
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def job_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Skill tags feed search_vector and job similarity; refresh the affected jobs."""
+    job_ids = None
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            job_ids = [instance.pk]
+    elif action in ('post_add', 'post_remove'):
+        # skill.job_set.add(...) - the affected jobs are in pk_set
+        job_ids = list(pk_set)
+    elif action == 'pre_clear':
+        # skill.job_set.clear() - collect the jobs before the links disappear
+        job_ids = list(instance.job_set.values_list('pk', flat=True))
+
+    if job_ids:
+        # Lets other processes' similarity matrices notice the change (see FeatureMatrix.sync)
+        Job.objects.filter(pk__in=job_ids).update(updated_at=timezone.now())
+        queue_search_vector_refresh(job_ids)
+        queue_similarity_refresh(job_ids)
+
+
+@receiver(post_save, sender=Job)
+def job_saved_similarity(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or Job.SIMILARITY_SOURCE_FIELDS & set(update_fields):
+        queue_similarity_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Job)
+def job_deleted_similarity(sender, instance, **kwargs):
+    # The cascade is about to drop the rows listing this job; queue their owners first
+    listing = SimilarJob.objects.filter(similar_job=instance).values_list('job_id', flat=True)
+    queue_similarity_refresh([instance.pk, *listing])
+
+
+@receiver(post_save, sender=JobCategory)
+def job_category_saved(sender, instance, created, update_fields=None, **kwargs):
+    """A renamed category changes the vector of every job filed under it."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    transaction.on_commit(lambda: refresh_search_vectors(Job.objects.filter(category=instance)))
+
+
+@receiver(post_save, sender=Skill)
+def skill_saved(sender, instance, created, update_fields=None, **kwargs):
+    """A renamed skill changes the vector of every job tagged with it."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    transaction.on_commit(lambda: refresh_search_vectors(Job.objects.filter(tags=instance)))
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=JobCategory)
+@receiver(post_delete, sender=JobCategory)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_cached_responses(sender, **kwargs):
+    """Any write makes cached responses built from that model unreachable."""
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def job_tags_invalidate_cached_responses(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: bump_model_version(Job))
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_changed(sender, instance, **kwargs):
+    """The employer's profile lists their jobs."""
+    transaction.on_commit(lambda: bump_user_version([instance.employer_id], 'jobs'))
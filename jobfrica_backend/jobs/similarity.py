@@ -0,0 +1,342 @@
+"""
+Precomputed "similar jobs".
+
+Every open job is encoded as a sparse feature vector made of weighted blocks - skills,
+category, location, experience level and salary range - each normalised so that the
+dot product of two jobs is the weighted sum of per-block cosine similarities. The top
+neighbours of each open job are stored in SimilarJob, so the similar endpoint is a
+single indexed lookup.
+
+Changed jobs are queued in SimilarityRefreshQueue by jobs.signals, and
+refresh_queued() recomputes only the neighbour lists they can affect. Each process
+keeps its feature matrix between refreshes and re-encodes only the rows that
+changed (see current_features()). Who runs
+refresh_queued() is chosen by SIMILAR_JOBS_REFRESH_BACKEND:
+
+- 'worker': the refresh_similar_jobs command, run periodically or as a separate worker.
+- 'thread': a single background thread in the queuing process, once the transaction commits.
+- 'immediate': synchronously once the transaction commits; meant for tests.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Job, SimilarJob, SimilarityRefreshQueue
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each block; the best possible score is their sum
+WEIGHTS = {
+    'skills': 0.4,
+    'category': 0.2,
+    'location': 0.15,
+    'experience': 0.1,
+    'salary': 0.15,
+}
+# Log-spaced salary buckets: ranges are compared by the buckets they cover
+SALARY_BUCKETS = np.geomspace(100, 100_000_000, num=61)
+# How late a save may commit and still be picked up by FeatureMatrix.sync()
+SYNC_MARGIN = timedelta(minutes=5)
+
+
+def top_k():
+    return settings.SIMILAR_JOBS_TOP_K
+
+
+def _salary_buckets(low, high):
+    if low is None and high is None:
+        return range(0)
+    low, high = float(low if low is not None else high), float(high if high is not None else low)
+    if low > high:
+        low, high = high, low
+    first, last = np.searchsorted(SALARY_BUCKETS, [low, high], side='right')
+    return range(int(first), int(last) + 1)
+
+
+def location_key(location):
+    return (location or '').strip().lower()
+
+
+def top_scores(columns, values, job_ids, k):
+    """
+    Indexes into `columns` of the k best scores, highest first and the newest job
+    first among equals, so the result does not depend on the order of the input.
+    """
+    if len(columns) > k:
+        # Keep everything tied with the k-th score so ties are broken deterministically
+        kth = -np.partition(-values, k - 1)[k - 1]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(len(columns))
+    order = np.lexsort((-job_ids[columns[candidates]], -values[candidates]))[:k]
+    return candidates[order]
+
+
+class FeatureMatrix:
+    """Sparse feature rows for the jobs of `queryset` (open jobs by default); row i describes job_ids[i]."""
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = Job.objects.filter(status='open')
+        self.built_at = self.synced_at = timezone.now()
+        self.columns = {}
+        self.position = {}
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.is_open = np.zeros(0, dtype=bool)
+        self.matrix = sparse.csr_matrix((0, 1))
+        # Rows of jobs dropped by sync(); they stay in place as all-zero rows
+        self.dead = 0
+        self._append(queryset)
+
+    def _append(self, queryset):
+        """Encode the jobs of `queryset` as new rows at the end of the matrix."""
+        rows = list(
+            queryset.order_by('id')
+            .values_list('id', 'category_id', 'location', 'experience_level', 'salary_min', 'salary_max', 'status')
+        )
+        offset = len(self.job_ids)
+        self.job_ids = np.concatenate([self.job_ids, np.array([row[0] for row in rows], dtype=np.int64)])
+        self.is_open = np.concatenate([self.is_open, np.array([row[-1] == 'open' for row in rows], dtype=bool)])
+        self.position.update((row[0], offset + i) for i, row in enumerate(rows))
+
+        skills = {}
+        tags = Job.tags.through.objects.filter(job__in=queryset.values('pk')).values_list('job_id', 'skill_id')
+        for job_id, skill_id in tags:
+            skills.setdefault(job_id, []).append(skill_id)
+
+        columns = self.columns
+        data, row_index, col_index = [], [], []
+
+        def add(i, block, values, weight):
+            # Each block is scaled to length sqrt(weight), so block dot products are weighted cosines
+            if not values:
+                return
+            value = math.sqrt(weight / len(values))
+            for key in values:
+                data.append(value)
+                row_index.append(i)
+                col_index.append(columns.setdefault((block, key), len(columns)))
+
+        for i, (job_id, category_id, location, experience, salary_min, salary_max, _) in enumerate(rows):
+            add(i, 'skills', skills.get(job_id, ()), WEIGHTS['skills'])
+            add(i, 'category', [category_id] if category_id else (), WEIGHTS['category'])
+            location = location_key(location)
+            add(i, 'location', [location] if location else (), WEIGHTS['location'])
+            add(i, 'experience', [experience] if experience else (), WEIGHTS['experience'])
+            add(i, 'salary', list(_salary_buckets(salary_min, salary_max)), WEIGHTS['salary'])
+
+        width = max(len(columns), 1)
+        added = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), (row_index, col_index)),
+            shape=(len(rows), width),
+        )
+        if offset:
+            self.matrix.resize((offset, width))
+            added = sparse.vstack([self.matrix, added], format='csr')
+        self.matrix = added
+
+    def sync(self, changed_ids=()):
+        """
+        Bring the rows of an open-jobs matrix up to date without re-encoding the
+        catalogue: closed and deleted jobs are dropped, and `changed_ids`, newly
+        opened jobs and jobs saved since the last sync are re-encoded. Changes
+        committed more than SYNC_MARGIN after they were saved, or that skip
+        Job.updated_at, wait for the next full build (see SIMILAR_JOBS_MATRIX_MAX_AGE).
+        """
+        since, self.synced_at = self.synced_at - SYNC_MARGIN, timezone.now()
+        open_jobs = dict(Job.objects.filter(status='open').values_list('id', 'updated_at'))
+        reload = {job_id for job_id in changed_ids if job_id in open_jobs}
+        reload.update(
+            job_id for job_id, updated_at in open_jobs.items()
+            if job_id not in self.position or updated_at >= since
+        )
+        dropped = [job_id for job_id in self.position if job_id not in open_jobs or job_id in reload]
+
+        if dropped:
+            positions = [self.position.pop(job_id) for job_id in dropped]
+            keep = np.ones(len(self.job_ids))
+            keep[positions] = 0
+            self.matrix = (sparse.diags(keep) @ self.matrix).tocsr()
+            self.matrix.eliminate_zeros()
+            self.is_open[positions] = False
+            self.dead += len(positions)
+        if reload:
+            self._append(Job.objects.filter(pk__in=reload))
+
+    def __len__(self):
+        return len(self.position)
+
+    def scores(self, positions):
+        """Similarity of the given rows against every open job, as a sparse matrix."""
+        return (self.matrix[positions] @ self.matrix.T).tocsr()
+
+    def neighbours(self, positions, k):
+        """Top-k (job_id, similar_job_id, score) rows for each given position."""
+        scores = self.scores(positions)
+        results = []
+        for row, position in enumerate(positions):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            columns, values = scores.indices[start:end], scores.data[start:end]
+            keep = (columns != position) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            order = top_scores(columns, values, self.job_ids, k)
+            job_id = int(self.job_ids[position])
+            results.extend(
+                (job_id, int(self.job_ids[columns[i]]), round(float(values[i]), 6))
+                for i in order
+            )
+        return results
+
+
+def _replace_neighbours(features, job_ids, k, batch_size):
+    """Recompute and store the neighbour lists of `job_ids`, dropping those of non-open jobs."""
+    job_ids = sorted(job_ids)
+    open_positions = [features.position[job_id] for job_id in job_ids if job_id in features.position]
+    SimilarJob.objects.filter(job_id__in=job_ids).delete()
+
+    created = 0
+    for start in range(0, len(open_positions), batch_size):
+        rows = features.neighbours(open_positions[start:start + batch_size], k)
+        entries, rank, previous = [], 0, None
+        for job_id, similar_job_id, score in rows:
+            rank = rank + 1 if job_id == previous else 1
+            previous = job_id
+            entries.append(SimilarJob(job_id=job_id, similar_job_id=similar_job_id, score=score, rank=rank))
+        SimilarJob.objects.bulk_create(entries, batch_size=1000)
+        created += len(entries)
+    return created
+
+
+_features = None
+_features_lock = threading.Lock()
+
+
+def current_features(changed_ids=()):
+    """
+    The open-jobs FeatureMatrix kept between refreshes of this process, synced with
+    `changed_ids` and recent saves. It is rebuilt once it is older than
+    SIMILAR_JOBS_MATRIX_MAX_AGE seconds or a quarter of its rows are dead.
+    Callers hold _features_lock while they use it.
+    """
+    global _features
+    max_age = timedelta(seconds=settings.SIMILAR_JOBS_MATRIX_MAX_AGE)
+    if (
+        _features is None
+        or timezone.now() - _features.built_at > max_age
+        or _features.dead > len(_features) / 4
+    ):
+        _features = FeatureMatrix()
+    else:
+        _features.sync(changed_ids)
+    return _features
+
+
+def refresh_all(batch_size=256, progress=None):
+    """Rebuild every neighbour list, one committed batch of jobs at a time."""
+    global _features
+    with _features_lock:
+        features = _features = FeatureMatrix()
+        k = top_k()
+        SimilarityRefreshQueue.objects.all().delete()
+        SimilarJob.objects.exclude(job__status='open').delete()
+
+        job_ids = features.job_ids.tolist()
+        for start in range(0, len(job_ids), batch_size):
+            batch = job_ids[start:start + batch_size]
+            with transaction.atomic():
+                _replace_neighbours(features, batch, k, batch_size)
+            if progress is not None:
+                progress(min(start + batch_size, len(job_ids)), len(job_ids))
+    return len(job_ids)
+
+
+def affected_jobs(features, changed_ids, k):
+    """
+    Jobs whose neighbour list may change because `changed_ids` changed: the changed
+    jobs themselves, jobs currently listing one of them, and jobs for which a changed
+    open job now scores above their weakest stored neighbour.
+    """
+    affected = set(changed_ids)
+    affected.update(SimilarJob.objects.filter(similar_job_id__in=changed_ids).values_list('job_id', flat=True))
+
+    positions = [features.position[job_id] for job_id in changed_ids if job_id in features.position]
+    if not positions:
+        return affected
+
+    # Column-wise best score, kept sparse: jobs no changed job scores against are absent
+    best = features.scores(positions).max(axis=0).tocoo()
+    candidates = {int(features.job_ids[i]): score for i, score in zip(best.col, best.data) if score > 0}
+    thresholds = {
+        row['job_id']: row['weakest'] if row['size'] >= k else 0
+        for row in SimilarJob.objects.filter(job_id__in=list(candidates))
+        .values('job_id').annotate(size=Count('id'), weakest=Min('score'))
+    }
+    affected.update(
+        job_id for job_id, score in candidates.items()
+        if round(float(score), 6) >= thresholds.get(job_id, 0)
+    )
+    return affected
+
+
+def refresh_queued(limit=1000, batch_size=256):
+    """
+    Process up to `limit` queued jobs, recomputing only the neighbour lists they
+    can affect. Returns (changed jobs processed, neighbour lists recomputed).
+    """
+    with transaction.atomic():
+        queued = list(
+            SimilarityRefreshQueue.objects.select_for_update(skip_locked=True)
+            .order_by('queued_at')
+            .values_list('job_id', flat=True)[:limit]
+        )
+        if not queued:
+            return 0, 0
+        k = top_k()
+        with _features_lock:
+            features = current_features(queued)
+            affected = affected_jobs(features, queued, k)
+            _replace_neighbours(features, affected, k, batch_size)
+        SimilarityRefreshQueue.objects.filter(job_id__in=queued).delete()
+    return len(queued), len(affected)
+
+
+def schedule_refresh():
+    """Run refresh_queued() once the current transaction commits, as SIMILAR_JOBS_REFRESH_BACKEND says."""
+    backend = settings.SIMILAR_JOBS_REFRESH_BACKEND
+    if backend == 'thread':
+        transaction.on_commit(_submit)
+    elif backend == 'immediate':
+        transaction.on_commit(refresh_queued)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _drain():
+    try:
+        while refresh_queued()[0]:
+            pass
+    except Exception:
+        logger.exception('Refreshing similar jobs failed')
+    finally:
+        # The pool thread opened its own connections; don't leak them
+        connections.close_all()
+
+
+def _submit():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One thread: each refresh scores against the whole catalogue, so they shouldn't overlap
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='similar-jobs')
+    return _executor.submit(_drain)
@@ -1,6 +1,775 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from users.models import CustomUser, UserProfile
+from jobfrica_backend.caching import bump_model_version, bump_user_version, get_versions, model_version_key, user_version_key
+from . import recommendations, similarity
+from .models import Job, JobCategory, RecommendedJob, SimilarJob, SimilarityRefreshQueue, Skill
+from .search import SEARCH_CONFIG, update_search_vector
 
 # Create your tests here.
 class SimpleTest(TestCase):
     def test_example(self):
-        self.assertEqual(1 + 1, 2)
\ No newline at end of file
+        self.assertEqual(1 + 1, 2)
+
+
+def create_job(employer, category, **kwargs):
+    fields = {
+        'title': 'Backend Developer',
+        'description': 'Build and maintain APIs.',
+        'company': 'Acme',
+        'location': 'Lagos',
+        'job_type': 'full_time',
+        'experience_level': 'mid',
+    }
+    fields.update(kwargs)
+    return Job.objects.create(employer=employer, category=category, **fields)
+
+
+def matches(job, terms):
+    query = SearchQuery(terms, config=SEARCH_CONFIG)
+    return Job.objects.filter(pk=job.pk, search_vector=query).exists()
+
+
+class SearchVectorTest(TestCase):
+    def setUp(self):
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.skill = Skill.objects.create(name='Kubernetes')
+
+    def test_save_writes_vector(self):
+        job = create_job(self.employer, self.category, title='Backend Developer')
+        self.assertTrue(matches(job, 'backend'))
+        self.assertTrue(matches(job, 'engineering'))
+
+        job.title = 'Data Scientist'
+        job.save()
+        self.assertTrue(matches(job, 'scientist'))
+        self.assertFalse(matches(job, 'backend'))
+
+        job.company = 'Globex'
+        job.save(update_fields=['company'])
+        self.assertTrue(matches(job, 'globex'))
+
+    def test_tag_changes_refresh_vector(self):
+        job = create_job(self.employer, self.category)
+        with self.captureOnCommitCallbacks(execute=True):
+            job.tags.add(self.skill)
+        self.assertTrue(matches(job, 'kubernetes'))
+
+    def test_reverse_clear_refreshes_vector(self):
+        job = create_job(self.employer, self.category)
+        # Link without m2m_changed, so no refresh is left queued in the test transaction
+        Job.tags.through.objects.create(job=job, skill=self.skill)
+        update_search_vector(Job.objects.filter(pk=job.pk))
+        self.assertTrue(matches(job, 'kubernetes'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.skill.job_set.clear()
+        self.assertFalse(matches(job, 'kubernetes'))
+
+    def test_category_and_skill_renames_refresh_vector(self):
+        job = create_job(self.employer, self.category)
+        job.tags.add(self.skill)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Marketing'
+            self.category.save()
+            self.skill.name = 'Terraform'
+            self.skill.save()
+        self.assertTrue(matches(job, 'marketing'))
+        self.assertTrue(matches(job, 'terraform'))
+        self.assertFalse(matches(job, 'kubernetes'))
+
+    def test_backfill_in_pk_ranges(self):
+        jobs = [create_job(self.employer, self.category, title=f'Welder {n}') for n in range(5)]
+        Job.objects.filter(pk__in=[job.pk for job in jobs[1:]]).update(search_vector=None)
+
+        out = io.StringIO()
+        call_command('backfill_search_vectors', batch_size=2, start_id=jobs[3].pk, stdout=out)
+        self.assertEqual(
+            [job.pk for job in jobs if not matches(job, 'welder')], [jobs[1].pk, jobs[2].pk],
+        )
+        self.assertIn('Backfilling search_vector for 2 jobs', out.getvalue())
+        self.assertIn('2/2 jobs updated', out.getvalue())
+        self.assertIn('--start-id', out.getvalue())
+
+        call_command('backfill_search_vectors', batch_size=2, stdout=io.StringIO())
+        self.assertTrue(all(matches(job, 'welder') for job in jobs))
+        self.assertFalse(Job.objects.filter(search_vector__isnull=True).exists())
+
+
+class JobSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.engineering = JobCategory.objects.create(name='Engineering')
+        self.hospitality = JobCategory.objects.create(name='Hospitality')
+        kubernetes = Skill.objects.create(name='Kubernetes')
+
+        self.in_title = create_job(self.employer, self.engineering, title='Python Developer')
+        self.in_company = create_job(self.employer, self.engineering, title='Engineer', company='Python Labs')
+        self.in_description = create_job(
+            self.employer, self.engineering, title='Engineer', description='Some python scripting.',
+        )
+        self.phrase = create_job(self.employer, self.engineering, title='Senior Backend Developer')
+        self.split = create_job(self.employer, self.engineering, title='Backend and frontend developer')
+        self.short = create_job(self.employer, self.engineering, title='Go Engineer')
+        self.tagged = create_job(self.employer, self.engineering, title='Platform Engineer')
+        # Tag changes refresh search_vector once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tagged.tags.add(kubernetes)
+        self.chef = create_job(self.employer, self.hospitality, title='Chef', description='Cook meals.')
+        self.closed = create_job(self.employer, self.engineering, title='Python Developer', status='closed')
+
+    def ids(self, query):
+        response = self.client.get(f'/api/jobs/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_ranks_title_over_company_over_description(self):
+        self.assertEqual(self.ids('?q=python'), [self.in_title.pk, self.in_company.pk, self.in_description.pk])
+
+    def test_explicit_ordering_overrides_rank(self):
+        self.assertEqual(
+            self.ids('?q=python&ordering=created_at'),
+            [self.in_title.pk, self.in_company.pk, self.in_description.pk],
+        )
+        self.assertEqual(
+            self.ids('?q=python&ordering=-created_at'),
+            [self.in_description.pk, self.in_company.pk, self.in_title.pk],
+        )
+
+    def test_web_search_syntax(self):
+        self.assertEqual(self.ids('?q="backend developer"'), [self.phrase.pk])
+        self.assertEqual(set(self.ids('?q=backend developer')), {self.phrase.pk, self.split.pk})
+        self.assertEqual(set(self.ids('?q=developer -python')), {self.phrase.pk, self.split.pk})
+        self.assertEqual(set(self.ids('?q=chef or kubernetes')), {self.chef.pk, self.tagged.pk})
+
+    def test_stemming_but_no_prefix_expansion(self):
+        # Word forms share a stem ...
+        self.assertIn(self.in_title.pk, self.ids('?q=developers'))
+        self.assertIn(self.chef.pk, self.ids('?q=cooking'))
+        # ... but websearch queries match whole words only
+        self.assertEqual(self.ids('?q=pyth'), [])
+
+    def test_empty_and_short_queries(self):
+        everything = self.ids('')
+        self.assertEqual(len(everything), 8)
+        self.assertEqual(self.ids('?q='), everything)
+        self.assertEqual(self.ids('?q=%20%20'), everything)
+        self.assertEqual(self.ids('?q=go'), [self.short.pk])
+        # Only stop words: nothing to search for, so nothing matches
+        self.assertEqual(self.ids('?q=the'), [])
+
+    def test_legacy_search_parameter(self):
+        self.assertEqual(self.ids('?search=python'), self.ids('?q=python'))
+        # ?q= wins when both are given
+        self.assertEqual(self.ids('?q=chef&search=python'), [self.chef.pk])
+
+    def test_matches_tags_and_category(self):
+        self.assertEqual(self.ids('?q=kubernetes'), [self.tagged.pk])
+        self.assertEqual(self.ids('?q=hospitality'), [self.chef.pk])
+        self.assertNotIn(self.closed.pk, self.ids('?q=python'))
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = JobCategory.objects.create(name='Engineering')
+
+    def test_version_counters(self):
+        model_key, user_key = model_version_key(Job), user_version_key(7, 'jobs')
+        before = get_versions([model_key, user_key])
+        self.assertEqual(get_versions([model_key, user_key]), before)
+
+        bump_model_version(Job)
+        bump_user_version([7], 'jobs')
+        after = get_versions([model_key, user_key])
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+        self.assertGreater(get_versions([user_version_key(8, 'jobs')])[0], 0)
+
+    def test_etag_round_trip_and_invalidation_after_commit(self):
+        response = self.client.get('/api/jobs/categories/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/api/jobs/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Weak comparison, and any tag of a list
+        self.assertEqual(self.client.get('/api/jobs/categories/', HTTP_IF_NONE_MATCH=f'"x", W/{etag}').status_code, 304)
+        self.assertEqual(self.client.get('/api/jobs/categories/', HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+        # Until the transaction commits, the cached response is still current
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            JobCategory.objects.create(name='Design')
+        self.assertEqual(self.client.get('/api/jobs/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get('/api/jobs/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([category['name'] for category in response.data], ['Design', 'Engineering'])
+
+    def test_wildcard_needs_an_existing_object(self):
+        missing = self.category.pk + 100
+        self.assertEqual(self.client.get(f'/api/jobs/categories/{missing}/', HTTP_IF_NONE_MATCH='*').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/jobs/categories/{self.category.pk}/', HTTP_IF_NONE_MATCH='*').status_code, 304)
+        # Now served from the cache entry
+        self.assertEqual(self.client.get(f'/api/jobs/categories/{self.category.pk}/', HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+        employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        job = create_job(employer, self.category)
+        self.assertEqual(self.client.get(f'/api/jobs/{job.pk + 100}/', HTTP_IF_NONE_MATCH='*').status_code, 404)
+        response = self.client.get(f'/api/jobs/{job.pk}/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.client.get(f'/api/jobs/{job.pk}/')['ETag'])
+
+    def test_authenticated_requests_bypass_the_response_cache(self):
+        self.client.force_authenticate(CustomUser.objects.create(email='seeker@example.com', role='job_seeker'))
+        response = self.client.get('/api/jobs/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ApplicationCountQueryTest(TestCase):
+    """application_count must not cost one query per listed job."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker')
+            for i in range(3)
+        ]
+        self.category = JobCategory.objects.create(name='Engineering')
+
+    def add_jobs(self, count):
+        for i in range(count):
+            job = create_job(self.employer, self.category, title=f'Job {i}')
+            for seeker in self.seekers:
+                Application.objects.create(job=job, applicant=seeker)
+
+    def count_queries(self, url, user=None):
+        # Paginated counts are cached; start each request from the same state
+        cache.clear()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_job_list_query_count_is_constant(self):
+        self.add_jobs(2)
+        small, data = self.count_queries('/api/jobs/')
+        self.assertEqual(len(data['results']), 2)
+
+        self.add_jobs(15)
+        large, data = self.count_queries('/api/jobs/')
+        self.assertEqual(len(data['results']), 17)
+        self.assertEqual(small, large)
+        self.assertTrue(all(job['application_count'] == 3 for job in data['results']))
+
+    def test_employer_application_list_query_count_is_constant(self):
+        self.add_jobs(1)
+        small, data = self.count_queries('/api/applications/', self.employer)
+        self.assertEqual(len(data['results']), 3)
+
+        self.add_jobs(5)
+        large, data = self.count_queries('/api/applications/', self.employer)
+        self.assertEqual(len(data['results']), 18)
+        self.assertEqual(small, large)
+        self.assertTrue(all(app['job']['application_count'] == 3 for app in data['results']))
+
+
+class JobFeedPaginationTest(TestCase):
+    """Every page mode must list each job exactly once, in (ordering field, id) order."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        category = JobCategory.objects.create(name='Engineering')
+        # Many ties and NULLs, so only the id tiebreaker makes the order total
+        salaries = [None, Decimal('100.00'), Decimal('100.00'), Decimal('250.00')]
+        Job.objects.bulk_create([
+            Job(employer=employer, category=category, title=f'Job {n}', description='APIs.', company='Acme',
+                location='Lagos', job_type='full_time', experience_level='mid', salary_min=salaries[n % 4])
+            for n in range(45)
+        ])
+        created_at = timezone.now()
+        Job.objects.filter(pk__gt=Job.objects.order_by('pk')[10].pk).update(created_at=created_at)
+        self.jobs = list(Job.objects.values('id', 'created_at', 'salary_min'))
+
+    def expected(self, ordering):
+        field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        present = sorted((job for job in self.jobs if job[field] is not None),
+                         key=lambda job: (job[field], job['id']), reverse=descending)
+        nulls = sorted((job for job in self.jobs if job[field] is None),
+                       key=lambda job: job['id'], reverse=descending)
+        return [job['id'] for job in present + nulls]
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, url, link):
+        ids, pages = [], 0
+        while url:
+            page = self.get(url)
+            ids.append([job['id'] for job in page['results']])
+            url = page[link] and urlsplit(page[link])._replace(scheme='', netloc='').geturl()
+            pages += 1
+        return ids, pages
+
+    def test_cursor_round_trip(self):
+        for ordering in ('created_at', '-created_at', 'salary_min', '-salary_min'):
+            with self.subTest(ordering=ordering):
+                forward, pages = self.walk(f'/api/jobs/?cursor=&ordering={ordering}', 'next')
+                self.assertEqual(pages, 3)
+                self.assertEqual(sum(forward, []), self.expected(ordering))
+
+                # Walk back from the last page's previous link
+                last = self.get(f'/api/jobs/?cursor=&ordering={ordering}')
+                while last['next']:
+                    last = self.get(urlsplit(last['next'])._replace(scheme='', netloc='').geturl())
+                previous = urlsplit(last['previous'])._replace(scheme='', netloc='').geturl()
+                backward, _ = self.walk(previous, 'previous')
+                self.assertEqual(backward[::-1], forward[:-1])
+
+    def test_null_sort_values_come_last(self):
+        for ordering in ('salary_min', '-salary_min'):
+            ids, _ = self.walk(f'/api/jobs/?cursor=&ordering={ordering}', 'next')
+            salaries = {job['id']: job['salary_min'] for job in self.jobs}
+            tail = [salaries[pk] for pk in sum(ids, [])[-11:]]
+            self.assertEqual(tail, [None] * 11)
+
+    def test_page_numbers_follow_the_keyset_order(self):
+        for ordering in ('created_at', '-created_at', 'salary_min', '-salary_min'):
+            with self.subTest(ordering=ordering):
+                ids = []
+                for number in (1, 2, 3):
+                    ids += [job['id'] for job in self.get(f'/api/jobs/?ordering={ordering}&page={number}')['results']]
+                self.assertEqual(ids, self.expected(ordering))
+
+        # Small tables tend to come back in a stable order anyway, so check the SQL too
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.get('/api/jobs/?ordering=salary_min&page=2')
+        page_query = next(query['sql'] for query in queries if 'OFFSET' in query['sql'])
+        self.assertRegex(page_query, r'ORDER BY "jobs"."salary_min" ASC NULLS LAST, "jobs"."id" ASC')
+
+    def test_counts_exactly_up_to_the_threshold(self):
+        with self.settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=50):
+            with CaptureQueriesContext(connection) as queries:
+                page = self.get('/api/jobs/?ordering=created_at')
+            self.assertEqual((page['count'], page['count_is_exact']), (45, True))
+            self.assertTrue(any('LIMIT 51' in query['sql'] and 'COUNT(*)' in query['sql'] for query in queries))
+
+            # Same count query, served from the count cache
+            page = self.get('/api/jobs/?ordering=-created_at')
+            self.assertEqual((page['count'], page['count_is_exact']), (45, False))
+
+    def test_next_links_ignore_the_estimate(self):
+        with self.settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=10):
+            ids, pages = self.walk('/api/jobs/?ordering=salary_min', 'next')
+            first = self.get('/api/jobs/?ordering=-salary_min')
+        self.assertEqual(pages, 3)
+        self.assertEqual(sum(ids, []), self.expected('salary_min'))
+        self.assertIs(first['count_is_exact'], False)
+        self.assertGreater(first['count'], 10)
+
+    def test_invalid_cursors(self):
+        self.assertEqual(self.client.get('/api/jobs/?cursor=garbage').status_code, 404)
+        # Search results are ordered by rank, which the cursor can't hold
+        self.assertEqual(self.client.get('/api/jobs/?cursor=&q=job').status_code, 400)
+
+
+class FastListParityTest(TestCase):
+    """The .values()/orjson fast path must render exactly the bytes of the regular path."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seeker = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        self.category = JobCategory.objects.create(name='Ingénierie "quoted"')
+        jobs = [
+            create_job(self.employer, self.category, title='Développeur backend', salary_min=Decimal('1234.5')),
+            create_job(self.employer, self.category, title='Line\u2028separator\u2029 \\ / \t \x1f \U0001F680', salary_max=Decimal('99999999.99')),
+            create_job(self.employer, self.category, title='Python engineer', company='日本語'),
+        ]
+        for i in range(4):
+            jobs.append(create_job(self.employer, self.category, title=f'Job {i}', salary_min=Decimal(i)))
+        Application.objects.create(job=jobs[0], applicant=self.seeker, cover_letter='Hi\u00a0there\n</script>')
+        Application.objects.create(
+            job=jobs[1], applicant=self.seeker, status='shortlisted',
+            resume='applications/resumes/cv é.pdf',
+        )
+
+    def assert_same_bytes(self, url, user=None):
+        self.client.force_authenticate(user)
+        responses = []
+        for enabled in ([], ['*']):
+            cache.clear()
+            with self.settings(FAST_LIST_VIEWS=enabled):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            responses.append(response)
+        regular, fast = responses
+        self.assertIs(fast.renderer_context['view'].plain_json_response, True)
+        self.assertEqual(regular.content, fast.content)
+        return fast
+
+    def test_job_list(self):
+        self.assert_same_bytes('/api/jobs/')
+        self.assert_same_bytes('/api/jobs/?ordering=salary_min&page_size=3')
+        self.assert_same_bytes('/api/jobs/?q=python')
+        self.assert_same_bytes('/api/jobs/', self.employer)
+
+    def test_job_keyset_pages(self):
+        response = self.assert_same_bytes('/api/jobs/?cursor=&ordering=-salary_min')
+        next_link = response.json()['next']
+        while next_link:
+            next_link = self.assert_same_bytes(next_link).json()['next']
+
+    def test_application_list(self):
+        self.assert_same_bytes('/api/applications/?ordering=id', self.seeker)
+        self.assert_same_bytes('/api/applications/?ordering=-applied_at', self.employer)
+
+
+class JobImportExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.client.force_authenticate(self.employer)
+        self.category = JobCategory.objects.create(name='Engineering')
+        Skill.objects.create(name='Python')
+        Skill.objects.create(name='Django')
+
+    def upload(self, content, name):
+        upload = io.BytesIO(content.encode())
+        upload.name = name
+        return self.client.post('/api/jobs/import/', {'file': upload}, format='multipart')
+
+    def test_import_reports_failed_rows(self):
+        content = '\n'.join([
+            'title,description,company,location,job_type,experience_level,salary_min,category,tags',
+            'Backend Developer,APIs,Acme,Lagos,full_time,mid,100,engineering,Python;django',
+            'Frontend Developer,UIs,Acme,Lagos,weekends,mid,,Engineering,',
+            'Data Engineer,Pipelines,Acme,Lagos,contract,senior,,Design,Rust',
+        ])
+        response = self.upload(content, 'jobs.csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('job_type', response.data['errors'][0]['errors'])
+        self.assertEqual(set(response.data['errors'][1]['errors']), {'category', 'tags'})
+
+        job = Job.objects.get(title='Backend Developer')
+        self.assertEqual(job.employer, self.employer)
+        self.assertEqual(sorted(job.tags.values_list('name', flat=True)), ['Django', 'Python'])
+        self.assertTrue(Job.objects.filter(pk=job.pk, search_vector='python').exists())
+
+    def test_export_round_trip(self):
+        create_job(self.employer, self.category, salary_min=Decimal('100.00')).tags.set(Skill.objects.all())
+        for file_format in ('csv', 'jsonl'):
+            response = self.client.get(f'/api/jobs/export/?file_format={file_format}')
+            exported = b''.join(response.streaming_content).decode()
+
+            response = self.upload(exported, f'jobs.{file_format}')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data['errors'], [])
+
+        jsonl = b''.join(self.client.get('/api/jobs/export/?file_format=jsonl').streaming_content).decode()
+        rows = [json.loads(line) for line in jsonl.splitlines()]
+        # 1 original, 1 from the CSV round trip, 2 from the JSONL one
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(len({json.dumps(row, sort_keys=True) for row in rows}), 1)
+        self.assertEqual(rows[0]['tags'], ['Django', 'Python'])
+
+
+class SimilarJobsTest(TestCase):
+    def setUp(self):
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.engineering = JobCategory.objects.create(name='Engineering')
+        self.design = JobCategory.objects.create(name='Design')
+        self.skills = [Skill.objects.create(name=name) for name in ('Python', 'Django', 'Figma', 'SQL')]
+        python, django, figma, sql = self.skills
+        self.jobs = []
+        for i, (category, location, level, salary, tags) in enumerate([
+            (self.engineering, 'Lagos', 'mid', 1000, [python, django]),
+            (self.engineering, 'Lagos', 'senior', 5000, [python, sql]),
+            (self.engineering, 'Nairobi', 'mid', 1200, [django]),
+            (self.engineering, 'Accra', 'entry', 300, [sql]),
+            (self.design, 'Lagos', 'mid', 900, [figma]),
+            (self.design, 'Nairobi', 'senior', 4000, [figma, sql]),
+            (self.design, 'Accra', 'mid', None, []),
+            (self.engineering, 'Lagos', 'mid', 1100, [python]),
+        ]):
+            job = create_job(
+                self.employer, category, title=f'Job {i}', location=location, experience_level=level,
+                salary_min=salary and Decimal(salary), salary_max=salary and Decimal(salary * 2),
+            )
+            job.tags.set(tags)
+            self.jobs.append(job)
+
+    def neighbours(self):
+        return {
+            job_id: [(similar_job_id, score) for similar_job_id, score, _ in rows]
+            for job_id, rows in self.group(
+                SimilarJob.objects.order_by('job_id', 'rank').values_list('job_id', 'similar_job_id', 'score', 'rank')
+            ).items()
+        }
+
+    @staticmethod
+    def group(rows):
+        grouped = {}
+        for job_id, *rest in rows:
+            grouped.setdefault(job_id, []).append(tuple(rest))
+        return grouped
+
+    def queued(self):
+        return set(SimilarityRefreshQueue.objects.values_list('job_id', flat=True))
+
+    @override_settings(SIMILAR_JOBS_TOP_K=3)
+    def test_incremental_refresh_matches_full_rebuild(self):
+        similarity.refresh_all()
+        self.assertEqual(self.queued(), set())
+        self.assertEqual(set(self.neighbours()), {job.pk for job in self.jobs})
+
+        python, django, figma, sql = self.skills
+        moved, retagged, closed, deleted_id = self.jobs[2], self.jobs[4], self.jobs[1], self.jobs[3].pk
+        moved.location = 'Lagos'
+        moved.save(update_fields=['location'])
+        retagged.tags.set([python, django])
+        closed.status = 'closed'
+        closed.save()
+        self.jobs[3].delete()
+        new = create_job(self.employer, self.engineering, title='New', salary_min=Decimal(1000))
+        new.tags.set([python, django])
+        queued = self.queued()
+        self.assertLessEqual({moved.pk, retagged.pk, closed.pk, deleted_id, new.pk}, queued)
+
+        changed, recomputed = similarity.refresh_queued()
+        self.assertEqual(changed, len(queued))
+        self.assertGreaterEqual(recomputed, changed)
+        self.assertEqual(self.queued(), set())
+        incremental = self.neighbours()
+
+        similarity.refresh_all()
+        self.assertEqual(incremental, self.neighbours())
+        self.assertNotIn(closed.pk, incremental)
+        self.assertFalse(any(closed.pk in {similar for similar, _ in rows} for rows in incremental.values()))
+
+    def test_refreshes_reuse_a_synced_matrix(self):
+        # Every job here was saved moments ago; only re-encode what changes below
+        margin, similarity.SYNC_MARGIN = similarity.SYNC_MARGIN, timedelta(0)
+        self.addCleanup(setattr, similarity, 'SYNC_MARGIN', margin)
+        similarity.refresh_all()
+        features = similarity._features
+        python, django, figma, sql = self.skills
+        self.jobs[0].tags.set([figma])
+        closed = self.jobs[5]
+        closed.status = 'closed'
+        closed.save()
+        new = create_job(self.employer, self.design, title='New', location='Accra')
+
+        with CaptureQueriesContext(connection) as queries:
+            similarity.refresh_queued()
+        self.assertIs(similarity._features, features)
+        encoded = [query['sql'] for query in queries if '"jobs"."salary_min"' in query['sql']]
+        self.assertTrue(encoded and all('IN' in sql for sql in encoded))
+
+        # Same scores as a matrix encoded from scratch
+        fresh = similarity.FeatureMatrix()
+        self.assertEqual(set(features.position), set(fresh.position))
+        self.assertIn(new.pk, features.position)
+        self.assertNotIn(closed.pk, features.position)
+        ids = sorted(fresh.position)
+        reused = features.matrix[[features.position[job_id] for job_id in ids]]
+        rebuilt = fresh.matrix[[fresh.position[job_id] for job_id in ids]]
+        self.assertAlmostEqual(abs((reused @ reused.T) - (rebuilt @ rebuilt.T)).max(), 0)
+
+    def test_job_changes_are_queued(self):
+        similarity.refresh_all()
+        job = self.jobs[0]
+
+        job.title = 'Renamed'
+        job.save(update_fields=['title'])
+        self.assertEqual(self.queued(), set())
+
+        job.location = 'Kigali'
+        job.save(update_fields=['location'])
+        self.assertEqual(self.queued(), {job.pk})
+
+        SimilarityRefreshQueue.objects.all().delete()
+        self.skills[2].job_set.add(self.jobs[1], self.jobs[2])
+        self.assertEqual(self.queued(), {self.jobs[1].pk, self.jobs[2].pk})
+
+        SimilarityRefreshQueue.objects.all().delete()
+        listing = set(SimilarJob.objects.filter(similar_job=job).values_list('job_id', flat=True))
+        job_id = job.pk
+        job.delete()
+        self.assertEqual(self.queued(), {job_id, *listing})
+
+    def test_immediate_backend_refreshes_on_commit(self):
+        similarity.refresh_all()
+        job = self.jobs[6]
+        with self.settings(SIMILAR_JOBS_REFRESH_BACKEND='immediate'):
+            with self.captureOnCommitCallbacks(execute=True):
+                job.category = self.engineering
+                job.save(update_fields=['category'])
+                self.assertEqual(self.queued(), {job.pk})
+        self.assertEqual(self.queued(), set())
+        incremental = self.neighbours()
+        similarity.refresh_all()
+        self.assertEqual(incremental, self.neighbours())
+
+    def test_worker_backend_leaves_queue_to_command(self):
+        similarity.refresh_all()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].tags.clear()
+        self.assertEqual(self.queued(), {self.jobs[0].pk})
+
+        out = io.StringIO()
+        call_command('refresh_similar_jobs', stdout=out)
+        self.assertIn('Processed 1 changed jobs', out.getvalue())
+        self.assertEqual(self.queued(), set())
+
+    def test_similar_endpoint_reads_ranked_neighbours(self):
+        similarity.refresh_all()
+        job = self.jobs[0]
+        expected = list(
+            SimilarJob.objects.filter(job=job).order_by('rank').values_list('similar_job_id', flat=True)
+        )
+        response = APIClient().get(f'/api/jobs/{job.pk}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], expected)
+        self.assertEqual(expected[0], self.jobs[7].pk)
+
+
+class RecommendationsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seeker = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        self.engineering = JobCategory.objects.create(name='Engineering')
+        self.design = JobCategory.objects.create(name='Design')
+        self.python = Skill.objects.create(name='Python')
+        self.figma = Skill.objects.create(name='Figma')
+
+        self.applied = self.job(self.engineering, 'Lagos', [self.python])
+        Application.objects.create(job=self.applied, applicant=self.seeker)
+
+    def job(self, category, location, tags, **kwargs):
+        kwargs.setdefault('salary_min', Decimal(1000))
+        job = create_job(self.employer, category, location=location, **kwargs)
+        job.tags.set(tags)
+        return job
+
+    def recommended(self, user=None):
+        return list(
+            RecommendedJob.objects.filter(user=user or self.seeker).order_by('rank').values_list('job_id', flat=True)
+        )
+
+    def scores(self):
+        return dict(RecommendedJob.objects.filter(user=self.seeker).values_list('job_id', 'score'))
+
+    def test_ranks_open_jobs_like_the_applied_ones(self):
+        close = self.job(self.engineering, 'Lagos', [self.python])
+        partial = self.job(self.engineering, 'Nairobi', [self.figma], experience_level='senior')
+        unrelated = self.job(self.design, 'Accra', [self.figma], experience_level='entry', salary_min=None)
+        closed = self.job(self.engineering, 'Lagos', [self.python], status='closed')
+
+        self.assertEqual(recommendations.refresh_recommendations(), 1)
+        recommended = self.recommended()
+        self.assertEqual(recommended, [close.pk, partial.pk])
+        self.assertNotIn(self.applied.pk, recommended)
+        self.assertNotIn(closed.pk, recommended)
+        self.assertNotIn(unrelated.pk, recommended)
+        self.assertAlmostEqual(self.scores()[close.pk], sum(similarity.WEIGHTS.values()), places=5)
+
+    def test_profile_location_weighting(self):
+        kigali = self.job(self.engineering, 'Kigali', [self.python])
+        abuja = self.job(self.engineering, 'Abuja', [self.python])
+
+        recommendations.refresh_recommendations()
+        # Tied, so the newest comes first
+        self.assertEqual(self.recommended(), [abuja.pk, kigali.pk])
+        self.assertEqual(self.scores()[kigali.pk], self.scores()[abuja.pk])
+
+        UserProfile.objects.create(user=self.seeker, location=' kigali ')
+        recommendations.refresh_recommendations()
+        self.assertEqual(self.recommended(), [kigali.pk, abuja.pk])
+        bonus = recommendations.PROFILE_LOCATION_WEIGHT * similarity.WEIGHTS['location']
+        self.assertAlmostEqual(self.scores()[kigali.pk] - self.scores()[abuja.pk], bonus, places=5)
+
+    def test_profile_location_alone_does_not_cover_a_user(self):
+        newcomer = CustomUser.objects.create(email='new@example.com', role='job_seeker')
+        UserProfile.objects.create(user=newcomer, location='Lagos')
+        self.job(self.engineering, 'Lagos', [self.python])
+
+        self.assertEqual(recommendations.refresh_recommendations(), 1)
+        self.assertEqual(self.recommended(newcomer), [])
+
+    def test_uncovered_users_lose_their_recommendations(self):
+        job = self.job(self.engineering, 'Lagos', [self.python])
+        recommendations.refresh_recommendations()
+        self.assertEqual(self.recommended(), [job.pk])
+
+        Application.objects.filter(applicant=self.seeker).delete()
+        self.assertEqual(recommendations.refresh_recommendations(), 0)
+        self.assertEqual(self.recommended(), [])
+
+    def test_endpoint_serves_precomputed_ranking(self):
+        first = self.job(self.engineering, 'Lagos', [self.python])
+        second = self.job(self.engineering, 'Nairobi', [self.python])
+        recommendations.refresh_recommendations()
+
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+        response = client.get('/api/jobs/recommended/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [first.pk, second.pk])
+
+    @override_settings(RECOMMENDED_JOBS_TOP_N=3)
+    def test_fallback_tops_up_nearby_jobs_with_the_newest(self):
+        older = self.job(self.design, 'Accra', [])
+        nearby = self.job(self.design, 'Kigali', [])
+        newer = self.job(self.design, 'Abuja', [])
+        newest = self.job(self.design, 'Accra', [])
+        profile = UserProfile.objects.create(user=self.seeker, location='KIGALI')
+
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+        response = client.get('/api/jobs/recommended/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [nearby.pk, newest.pk, newer.pk])
+        self.assertNotIn(older.pk, [row['id'] for row in response.data])
+
+        # Without a profile location, just the newest jobs the user hasn't applied to
+        profile.location = ''
+        profile.save()
+        response = client.get('/api/jobs/recommended/')
+        self.assertEqual([row['id'] for row in response.data], [newest.pk, newer.pk, nearby.pk])
@@ -1,5 +1,9 @@
+import csv
+
 from django.shortcuts import render
 from rest_framework import viewsets, generics, filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,19 +15,28 @@ from users.permissions import IsEmployerOrAdmin, IsOwnerOrAdmin, IsJobSeekerOrAd
 from .serializers import JobSerializer
 from applications.serializers import ApplicationCreateSerializer
 from applications.serializers import ApplicationSerializer
+from django.db import transaction
+from django.conf import settings
 from django.db.models import Q
 from rest_framework import status
 from applications.models import Application
 from django.shortcuts import render
 from django.utils import timezone
 from .models import JobCategory, Skill
+from .search import JobSearchFilter, JobOrderingFilter
+from .pagination import JobFeedPagination
+from .bulk import FORMATS, detect_format, export_jobs, import_jobs, open_text
+from jobfrica_backend.caching import CachedResponseMixin, ConditionalGetMixin
+from jobfrica_backend.fastpath import FastListMixin
+from jobfrica_backend.streaming import COMPRESSIONS, streaming_file_response
 from .serializers import (CategorySerializer, SkillSerializer, 
                           JobListSerializer, JobSerializer,
-                          JobCreateSerializer, JobDetailSerializer)
+                          JobCreateSerializer, JobDetailSerializer, JobListValuesSerializer)
 
 # Create your views here.
-class JobCategoryViewSet(viewsets.ModelViewSet):
+class JobCategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """API endpoint that allows job categories to be viewed."""
+    cache_models = (JobCategory,)
     queryset = JobCategory.objects.all().order_by('name')
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]  # Anyone can see categories
@@ -32,7 +45,7 @@ class JobCategoryViewSet(viewsets.ModelViewSet):
     def jobs(self, request, slug=None):
         """Get jobs for a specific category"""
         category = self.get_object()
-        jobs = Job.objects.filter(category=category, status='open')
+        jobs = Job.objects.filter(category=category, status='open').select_related('category', 'employer')
         page = self.paginate_queryset(jobs)
         
         if page is not None:
@@ -43,26 +56,33 @@ class JobCategoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """API endpoint that allows skills to be viewed."""
+    cache_models = (Skill,)
     queryset = Skill.objects.all().order_by('name')
     serializer_class = SkillSerializer
     permission_classes = [AllowAny]  # Anyone can see skills
     pagination_class = None
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(ConditionalGetMixin, CachedResponseMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for managing job listings."""
     queryset = Job.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    fast_list_serializer_class = JobListValuesSerializer
+    cache_models = (Job, JobCategory, Skill)
+    conditional_models = cache_models
+    # Application counters are versioned per job, so applying doesn't flush every cached job
+    object_version_model = Job
+    conditional_user_scopes = ('jobs',)
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, JobOrderingFilter]
+    pagination_class = JobFeedPagination
     filterset_fields = ['category', 'job_type', 'experience_level', 'location', 'company']
-    search_fields = ['title', 'description', 'company']
     ordering_fields = ['created_at', 'salary_min', 'salary_max']
     ordering = ['-created_at']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'export']:
             return [IsEmployerOrAdmin()]
-        elif self.action == 'apply':
+        elif self.action in ['apply', 'recommended']:
             return [IsAuthenticated()]
         return [AllowAny()]  # Default to public access
 
@@ -148,7 +168,9 @@ class JobViewSet(viewsets.ModelViewSet):
         )
         
         if serializer.is_valid():
-            application = serializer.save(job=job, applicant=request.user)
+            # Create the application and bump the job's counters together
+            with transaction.atomic():
+                application = serializer.save(job=job, applicant=request.user)
             response_serializer = ApplicationSerializer(application)
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
         
@@ -156,15 +178,51 @@ class JobViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def similar(self, request, pk=None):
-        """Get similar jobs based on category and location"""
+        """Get similar open jobs, ranked by the precomputed similarity scores"""
         job = self.get_object()
-        similar_jobs = Job.objects.filter(
-            Q(category=job.category) | Q(location=job.location)
-        ).exclude(id=job.id).distinct()[:10]
+        similar_jobs = list(
+            Job.objects.filter(similar_to__job=job, status='open')
+            .select_related('category', 'employer')
+            .order_by('similar_to__rank')
+        )
+        if not similar_jobs:
+            # Not computed yet (or the job is closed): newest open jobs in the same category
+            similar_jobs = Job.objects.filter(
+                category_id=job.category_id, status='open'
+            ).exclude(id=job.id).select_related('category', 'employer').order_by('-created_at')[:settings.SIMILAR_JOBS_TOP_K]
         
         serializer = JobListSerializer(similar_jobs, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        """Get open jobs recommended for the current user, from the precomputed rankings"""
+        jobs = list(
+            Job.objects.filter(recommended_to__user=request.user, status='open')
+            .select_related('category', 'employer')
+            .order_by('recommended_to__rank')
+        )
+        if not jobs:
+            # Not computed yet: newest open jobs, those near the user's location first
+            profile = getattr(request.user, 'profile', None)
+            location = profile.location if profile is not None else None
+            jobs = Job.objects.filter(status='open').exclude(
+                applications__applicant=request.user
+            ).select_related('category', 'employer').order_by('-created_at')
+            top_n = settings.RECOMMENDED_JOBS_TOP_N
+            if location and location.strip():
+                location = location.strip()
+                nearby = list(jobs.filter(location__iexact=location)[:top_n])
+                # Topped up with the newest jobs elsewhere
+                if len(nearby) < top_n:
+                    nearby += jobs.exclude(location__iexact=location)[:top_n - len(nearby)]
+                jobs = nearby
+            else:
+                jobs = jobs[:top_n]
+
+        serializer = JobListSerializer(jobs, many=True)
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['get'])
     def applications(self, request, pk=None):
         """Get all applications for a job"""
@@ -177,7 +235,7 @@ class JobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        applications = job.applications.select_related('applicant')
+        applications = job.applications.select_related('applicant').with_job_summary()
         page = self.paginate_queryset(applications)
         
         if page is not None:
@@ -198,3 +256,34 @@ class JobViewSet(viewsets.ModelViewSet):
             return self.get_paginated_response(serializer.data)
         
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """Create jobs from an uploaded CSV or JSON Lines file, reporting the rows that failed"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'A CSV or JSONL file is required.'})
+        file_format = detect_format(upload.name, request.data.get('file_format'))
+        if file_format is None:
+            raise ValidationError({'file_format': 'Must be csv or jsonl.'})
+
+        try:
+            report = import_jobs(open_text(upload), file_format, request.user)
+        except (UnicodeDecodeError, csv.Error):
+            raise ValidationError({'file': 'The file is not valid UTF-8 CSV or JSONL.'})
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the current user's jobs (every job for admins) as CSV or JSON Lines, optionally gzipped"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            raise ValidationError({'file_format': 'Must be csv or jsonl.'})
+
+        jobs = Job.objects.all()
+        if request.user.role != 'admin':
+            jobs = jobs.filter(employer=request.user)
+        compression = request.query_params.get('compression')
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValidationError({'compression': 'Must be gzip.'})
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        return streaming_file_response(export_jobs(jobs, file_format), f'jobs.{file_format}', content_type, compression)
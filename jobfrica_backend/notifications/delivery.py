@@ -0,0 +1,21 @@
+from collections import Counter
+
+from django.db import transaction
+
+from jobfrica_backend.caching import bump_user_version
+from .models import Notification
+from .unread import adjust_unread
+
+
+def deliver(notifications, batch_size=1000):
+    """
+    Insert unsaved Notification instances with batched INSERTs. bulk_create sends no
+    signals, so the recipients' notification versions and unread counters are
+    updated here instead.
+    """
+    created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    recipient_ids = {notification.recipient_id for notification in created}
+    if recipient_ids:
+        transaction.on_commit(lambda: bump_user_version(recipient_ids, 'notifications'))
+        adjust_unread(Counter(notification.recipient_id for notification in created if not notification.is_read))
+    return created
@@ -0,0 +1,215 @@
+"""
+Notification fan-out.
+
+Domain events (a job was posted, an application was received or changed status)
+are published as NotificationEvent rows in the transaction that caused them, so an
+event exists exactly when its cause was committed and publishing it twice is a
+no-op. process_pending() later resolves each event's recipients with set-based
+queries and inserts their notifications in batches, outside the request path.
+
+Who runs process_pending() is chosen by NOTIFICATION_FANOUT_BACKEND:
+
+- 'worker': the process_notification_events command, run as a separate worker.
+- 'thread': a thread pool in the publishing process, once the transaction commits.
+- 'immediate': synchronously once the transaction commits; meant for tests.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from applications.models import Application
+from jobs.models import Job
+from users.models import CustomUser
+from .delivery import deliver
+from .models import Notification, NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+JOB_CREATED = 'job_created'
+APPLICATION_RECEIVED = 'application_received'
+APPLICATION_STATUS_CHANGED = 'application_status_changed'
+
+# Events that failed this many times are left for inspection
+MAX_ATTEMPTS = 5
+
+
+def job_created_event(job_id):
+    return NotificationEvent(key=f'{JOB_CREATED}:{job_id}', event=JOB_CREATED, payload={'job_id': job_id})
+
+
+def application_received_event(application_id):
+    return NotificationEvent(
+        key=f'{APPLICATION_RECEIVED}:{application_id}',
+        event=APPLICATION_RECEIVED,
+        payload={'application_id': application_id},
+    )
+
+
+def application_status_changed_event(application_ids, status, changed_at=None):
+    """
+    One event for applications moved to `status` together at `changed_at` (now by
+    default). The move's time is part of the key: publishing this event again is
+    deduplicated, while moving the same applications back to `status` later is a new event.
+    """
+    application_ids = sorted(set(application_ids))
+    changed_at = changed_at or timezone.now()
+    digest = hashlib.sha1(','.join(map(str, application_ids)).encode()).hexdigest()
+    return NotificationEvent(
+        key=f'{APPLICATION_STATUS_CHANGED}:{status}:{changed_at.isoformat()}:{digest}',
+        event=APPLICATION_STATUS_CHANGED,
+        payload={'application_ids': application_ids, 'status': status},
+    )
+
+
+def publish(events):
+    """Queue `events` with the current transaction and schedule their processing after it commits."""
+    NotificationEvent.objects.bulk_create(events, ignore_conflicts=True)
+    backend = settings.NOTIFICATION_FANOUT_BACKEND
+    if backend == 'thread':
+        transaction.on_commit(_submit)
+    elif backend == 'immediate':
+        transaction.on_commit(process_pending)
+
+
+def matching_job_seekers(job):
+    """
+    Active job seekers a new job is relevant to: those who recently applied to a job
+    in the same category, or whose profile is in the job's location.
+    """
+    since = timezone.now() - timedelta(days=settings.NOTIFICATION_JOB_MATCH_DAYS)
+    recent_in_category = Application.objects.filter(
+        applicant=OuterRef('pk'), job__category_id=job.category_id, applied_at__gte=since,
+    )
+    matches = Q(Exists(recent_in_category))
+    location = (job.location or '').strip()
+    # A blank location doesn't place the job anywhere, so it matches nobody's
+    if location:
+        matches |= Q(profile__location__iexact=location)
+    return CustomUser.objects.filter(role='job_seeker', is_active=True).filter(matches)
+
+
+def _job_created(payload):
+    job = Job.objects.filter(pk=payload['job_id'], status='open').first()
+    if job is None:
+        return
+    title = 'New job posting'
+    message = f'{job.title} at {job.company} in {job.location}.'
+    recipients = matching_job_seekers(job).values_list('pk', flat=True).iterator(chunk_size=2000)
+    for recipient_id in recipients:
+        yield Notification(
+            recipient_id=recipient_id, notification_type='new_job_posting',
+            title=title, message=message, related_job_id=job.pk,
+        )
+
+
+def _application_received(payload):
+    application = (
+        Application.objects.filter(pk=payload['application_id'])
+        .values('pk', 'job_id', 'job__title', 'job__employer_id')
+        .first()
+    )
+    if application is None:
+        return
+    yield Notification(
+        recipient_id=application['job__employer_id'], notification_type='application_update',
+        title='New application received',
+        message=f'Someone applied to "{application["job__title"]}".',
+        related_job_id=application['job_id'], related_application_id=application['pk'],
+    )
+
+
+def _application_status_changed(payload):
+    status = payload['status']
+    label = dict(Application.STATUS_CHOICES)[status].lower()
+    # Applications that moved on again since are told about that move instead
+    applications = Application.objects.filter(pk__in=payload['application_ids'], status=status)
+    for application_id, applicant_id, job_id, job_title in applications.values_list(
+        'pk', 'applicant_id', 'job_id', 'job__title'
+    ).iterator(chunk_size=2000):
+        yield Notification(
+            recipient_id=applicant_id, notification_type='application_update',
+            title='Application status updated',
+            message=f'Your application for "{job_title}" is now {label}.',
+            related_job_id=job_id, related_application_id=application_id,
+        )
+
+
+HANDLERS = {
+    JOB_CREATED: _job_created,
+    APPLICATION_RECEIVED: _application_received,
+    APPLICATION_STATUS_CHANGED: _application_status_changed,
+}
+
+
+def _fan_out(event):
+    batch_size = settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    batch, created = [], 0
+    for notification in HANDLERS[event.event](event.payload):
+        batch.append(notification)
+        if len(batch) >= batch_size:
+            created += len(deliver(batch, batch_size=batch_size))
+            batch = []
+    if batch:
+        created += len(deliver(batch, batch_size=batch_size))
+    return created
+
+
+def process_pending(limit=100):
+    """
+    Fan out up to `limit` pending events, each in its own savepoint so one failing
+    event is retried later without holding back the others. Events are claimed
+    with SKIP LOCKED, so several workers can run side by side.
+    Returns (events processed, notifications created).
+    """
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')[:limit]
+        )
+        created = 0
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    created += _fan_out(event)
+            except Exception as exc:
+                logger.exception('Fanning out notification event %s failed', event.key)
+                event.last_error = repr(exc)
+            else:
+                event.processed_at = timezone.now()
+                event.last_error = ''
+        NotificationEvent.objects.bulk_update(events, ['attempts', 'processed_at', 'last_error'])
+    return len(events), created
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _drain():
+    try:
+        while process_pending()[0]:
+            pass
+    except Exception:
+        logger.exception('Processing notification events failed')
+    finally:
+        # The pool thread opened its own connections; don't leak them
+        connections.close_all()
+
+
+def _submit():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.NOTIFICATION_FANOUT_WORKERS, thread_name_prefix='notification-fanout',
+            )
+    _executor.submit(_drain)
@@ -0,0 +1,164 @@
+"""
+Wake-ups for the live notification stream (see views.notification_stream).
+
+Brokers only carry "something changed for these users"; a woken stream reads the
+new notifications and the unread count itself, so messages stay tiny and a missed
+or duplicated wake-up costs nothing. NOTIFICATION_STREAM_BROKER chooses between:
+
+- 'local': an in-process pub/sub, for tests and single-process deployments.
+- 'postgres': Postgres LISTEN/NOTIFY, so a change committed by any process reaches
+  the streams held by every other one. Each process keeps one listening connection.
+
+EventSource can't send an Authorization header, so browsers open the stream with a
+stream ticket: a random, single-use token valid for NOTIFICATION_STREAM_TICKET_TTL
+seconds that only opens the stream, instead of an access token in the URL.
+"""
+import logging
+import secrets
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'notification_stream'
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD = 7900
+
+
+class LocalBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id, wake):
+        """Call `wake()` whenever `user_id` has news; `wake` must be thread-safe."""
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(wake)
+
+    def unsubscribe(self, user_id, wake):
+        with self._lock:
+            wakers = self._subscribers.get(user_id, set())
+            wakers.discard(wake)
+            if not wakers:
+                self._subscribers.pop(user_id, None)
+
+    def dispatch(self, user_ids):
+        with self._lock:
+            wakers = [wake for user_id in user_ids for wake in self._subscribers.get(user_id, ())]
+        for wake in wakers:
+            wake()
+
+    def publish(self, user_ids):
+        self.dispatch(user_ids)
+
+
+class PostgresBroker(LocalBroker):
+    def __init__(self, alias='default'):
+        super().__init__()
+        self.alias = alias
+        self._listener = None
+
+    def subscribe(self, user_id, wake):
+        super().subscribe(user_id, wake)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='notification-stream-listener', daemon=True)
+                self._listener.start()
+
+    def publish(self, user_ids):
+        chunks, chunk = [], ''
+        for user_id in sorted(set(user_ids)):
+            part = str(user_id)
+            if chunk and len(chunk) + len(part) + 1 > MAX_PAYLOAD:
+                chunks.append(chunk)
+                chunk = ''
+            chunk = f'{chunk},{part}' if chunk else part
+        if chunk:
+            chunks.append(chunk)
+        if not chunks:
+            return
+        with connections[self.alias].cursor() as cursor:
+            for chunk in chunks:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, chunk])
+
+    def _listen(self):
+        wrapper = connections[self.alias]
+        backoff, connection = 1, None
+        while True:
+            try:
+                connection = wrapper.get_new_connection(wrapper.get_connection_params())
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                backoff = 1
+                while True:
+                    if select.select([connection], [], [], 30) == ([], [], []):
+                        continue
+                    connection.poll()
+                    user_ids = set()
+                    while connection.notifies:
+                        payload = connection.notifies.pop(0).payload
+                        user_ids.update(int(user_id) for user_id in payload.split(',') if user_id)
+                    self.dispatch(user_ids)
+            except Exception:
+                logger.exception('Notification stream listener failed; reconnecting in %ss', backoff)
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+BROKERS = {'local': LocalBroker, 'postgres': PostgresBroker}
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker selected by NOTIFICATION_STREAM_BROKER."""
+    name = settings.NOTIFICATION_STREAM_BROKER
+    with _brokers_lock:
+        if name not in _brokers:
+            _brokers[name] = BROKERS[name]()
+        return _brokers[name]
+
+
+def notify_users(user_ids):
+    """Wake the streams of `user_ids`; call once the change is committed."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    try:
+        get_broker().publish(user_ids)
+    except Exception:
+        # Streams catch up on their next wake-up or reconnect; never fail the write
+        logger.exception('Publishing notification stream wake-ups failed')
+
+
+def _ticket_key(ticket):
+    return f'notifications:stream-ticket:{ticket}'
+
+
+def issue_stream_ticket(user_id):
+    """A new stream ticket for `user_id`."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_ticket_key(ticket), user_id, settings.NOTIFICATION_STREAM_TICKET_TTL)
+    return ticket
+
+
+def redeem_stream_ticket(ticket):
+    """The user id of a valid `ticket`, or None. A ticket can only be redeemed once."""
+    key = _ticket_key(ticket)
+    user_id = cache.get(key)
+    # Only the request whose delete removed the ticket may use it
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
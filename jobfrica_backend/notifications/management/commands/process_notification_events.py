@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.fanout import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Fans out pending notification events into notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process what is pending and exit instead of polling')
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Number of events claimed per transaction')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait before polling again when nothing is pending')
+
+    def handle(self, *args, **options):
+        while True:
+            events, created = process_pending(limit=options['limit'])
+            if events:
+                self.stdout.write(f'Processed {events} events, created {created} notifications')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
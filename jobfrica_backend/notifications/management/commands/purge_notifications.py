@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from notifications.models import Notification
+from notifications.retention import count_expired, expire_notifications, purge_events, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Archives (or deletes) read notifications past their retention and old fan-out events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='types', action='append',
+                            choices=[choice for choice, _ in Notification.NOTIFICATION_TYPE_CHOICES],
+                            help='Only expire this notification type; may be repeated')
+        parser.add_argument('--days', type=int,
+                            help='Retention in days for every selected type, overriding the settings')
+        parser.add_argument('--no-archive', action='store_true',
+                            help='Delete expired notifications instead of archiving them')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Notifications removed per transaction')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report how many notifications would be expired and exit')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        days = retention_days()
+        if options['types']:
+            days = {notification_type: days[notification_type] for notification_type in options['types']}
+        if options['days'] is not None:
+            days = dict.fromkeys(days, options['days'] or None)
+
+        if options['dry_run']:
+            for notification_type, count in count_expired(days).items():
+                self.stdout.write(f'{notification_type}: {count} expired')
+            return
+
+        verb = 'Deleted' if options['no_archive'] else 'Archived'
+        for notification_type, type_days in days.items():
+            if not type_days:
+                continue
+            removed = expire_notifications(
+                notification_type, type_days, archive=not options['no_archive'],
+                batch_size=options['batch_size'], pause=options['pause'],
+            )
+            self.stdout.write(f'{verb} {removed} {notification_type} notifications older than {type_days} days')
+        self.stdout.write(f'Deleted {purge_events()} processed notification events')
@@ -0,0 +1,40 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from jobfrica_backend.emails import renderer
+from notifications.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Renders and sends the emails queued in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send what is due and exit instead of polling')
+        parser.add_argument('--limit', type=int,
+                            help='Number of emails claimed per transaction (EMAIL_OUTBOX_BATCH_SIZE by default)')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait before polling again when nothing is due')
+
+    def handle(self, *args, **options):
+        # Kept open across batches and closed while idle
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = send_pending(limit=options['limit'], connection=connection)
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} emails, {failed} failed')
+                    if options['verbosity'] > 1:
+                        for name, timing in sorted(renderer.metrics().items()):
+                            self.stdout.write(
+                                f'  {name}: {timing["count"]} rendered, '
+                                f'mean {timing["mean_ms"]} ms, max {timing["max_ms"]} ms'
+                            )
+                    continue
+                connection.close()
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
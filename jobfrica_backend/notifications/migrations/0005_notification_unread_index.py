@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0003_alter_application_status'),
+        ('jobs', '0009_recommended_jobs'),
+        ('notifications', '0004_notification_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at'], name='notif_recipient_unread_idx'),
+        ),
+    ]
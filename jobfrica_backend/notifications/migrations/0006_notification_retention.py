@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0003_alter_application_status'),
+        ('jobs', '0009_recommended_jobs'),
+        ('notifications', '0005_notification_unread_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipient_id', models.BigIntegerField()),
+                ('notification_type', models.CharField(choices=[('application_update', 'Application Update'), ('new_job_posting', 'New Job Posting'), ('company_announcement', 'Company Announcement')], max_length=30)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('related_job_id', models.BigIntegerField(blank=True, null=True)),
+                ('related_application_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'notifications_archive',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['notification_type', 'created_at'], name='notif_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['recipient_id', '-created_at'], name='notif_archive_recipient_idx'),
+        ),
+    ]
@@ -14,4 +14,98 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     related_job = models.ForeignKey('jobs.Job', on_delete=models.CASCADE, blank=True, null=True, related_name='notifications')
     related_application = models.ForeignKey('applications.Application', on_delete=models.CASCADE, blank=True, null=True, related_name='notifications')
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Serves the unread list and count, newest first
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notif_recipient_unread_idx'),
+            # Serves the full list, so its cost depends on the page, not the history
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+            # Lets the retention sweep find expired rows of a type without a scan
+            models.Index(fields=['notification_type', 'created_at'], name='notif_type_created_idx',
+                         condition=models.Q(is_read=True)),
+        ]
+
+
+class ArchivedNotification(models.Model):
+    """
+    A read notification moved out of the live table by notifications.retention.
+    Ids are the original ones; related rows may since have been deleted, so they
+    are kept as plain ids.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    recipient_id = models.BigIntegerField()
+    notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPE_CHOICES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    related_job_id = models.BigIntegerField(blank=True, null=True)
+    related_application_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications_archive'
+        indexes = [
+            models.Index(fields=['recipient_id', '-created_at'], name='notif_archive_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.recipient_id})"
+
+
+class NotificationEvent(models.Model):
+    """
+    A domain event waiting to be turned into notifications by notifications.fanout.
+    Events are written in the transaction that caused them; `key` is unique, so
+    publishing the same event twice queues it once.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'notification_events'
+        indexes = [
+            # The worker only ever scans the pending events
+            models.Index(fields=['id'], name='notification_events_pending', condition=models.Q(processed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be rendered and sent by notifications.outbox. Emails are
+    written in the transaction of the change they report, so one is sent exactly
+    when that change was committed. The context is cleared once the email is sent,
+    so links carrying tokens don't outlive their delivery.
+    """
+    recipient = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, blank=True, null=True,
+                                  related_name='outbox_emails')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    template = models.CharField(max_length=100)
+    context = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Set while a sender holds the email, from when its current attempt started
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'email_outbox'
+        indexes = [
+            # The worker only ever scans the unsent emails that are due
+            models.Index(fields=['send_after'], name='email_outbox_pending', condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.template} to {self.to_email}"
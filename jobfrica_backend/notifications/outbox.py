@@ -0,0 +1,179 @@
+"""
+Transactional email outbox.
+
+queue_email() writes an OutboxEmail row in the caller's transaction, so requests
+never wait on the mail server and an email goes out exactly when the change it
+reports was committed. send_pending() later renders a batch of due emails at once
+(see jobfrica_backend.emails) and sends them over one open connection of
+EMAIL_BACKEND; a failed email is retried with exponential backoff, up to
+EMAIL_OUTBOX_MAX_ATTEMPTS times. Sending is at least once: an email whose
+sender dies before recording the result is claimed again after
+EMAIL_OUTBOX_CLAIM_TIMEOUT and sent again.
+
+Who runs send_pending() is chosen by EMAIL_OUTBOX_BACKEND:
+
+- 'worker': the send_outbox_emails command, run as a separate worker.
+- 'thread' (default): a single background thread in the queuing process, once the
+  transaction commits; it also wakes itself up for retries.
+- 'immediate': synchronously once the transaction commits; meant for tests.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from jobfrica_backend.emails import renderer
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(user, subject, template, context=None):
+    """
+    Queue the `template` email (emails/<template>.html, and .txt when it exists) for
+    `user`. `context` must be JSON serialisable; the template also gets `user`.
+    """
+    email = OutboxEmail.objects.create(
+        recipient=user, to_email=user.email, subject=subject, template=template, context=context or {},
+    )
+    backend = settings.EMAIL_OUTBOX_BACKEND
+    if backend == 'thread':
+        transaction.on_commit(_submit)
+    elif backend == 'immediate':
+        transaction.on_commit(send_pending)
+    return email
+
+
+def _message(email, bodies, connection):
+    text, html = bodies
+    message = EmailMultiAlternatives(
+        subject=email.subject, body=text, from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email], connection=connection,
+    )
+    message.attach_alternative(html, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _claim(limit):
+    """Mark up to `limit` due emails as being sent by this caller, and commit."""
+    with transaction.atomic():
+        now = timezone.now()
+        expired = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(sent_at__isnull=True, send_after__lte=now, attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+            # A claim older than the timeout belongs to a sender that died
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+            .select_related('recipient')
+            .order_by('send_after', 'id')[:limit]
+        )
+        for email in emails:
+            email.attempts += 1
+            email.claimed_at = now
+        OutboxEmail.objects.bulk_update(emails, ['attempts', 'claimed_at'])
+    return emails
+
+
+def send_pending(limit=None, connection=None):
+    """
+    Send up to `limit` due emails (EMAIL_OUTBOX_BATCH_SIZE by default). Emails are
+    claimed in a short transaction of their own and sent after it commits, so no
+    row lock is held while the mail server is talked to, and several workers can
+    run side by side. `connection` is an email backend the caller keeps open
+    between batches; without one, a connection is opened for this batch only.
+    Returns (emails sent, emails failed).
+    """
+    emails = _claim(limit or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection()
+
+    rendered = renderer.render_many(
+        [(email.template, {**email.context, 'user': email.recipient}) for email in emails],
+        return_exceptions=True,
+    )
+    sent, failed = [], []
+    try:
+        for email, bodies in zip(emails, rendered):
+            try:
+                if isinstance(bodies, Exception):
+                    raise bodies
+                # open() is a no-op while the connection is up, and reconnects after a failure
+                connection.open()
+                _message(email, bodies, connection).send()
+            except Exception as exc:
+                logger.warning('Sending outbox email %s failed: %r', email.pk, exc)
+                connection.close()
+                failed.append((email, repr(exc)))
+            else:
+                sent.append(email.pk)
+    finally:
+        if owns_connection:
+            connection.close()
+
+    # Only record results on claims that are still ours
+    claimed_at = emails[0].claimed_at
+    now = timezone.now()
+    OutboxEmail.objects.filter(pk__in=sent, claimed_at=claimed_at).update(
+        sent_at=now, claimed_at=None, context={}, last_error='',
+    )
+    for email, error in failed:
+        OutboxEmail.objects.filter(pk=email.pk, claimed_at=claimed_at).update(
+            claimed_at=None, last_error=error, send_after=now + retry_delay(email.attempts),
+        )
+    return len(sent), len(failed)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_retry_timer = None
+
+
+def _drain():
+    try:
+        while any(send_pending()):
+            pass
+        _schedule_retry()
+    except Exception:
+        logger.exception('Sending outbox emails failed')
+    finally:
+        # The pool thread opened its own connections; don't leak them
+        connections.close_all()
+
+
+def _schedule_retry():
+    """Without a worker, wake up again when the next failed email is due for a retry."""
+    global _retry_timer
+    due = (
+        OutboxEmail.objects.filter(sent_at__isnull=True, attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+        .aggregate(next=Min('send_after'))['next']
+    )
+    if due is None:
+        return
+    with _executor_lock:
+        if _retry_timer is not None and _retry_timer.is_alive():
+            _retry_timer.cancel()
+        _retry_timer = threading.Timer(max((due - timezone.now()).total_seconds(), 1), _submit)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+
+def _submit():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One thread, so bursts of signups don't open a connection each to the mail server
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+    _executor.submit(_drain)
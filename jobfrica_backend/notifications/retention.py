@@ -0,0 +1,111 @@
+"""
+Notification retention.
+
+Read notifications older than their type's retention period (see
+NOTIFICATION_RETENTION_DAYS) are moved to ArchivedNotification, or just deleted,
+a small batch at a time. Each batch is one statement in its own transaction that
+deletes the rows and inserts them into the archive, so batches hold their locks
+briefly, skip rows another transaction is touching and can be interrupted at any
+point without losing anything. Unread notifications are never expired, so the
+unread counters are unaffected.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from jobfrica_backend.caching import bump_user_version
+from .models import ArchivedNotification, Notification, NotificationEvent
+
+ARCHIVED_COLUMNS = (
+    'id', 'recipient_id', 'notification_type', 'title', 'message',
+    'related_job_id', 'related_application_id', 'created_at',
+)
+
+
+def retention_days():
+    """{notification type: days kept once read}; types mapped to None are kept forever."""
+    overrides = settings.NOTIFICATION_RETENTION_DAYS_BY_TYPE
+    days = {}
+    for notification_type, _ in Notification.NOTIFICATION_TYPE_CHOICES:
+        value = overrides.get(notification_type, settings.NOTIFICATION_RETENTION_DAYS)
+        days[notification_type] = value or None
+    return days
+
+
+def _expired_ids_sql(batch_size):
+    return (
+        f'SELECT id FROM {Notification._meta.db_table} '
+        f'WHERE is_read AND notification_type = %s AND created_at < %s '
+        f'ORDER BY created_at LIMIT {int(batch_size)} FOR UPDATE SKIP LOCKED'
+    )
+
+
+def _archive_sql(batch_size):
+    columns = ', '.join(ARCHIVED_COLUMNS)
+    return (
+        f'WITH moved AS ('
+        f'DELETE FROM {Notification._meta.db_table} WHERE id IN ({_expired_ids_sql(batch_size)}) '
+        f'RETURNING {columns}) '
+        f'INSERT INTO {ArchivedNotification._meta.db_table} ({columns}, archived_at) '
+        f'SELECT {columns}, %s FROM moved '
+        f'RETURNING recipient_id'
+    )
+
+
+def _delete_sql(batch_size):
+    return (
+        f'DELETE FROM {Notification._meta.db_table} WHERE id IN ({_expired_ids_sql(batch_size)}) '
+        f'RETURNING recipient_id'
+    )
+
+
+def count_expired(days=None, now=None):
+    """
+    {notification type: read notifications past their retention}, for dry runs;
+    `days` maps types to retention like retention_days() does and defaults to it.
+    """
+    now = now or timezone.now()
+    return {
+        notification_type: Notification.objects.filter(
+            is_read=True, notification_type=notification_type,
+            created_at__lt=now - timedelta(days=type_days),
+        ).count()
+        for notification_type, type_days in (retention_days() if days is None else days).items()
+        if type_days
+    }
+
+
+def expire_notifications(notification_type, days, archive=True, batch_size=1000, pause=0, now=None):
+    """
+    Archive (or delete) the read `notification_type` notifications older than `days`,
+    `batch_size` at a time, sleeping `pause` seconds between batches.
+    Returns the number of notifications removed from the live table.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    sql = _archive_sql(batch_size) if archive else _delete_sql(batch_size)
+    params = [notification_type, cutoff] + ([timezone.now()] if archive else [])
+    removed = 0
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                recipient_ids = {row[0] for row in cursor.fetchall()}
+                count = cursor.rowcount
+            if recipient_ids:
+                transaction.on_commit(lambda ids=recipient_ids: bump_user_version(ids, 'notifications'))
+        removed += count
+        if count < batch_size:
+            return removed
+        if pause:
+            time.sleep(pause)
+
+
+def purge_events(days=None, now=None):
+    """Delete fan-out events processed more than `days` ago; returns how many were deleted."""
+    days = settings.NOTIFICATION_EVENT_RETENTION_DAYS if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    deleted, _ = NotificationEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return deleted
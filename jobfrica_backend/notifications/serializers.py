@@ -1,9 +1,9 @@
 from rest_framework import serializers
 from .models import Notification
-from users.serializers import UserProfileSerializer
+from users.serializers import UserSummarySerializer
 
 class NotificationSerializer(serializers.ModelSerializer):
-    recipient = UserProfileSerializer(read_only=True)
+    recipient = UserSummarySerializer(read_only=True)
 
     class Meta:
         model = Notification
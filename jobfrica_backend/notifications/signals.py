@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from applications.models import Application
+from jobfrica_backend.caching import bump_user_version
+from jobs.models import Job
+from .fanout import application_received_event, job_created_event, publish
+from .models import Notification
+from .unread import adjust_unread, forget_unread
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    """Invalidates the recipient's notification validators."""
+    transaction.on_commit(lambda: bump_user_version([instance.recipient_id], 'notifications'))
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved_unread(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            adjust_unread({instance.recipient_id: 1})
+    else:
+        # The previous is_read value is unknown here
+        forget_unread([instance.recipient_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted_unread(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread({instance.recipient_id: -1})
+
+
+@receiver(post_save, sender=Job)
+def job_created(sender, instance, created, **kwargs):
+    if created:
+        publish([job_created_event(instance.pk)])
+
+
+@receiver(post_save, sender=Application)
+def application_received(sender, instance, created, **kwargs):
+    if created:
+        publish([application_received_event(instance.pk)])
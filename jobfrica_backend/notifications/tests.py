@@ -1,3 +1,390 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from applications.models import Application
+from jobfrica_backend.emails import EmailRenderer
+from jobs.models import Job, JobCategory
+from users.models import CustomUser, UserProfile
+from .fanout import application_status_changed_event, process_pending, publish
+from .models import ArchivedNotification, Notification, NotificationEvent, OutboxEmail
+from .outbox import send_pending
+from .retention import expire_notifications
 
 # Create your tests here.
+class NotificationListQueryTest(TestCase):
+    """Embedding the recipient must not cost queries per notification."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+
+    def add_notifications(self, count):
+        Notification.objects.bulk_create(
+            Notification(
+                recipient=self.user, notification_type='application_update',
+                title=f'Update {i}', message='Your application moved on.',
+            )
+            for i in range(count)
+        )
+
+    def count_queries(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_notification_list_query_count_is_constant(self):
+        self.add_notifications(1)
+        small, data = self.count_queries()
+
+        self.add_notifications(9)
+        large, data = self.count_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['results'][0]['recipient']['email'], 'seeker@example.com')
+        self.assertNotIn('recent_applications', data['results'][0]['recipient'])
+
+
+@override_settings(NOTIFICATION_FANOUT_BACKEND='immediate')
+class FanOutTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker')
+            for i in range(3)
+        ]
+        UserProfile.objects.create(user=self.seekers[0], location='Lagos')
+        UserProfile.objects.create(user=self.seekers[1], location='Nairobi')
+
+    def create_job(self, **kwargs):
+        fields = {
+            'title': 'Backend Developer', 'description': 'APIs', 'company': 'Acme',
+            'location': 'lagos', 'job_type': 'full_time', 'experience_level': 'mid',
+        }
+        fields.update(kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Job.objects.create(employer=self.employer, category=self.category, **fields)
+
+    def test_job_created_notifies_matching_seekers(self):
+        job = self.create_job()
+        # seeker 2 applied in the same category, seeker 0 lives where the job is
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=job, applicant=self.seekers[2])
+
+        self.create_job(title='Frontend Developer', location='Accra')
+        notified = Notification.objects.filter(notification_type='new_job_posting', related_job__title='Frontend Developer')
+        self.assertEqual(list(notified.values_list('recipient', flat=True)), [self.seekers[2].pk])
+
+        notified = Notification.objects.filter(notification_type='new_job_posting', related_job=job)
+        self.assertEqual(list(notified.values_list('recipient', flat=True)), [self.seekers[0].pk])
+        self.assertTrue(Notification.objects.filter(recipient=self.employer, related_application__job=job).exists())
+
+    def test_blank_locations_match_nobody(self):
+        UserProfile.objects.create(user=self.seekers[2], location='')
+        self.create_job(location=' ')
+        self.assertFalse(Notification.objects.filter(notification_type='new_job_posting').exists())
+
+    def test_bulk_status_change_notifies_once(self):
+        job = self.create_job(location='Accra')
+        applications = [Application.objects.create(job=job, applicant=seeker) for seeker in self.seekers]
+        self.client.force_authenticate(self.employer)
+        ids = [application.pk for application in applications]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/applications/bulk_update_status/', {'ids': ids, 'status': 'shortlisted'}, format='json',
+            )
+        self.assertEqual(response.data['updated'], 3)
+
+        notified = Notification.objects.filter(related_application__in=ids, message__endswith='is now shortlisted.')
+        self.assertEqual(sorted(notified.values_list('recipient', flat=True)), [seeker.pk for seeker in self.seekers])
+        self.assertFalse(NotificationEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(process_pending(), (0, 0))
+
+    def test_republished_status_change_is_queued_once(self):
+        changed_at = timezone.now()
+        publish([application_status_changed_event([2, 1], 'shortlisted', changed_at)])
+        publish([application_status_changed_event([1, 2, 2], 'shortlisted', changed_at)])
+        self.assertEqual(NotificationEvent.objects.filter(event='application_status_changed').count(), 1)
+
+    def test_moving_back_to_a_status_notifies_again(self):
+        job = self.create_job(location='Accra')
+        application = Application.objects.create(job=job, applicant=self.seekers[0])
+        self.client.force_authenticate(self.employer)
+        url = f'/api/applications/{application.pk}/update_status/'
+
+        for new_status in ('shortlisted', 'under_review', 'shortlisted'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.post(url, {'status': new_status}).status_code, 200)
+
+        messages = list(
+            Notification.objects.filter(related_application=application, title='Application status updated')
+            .order_by('id').values_list('message', flat=True)
+        )
+        self.assertEqual([message.rsplit(' ', 1)[1] for message in messages], ['shortlisted.', 'review.', 'shortlisted.'])
+        self.assertEqual(NotificationEvent.objects.filter(event='application_status_changed').count(), 3)
+
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        self.client.force_authenticate(self.user)
+
+    def notify(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                recipient=self.user, notification_type='application_update',
+                title='Update', message='Your application moved on.', **kwargs
+            )
+
+    def unread_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get('/api/notifications/unread_count/').data['unread_count']
+
+    def test_counter_follows_changes(self):
+        first = self.notify()
+        self.notify(is_read=True)
+        self.assertEqual(self.unread_count(), 1)
+
+        self.notify()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/notifications/{first.pk}/mark_as_read/')
+            self.client.post(f'/api/notifications/{first.pk}/mark_as_read/')
+        self.assertEqual(self.unread_count(), 1)
+
+        response = self.client.get('/api/notifications/unread/')
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(self.unread_count(), 0)
+
+
+class RetentionTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        old = timezone.now() - timedelta(days=60)
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='new_job_posting',
+                         title=f'Job {n}', message='A new job.', is_read=n != 0)
+            for n in range(5)
+        ] + [
+            Notification(recipient=self.user, notification_type='new_job_posting',
+                         title='Recent', message='A new job.', is_read=True),
+        ])
+        # created_at is auto_now_add, so age the first five afterwards
+        Notification.objects.exclude(title='Recent').update(created_at=old)
+
+    def test_archives_old_read_notifications_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            removed = expire_notifications('new_job_posting', 30, batch_size=2)
+        self.assertEqual(removed, 4)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('title', flat=True)), ['Job 0', 'Recent'],
+        )
+        archived = ArchivedNotification.objects.order_by('id')
+        self.assertEqual([row.title for row in archived], ['Job 1', 'Job 2', 'Job 3', 'Job 4'])
+        self.assertEqual({row.recipient_id for row in archived}, {self.user.pk})
+
+    def test_delete_without_archive(self):
+        self.assertEqual(expire_notifications('new_job_posting', 30, archive=False), 4)
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertEqual(expire_notifications('application_update', 30), 0)
+
+
+class TransactionRecordingBackend(locmem.EmailBackend):
+    """Records how deep in transactions each message is sent."""
+    depths = []
+
+    def send_messages(self, messages):
+        TransactionRecordingBackend.depths += [len(connection.atomic_blocks)] * len(messages)
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_OUTBOX_BACKEND='worker')
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/auth/register/', {
+                'email': 'seeker@example.com', 'username': 'seeker', 'first_name': 'Ada',
+                'password': 'Correct-horse-42', 'password_confirm': 'Correct-horse-42',
+            })
+
+    def test_registration_queues_welcome_email(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        # The 'worker' backend leaves sending to send_outbox_emails
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.template, email.to_email), ('welcome', 'seeker@example.com'))
+
+        self.assertEqual(send_pending(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Hi Ada', mail.outbox[0].body)
+        self.assertIn(email.context['verification_link'], mail.outbox[0].alternatives[0][0])
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(email.context, {})
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_failed_email_is_retried_later(self):
+        user = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        OutboxEmail.objects.create(recipient=user, to_email=user.email, subject='Hi', template='missing')
+        self.assertEqual(send_pending(), (0, 1))
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertIn('TemplateDoesNotExist', email.last_error)
+        # Not due yet
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_claims_commit_before_sending(self):
+        user = CustomUser.objects.create(email='seeker@example.com', first_name='Ada', role='job_seeker')
+        held, abandoned, due = [
+            OutboxEmail.objects.create(recipient=user, to_email=user.email, subject='Hi', template='welcome')
+            for _ in range(3)
+        ]
+        OutboxEmail.objects.filter(pk=held.pk).update(claimed_at=timezone.now(), attempts=1)
+        OutboxEmail.objects.filter(pk=abandoned.pk).update(claimed_at=timezone.now() - timedelta(hours=1), attempts=1)
+
+        depth = len(connection.atomic_blocks)
+        with override_settings(EMAIL_BACKEND='notifications.tests.TransactionRecordingBackend'):
+            self.assertEqual(send_pending(), (2, 0))
+        # Sent with no transaction of send_pending's own open
+        self.assertEqual(TransactionRecordingBackend.depths, [depth, depth])
+        rows = {email.pk: email for email in OutboxEmail.objects.all()}
+        self.assertIsNone(rows[held.pk].sent_at)
+        self.assertEqual((rows[abandoned.pk].attempts, rows[due.pk].attempts), (2, 1))
+        self.assertTrue(all(rows[pk].sent_at and rows[pk].claimed_at is None for pk in (abandoned.pk, due.pk)))
+
+    @override_settings(EMAIL_OUTBOX_BACKEND='immediate')
+    def test_immediate_backend_sends_on_commit(self):
+        self.register()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Welcome to Job Board Platform')
+
+
+class EmailRendererTest(TestCase):
+    def setUp(self):
+        self.renderer = EmailRenderer(workers=4)
+        self.user = CustomUser.objects.create(email='seeker@example.com', first_name='Ada', role='job_seeker')
+
+    def test_templates_are_compiled_once(self):
+        self.assertIs(self.renderer.templates('welcome'), self.renderer.templates('welcome'))
+
+    def test_render_many_keeps_order_and_reports_failures(self):
+        emails = [
+            ('verify_email', {'user': self.user, 'verification_link': f'https://example.com/{n}'})
+            for n in range(5)
+        ] + [('missing', {})]
+        results = self.renderer.render_many(emails, return_exceptions=True)
+        for n, (text, html) in enumerate(results[:5]):
+            self.assertIn(f'https://example.com/{n}', text)
+            self.assertIn(f'href="https://example.com/{n}"', html)
+        self.assertIsInstance(results[5], Exception)
+
+        metrics = self.renderer.metrics()
+        self.assertEqual(list(metrics), ['verify_email'])
+        self.assertEqual(metrics['verify_email']['count'], 5)
+
+
+@override_settings(NOTIFICATION_STREAM_BROKER='local', NOTIFICATION_STREAM_HEARTBEAT=1, NOTIFICATION_STREAM_MAX_AGE=3)
+class NotificationStreamTest(TransactionTestCase):
+    """The stream reads from worker threads, so its rows must really be committed."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+
+    def notify(self, title):
+        return Notification.objects.create(
+            recipient=self.user, notification_type='application_update', title=title, message='Moved on.',
+        )
+
+    async def read_events(self, response, until):
+        events = []
+        async for chunk in response.streaming_content:
+            events.append(chunk.decode())
+            if until(''.join(events)):
+                break
+        await response.streaming_content.aclose()
+        return ''.join(events)
+
+    async def test_resume_and_live_notifications(self):
+        first = await sync_to_async(self.notify)('First')
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+
+        response = await client.get('/api/notifications/stream/', headers={'Last-Event-ID': '0'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        async def publish_later():
+            await asyncio.sleep(0.2)
+            await sync_to_async(self.notify)('Second')
+
+        task = asyncio.create_task(publish_later())
+        body = await self.read_events(response, lambda text: '{"unread_count":2}' in text)
+        await task
+
+        self.assertIn(f'id: {first.pk}\nevent: notification\n', body)
+        self.assertIn('"title":"Second"', body)
+        self.assertIn('event: unread_count\ndata: {"unread_count":1}', body)
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rejects_malformed_credentials(self):
+        for query, headers in [
+            ('', {'Authorization': 'Bearer one two'}),
+            ('', {'Authorization': 'Bearer not-a-jwt'}),
+            ('?ticket=not-a-ticket', {}),
+        ]:
+            with self.subTest(query=query, headers=headers):
+                response = await AsyncClient().get(f'/api/notifications/stream/{query}', headers=headers)
+                self.assertEqual(response.status_code, 401)
+
+    async def test_stream_tickets_open_the_stream_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = await sync_to_async(client.post)('/api/notifications/stream_ticket/')
+        self.assertEqual(response.status_code, 201)
+        ticket = response.data['ticket']
+
+        response = await AsyncClient().get(f'/api/notifications/stream/?ticket={ticket}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await self.read_events(response, lambda text: 'unread_count' in text)
+
+        response = await AsyncClient().get(f'/api/notifications/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 401)
+        # Access tokens don't belong in URLs
+        token = str(AccessToken.for_user(self.user))
+        response = await AsyncClient().get(f'/api/notifications/stream/?access_token={token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refused_over_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/notifications/stream/').status_code, 501)
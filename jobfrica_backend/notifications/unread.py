@@ -0,0 +1,77 @@
+"""
+Per-user unread notification counters held in the cache.
+
+A counter is built from the database the first time it is read and then moved
+by adjust_unread() as notifications are created, read or deleted. Writes that
+can't tell how the count moved call forget_unread(), and the next read rebuilds
+it. Counters expire after UNREAD_COUNT_TIMEOUT, so any drift heals on its own.
+Every change also wakes the users' live streams (see notifications.live).
+Workers move the counters that web processes read, so they need the shared
+cache that settings require whenever DEBUG is off.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .live import notify_users
+from .models import Notification
+
+UNREAD_COUNT_TIMEOUT = 24 * 60 * 60
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _count(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def unread_count(user_id):
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = _count(user_id)
+        # add() so a counter built or moved since our count is not overwritten
+        if not cache.add(key, count, UNREAD_COUNT_TIMEOUT):
+            return cache.get(key, count)
+        # An adjustment committed between the count and the add found no counter
+        # to move; recount so it isn't lost, and drop the counter if one was
+        recount = _count(user_id)
+        if recount != count:
+            cache.delete(key)
+            count = recount
+    return count
+
+
+def _apply(deltas):
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            count = cache.incr(unread_key(user_id), delta)
+        except ValueError:
+            # Not cached; the next read builds it from the database
+            continue
+        if count < 0:
+            cache.delete(unread_key(user_id))
+
+
+def adjust_unread(deltas):
+    """Move the counters of {user_id: delta} once the current transaction commits."""
+    deltas = dict(deltas)
+
+    def apply():
+        _apply(deltas)
+        notify_users(deltas)
+
+    transaction.on_commit(apply)
+
+
+def forget_unread(user_ids):
+    user_ids = list(user_ids)
+
+    def forget():
+        cache.delete_many([unread_key(user_id) for user_id in user_ids])
+        notify_users(user_ids)
+
+    transaction.on_commit(forget)
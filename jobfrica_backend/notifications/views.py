@@ -1,43 +1,219 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from jobfrica_backend.caching import ConditionalGetMixin, bump_user_version
+from users.models import CustomUser
+from .live import get_broker, issue_stream_ticket, redeem_stream_ticket
 from .models import Notification
 from .serializers import NotificationSerializer
+from .unread import adjust_unread, forget_unread, unread_count
 
 # Create your views here.
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing notifications."""
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'unread')
+    conditional_timestamp_field = 'created_at'
+    conditional_user_scopes = ('notifications',)
     
     def get_queryset(self):
         """Filter notifications to only show those relevant to the user."""
         user = self.request.user
         if not user.is_authenticated:
             return Notification.objects.none()
-        return self.queryset.filter(recipient=user).order_by('-created_at')
+        return self.queryset.filter(recipient=user).select_related('recipient').order_by('-created_at')
     
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Endpoint to get unread notifications."""
+        return self.conditional_response(self._unread, request)
+
+    def _unread(self, request):
         user = request.user
-        unread_notifications = self.get_queryset().filter(read=False)
+        unread_notifications = self.get_queryset().filter(is_read=False)
+        page = self.paginate_queryset(unread_notifications)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(unread_notifications, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Number of unread notifications, served from the cached counter."""
+        return Response({'unread_count': unread_count(request.user.pk)}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """Endpoint to mark a notification as read."""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        # Only the request that actually flips the row moves the counter
+        if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+            adjust_unread({request.user.pk: -1})
+            bump_user_version([request.user.pk], 'notifications')
         return Response({'status': 'notification marked as read'}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        """Single-use ticket that opens the notification stream, as /stream/?ticket=."""
+        return Response({
+            'ticket': issue_stream_ticket(request.user.pk),
+            'expires_in': settings.NOTIFICATION_STREAM_TICKET_TTL,
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Mark all of the user's unread notifications as read."""
         self.get_queryset().filter(is_read=False).update(is_read=True)
+        # update() sends no signals
+        bump_user_version([request.user.pk], 'notifications')
+        forget_unread([request.user.pk])
         return Response({'status': 'all notifications marked as read'}, status=status.HTTP_200_OK)
-    
\ No newline at end of file
+    
+
+
+# Longest run of notifications read per wake-up; the stream reads again for the rest
+STREAM_BATCH_SIZE = 100
+
+
+def _stream_user(request):
+    """
+    The user of a stream request: from the session, the Authorization header, or a
+    stream ticket in ?ticket= for EventSource, which can't send headers.
+    """
+    ticket = request.GET.get('ticket')
+    if ticket is not None:
+        user_id = redeem_stream_ticket(ticket)
+        return CustomUser.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        # A malformed Authorization header fails here, before any token is validated
+        raw_token = authentication.get_raw_token(header) if header is not None else None
+        if raw_token:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return request.user if request.user.is_authenticated else None
+
+
+def _stream_read(read):
+    """
+    Runs `read` in a worker thread. The thread's connection is closed afterwards:
+    streams are idle almost all the time and must not each hold a connection.
+    """
+    def run(*args):
+        try:
+            return read(*args)
+        finally:
+            connection.close()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+@_stream_read
+def _latest_notification_id(user_id):
+    latest = Notification.objects.filter(recipient_id=user_id).order_by('-id').values_list('id', flat=True).first()
+    return latest or 0
+
+
+@_stream_read
+def _stream_changes(user_id, last_id):
+    """Notifications after `last_id`, oldest first, and the current unread count."""
+    notifications = (
+        Notification.objects.filter(recipient_id=user_id, id__gt=last_id)
+        .select_related('recipient')
+        .order_by('id')[:STREAM_BATCH_SIZE]
+    )
+    return NotificationSerializer(notifications, many=True).data, unread_count(user_id)
+
+
+def _sse(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _stream_events(user_id, last_id):
+    loop = asyncio.get_running_loop()
+    woken = asyncio.Event()
+
+    def wake():
+        loop.call_soon_threadsafe(woken.set)
+
+    broker = get_broker()
+    broker.subscribe(user_id, wake)
+    try:
+        yield f'retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n'
+        if last_id is None:
+            # A fresh connection only wants what happens from now on
+            last_id = await _latest_notification_id(user_id)
+        deadline = time.monotonic() + settings.NOTIFICATION_STREAM_MAX_AGE
+        changed = True
+        while True:
+            if changed:
+                # Cleared before reading, so a wake-up during the read is not lost
+                woken.clear()
+                notifications, count = await _stream_changes(user_id, last_id)
+                for notification in notifications:
+                    last_id = notification['id']
+                    yield _sse('notification', notification, event_id=last_id)
+                yield _sse('unread_count', {'unread_count': count})
+                if len(notifications) == STREAM_BATCH_SIZE:
+                    woken.set()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Clients reconnect with Last-Event-ID, which spreads long-lived connections over workers
+                return
+            try:
+                await asyncio.wait_for(woken.wait(), timeout=min(settings.NOTIFICATION_STREAM_HEARTBEAT, remaining))
+                changed = True
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                changed = False
+    finally:
+        broker.unsubscribe(user_id, wake)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications (`notification`
+    events, whose id is the notification id) and unread count (`unread_count`).
+    Reconnecting with Last-Event-ID resumes after the last notification received.
+    Served over ASGI only (see start.sh): under WSGI every open stream would hold
+    a worker for its whole life, so it is refused there unless DEBUG is on.
+    """
+    if not isinstance(request, ASGIRequest) and not settings.DEBUG:
+        return JsonResponse({'detail': 'The notification stream is only served over ASGI.'}, status=501)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return JsonResponse({'detail': 'Last-Event-ID must be a notification id.'}, status=400)
+
+    response = StreamingHttpResponse(_stream_events(user.pk, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+# exit on error
+set -o errexit # exit on error
+set -o pipefail # don't hide errors within pipes
+set -o nounset # exit on undefined variable
+
+# Served over ASGI so idle notification streams (/api/notifications/stream/) hold no worker
+exec uvicorn jobfrica_backend.asgi:application \
+    --host 0.0.0.0 \
+    --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-2}" \
+    --proxy-headers \
+    --forwarded-allow-ips '*'
@@ -0,0 +1,102 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from applications.models import Application
+from jobfrica_backend.caching import rebuild_cached, stale_while_revalidate
+from jobs.models import Job
+
+RECENT_JOBS_LIMIT = 5
+RECENT_APPLICATIONS_LIMIT = 5
+PUBLIC_RECENT_JOBS_LIMIT = 10
+PUBLIC_DASHBOARD_KEY = 'dashboard:public'
+
+
+def employer_summary(user):
+    """
+    Employer statistics in two queries, whatever the number of jobs or applications.
+
+    The totals are one conditional aggregate over the employer's jobs, reading the
+    denormalized application counters rather than joining applications; the most
+    recent jobs are fetched once and shared by the dashboard and the profile.
+    """
+    totals = Job.objects.filter(employer=user).aggregate(
+        total_jobs_posted=Count('id'),
+        active_jobs=Count('id', filter=Q(status='open')),
+        total_applications_received=Coalesce(Sum('application_count'), 0),
+        pending_applications=Coalesce(Sum('under_review_count'), 0),
+    )
+    totals['recent_jobs'] = list(
+        Job.objects.filter(employer=user).order_by('-created_at', '-id')[:RECENT_JOBS_LIMIT]
+    )
+    return totals
+
+
+def job_seeker_summary(user):
+    """Job seeker statistics in two queries: a grouped status count and the latest applications."""
+    status_summary = {
+        row['status']: row['count']
+        for row in Application.objects.filter(applicant=user)
+        .order_by()
+        .values('status')
+        .annotate(count=Count('id'))
+    }
+    recent_applications = list(
+        Application.objects.filter(applicant=user)
+        .select_related('job')
+        .order_by('-applied_at')[:RECENT_APPLICATIONS_LIMIT]
+    )
+    return {
+        'total_applications': sum(status_summary.values()),
+        'status_summary': status_summary,
+        'recent_applications': recent_applications,
+    }
+
+
+def build_public_dashboard():
+    """The anonymous landing payload, in two queries."""
+    start_of_today = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    statistics = Job.objects.aggregate(
+        total_jobs=Count('pk'),
+        total_companies=Count('employer', distinct=True, filter=Q(
+            status='open', employer__role='employer', employer__is_active=True,
+        )),
+        new_jobs_today=Count('pk', filter=Q(created_at__gte=start_of_today)),
+    )
+    jobs = Job.objects.filter(status='open').select_related('employer').order_by('-created_at')[:PUBLIC_RECENT_JOBS_LIMIT]
+    return {
+        'platform_statistics': statistics,
+        'recent_jobs': [{
+            'id': job.id,
+            'title': job.title,
+            'company_name': job.employer.company_name,
+            'location': job.location,
+            'posted_at': job.created_at,
+            'status': job.status,
+        } for job in jobs],
+    }
+
+
+def _public_dashboard_cache():
+    return {
+        'key': PUBLIC_DASHBOARD_KEY,
+        'build': build_public_dashboard,
+        'fresh_for': settings.PUBLIC_DASHBOARD_FRESH_FOR,
+        'stale_for': settings.PUBLIC_DASHBOARD_STALE_FOR,
+        'models': (Job,),
+    }
+
+
+def public_dashboard():
+    """
+    The shared landing payload. Any job change makes it stale; stale payloads keep
+    being served while a single worker rebuilds them.
+    """
+    return stale_while_revalidate(**_public_dashboard_cache())
+
+
+def refresh_public_dashboard():
+    return rebuild_cached(**_public_dashboard_cache())
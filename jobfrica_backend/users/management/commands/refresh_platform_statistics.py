@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.statistics import refresh_platform_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the platform statistics rollup read by the admin statistics endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every daily signup rollup instead of resuming from the watermark')
+
+    def handle(self, *args, **options):
+        statistics = refresh_platform_statistics(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Platform statistics refreshed at {statistics.computed_at:%Y-%m-%d %H:%M:%S} '
+            f'({statistics.total_users} users)'
+        ))
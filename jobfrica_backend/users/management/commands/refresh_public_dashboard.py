@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.dashboard import refresh_public_dashboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cached public dashboard payload, e.g. from a short cron interval'
+
+    def handle(self, *args, **options):
+        payload = refresh_public_dashboard()
+        statistics = payload['platform_statistics']
+        self.stdout.write(self.style.SUCCESS(
+            f"Public dashboard refreshed ({statistics['total_jobs']} jobs, "
+            f"{statistics['total_companies']} companies)"
+        ))
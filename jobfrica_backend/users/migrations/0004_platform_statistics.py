@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_remove_customuser_username_alter_customuser_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySignupRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('role', models.CharField(choices=[('job_seeker', 'Job Seeker'), ('employer', 'Employer'), ('admin', 'Admin')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'daily_signup_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='PlatformStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_employers', models.PositiveIntegerField(default=0)),
+                ('total_job_seekers', models.PositiveIntegerField(default=0)),
+                ('total_admins', models.PositiveIntegerField(default=0)),
+                ('active_employers', models.PositiveIntegerField(default=0)),
+                ('active_job_seekers', models.PositiveIntegerField(default=0)),
+                ('inactive_users', models.PositiveIntegerField(default=0)),
+                ('active_users_today', models.PositiveIntegerField(default=0)),
+                ('employers_with_jobs', models.PositiveIntegerField(default=0)),
+                ('job_seekers_with_applications', models.PositiveIntegerField(default=0)),
+                ('signups_watermark', models.DateField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'platform statistics',
+                'db_table': 'platform_statistics',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined'], name='users_date_jo_0c802f_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysignuprollup',
+            constraint=models.UniqueConstraint(fields=('date', 'role'), name='daily_signup_rollup_unique'),
+        ),
+    ]
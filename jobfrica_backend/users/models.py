@@ -84,6 +84,10 @@ class CustomUser(AbstractUser):
         indexes = [
             models.Index(fields=['email']),
             models.Index(fields=['role']),
+            models.Index(fields=['date_joined']),
+            # Recounted by every platform statistics refresh (see users.statistics)
+            models.Index(fields=['last_login']),
+            models.Index(fields=['role'], condition=models.Q(is_active=False), name='users_inactive_role_idx'),
         ]
 
 class UserProfile(models.Model):
@@ -93,4 +97,44 @@ class UserProfile(models.Model):
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
 
     def __str__(self):
-        return f"{self.user.username}'s profile"
\ No newline at end of file
+        return f"{self.user.username}'s profile"
+
+
+class PlatformStatistics(models.Model):
+    """Platform-wide user statistics, precomputed by the refresh_platform_statistics command."""
+    total_users = models.PositiveIntegerField(default=0)
+    total_employers = models.PositiveIntegerField(default=0)
+    total_job_seekers = models.PositiveIntegerField(default=0)
+    total_admins = models.PositiveIntegerField(default=0)
+    active_employers = models.PositiveIntegerField(default=0)
+    active_job_seekers = models.PositiveIntegerField(default=0)
+    inactive_users = models.PositiveIntegerField(default=0)
+    active_users_today = models.PositiveIntegerField(default=0)
+    employers_with_jobs = models.PositiveIntegerField(default=0)
+    job_seekers_with_applications = models.PositiveIntegerField(default=0)
+    # Days before this one have final signup rollups; it and later days are recomputed
+    signups_watermark = models.DateField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'platform_statistics'
+        verbose_name_plural = 'platform statistics'
+
+    def __str__(self):
+        return f"Platform statistics at {self.computed_at}"
+
+
+class DailySignupRollup(models.Model):
+    """Number of users of a role who joined on a given day."""
+    date = models.DateField()
+    role = models.CharField(max_length=20, choices=CustomUser.ROLES_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'daily_signup_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'role'], name='daily_signup_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.role}: {self.count}"
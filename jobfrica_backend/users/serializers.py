@@ -2,9 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.db import transaction
-from django.db.models import Count
 from .models import CustomUser, UserProfile
-from applications.models import Application
+from .dashboard import employer_summary, job_seeker_summary
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
@@ -196,6 +195,25 @@ class DashboardResponseSerializer(serializers.Serializer):
     public_data = PublicuserDashboardSerializer(required=False)
 
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user representation for embedding in other payloads; needs no queries"""
+    full_name = serializers.SerializerMethodField()
+    avatar_url = serializers.CharField(read_only=True)
+    avatar_initials = serializers.CharField(source='get_avatar_initials', read_only=True)
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            'id', 'email', 'first_name', 'last_name', 'full_name',
+            'role', 'company_name', 'avatar_url', 'avatar_initials'
+        ]
+        read_only_fields = fields
+
+    def get_full_name(self, obj: CustomUser) -> str:
+        """Get user's full name"""
+        return f"{obj.first_name} {obj.last_name}".strip() or obj.username
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Detailed user profile serializer"""
     full_name = serializers.SerializerMethodField()
@@ -204,24 +222,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
     resume = serializers.FileField(source='profile.resume', allow_null=True, required=False)
     avatar_url = serializers.CharField(read_only=True)
     avatar_initials = serializers.CharField(source='get_avatar_initials', read_only=True)
-    """Detailed employer profile with statistics"""
-    total_posted_jobs = serializers.SerializerMethodField()
-    total_applications_received = serializers.SerializerMethodField()
-    recent_jobs = serializers.SerializerMethodField()
-    """Detailed job seeker profile with application history"""
-    application_status_summary = serializers.SerializerMethodField()
-    recent_applications = serializers.SerializerMethodField()
-    total_applications = serializers.SerializerMethodField()
 
     class Meta:
         model = CustomUser
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
-            'role', 'phone_number', 'company_name', 'full_name', 
-            'total_applications', 'total_posted_jobs', 'date_joined', 
-            'recent_jobs', 'total_applications_received', 
-            'application_status_summary', 'recent_applications', 
-            'bio', 'location', 'resume', 'avatar_url', 'avatar_initials'
+            'role', 'phone_number', 'company_name', 'full_name',
+            'date_joined', 'bio', 'location', 'resume',
+            'avatar_url', 'avatar_initials'
         ]
         read_only_fields = [
             'id', 'email', 'role', 'date_joined'
@@ -231,12 +239,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
         """Get user's full name"""
         return f"{obj.first_name} {obj.last_name}".strip() or obj.username
     
-    def get_avatar_url(self, obj):
-        return obj.avatar_url
-    
-    def get_avatar_initials(self, obj):
-        return obj.get_avatar_initials()
-    
     def update(self, instance, validated_data):
         """Handle profile update including nested profile fields"""
         profile_data = validated_data.pop('profile', {})
@@ -264,59 +266,93 @@ class UserProfileSerializer(serializers.ModelSerializer):
             instance.save()
         return instance
 
-    """Getters for job seekers"""    
-    def get_total_applications(self, obj: CustomUser) -> int:
-        """Get total applications for job seekers"""
-        if obj.role == 'job_seeker':
-            return obj.applications.count()
-        return None
-    def get_application_status_summary(self, obj: CustomUser) -> dict:
-        """Get application status summary for job seekers"""
-        if obj.role == 'job_seeker':
-            summary = obj.applications.values('status').annotate(count=Count('id'))
-            return {item['status']: item['count'] for item in summary}
-        return None
-    def get_recent_applications(self, obj: CustomUser) -> list:
-        """Get recent applications for job seekers"""
-        if obj.role == 'job_seeker':
-            recent = obj.applications.select_related('job').order_by('-applied_at')[:5]
-            return [
-                {
-                    'id': app.id,
-                    'job_title': app.job.title,
-                    'company': app.job.company,
-                    'status': app.status,
-                    'applied_at': app.applied_at
-                }
-                for app in recent
-            ]
-        return None
-
-    """Getters for employers and admins"""
+
+class EmployerProfileSerializer(UserProfileSerializer):
+    """Detailed employer profile with statistics"""
+    total_posted_jobs = serializers.SerializerMethodField()
+    total_applications_received = serializers.SerializerMethodField()
+    recent_jobs = serializers.SerializerMethodField()
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + [
+            'total_posted_jobs', 'total_applications_received', 'recent_jobs'
+        ]
+
+    def get_employer_summary(self, obj: CustomUser) -> dict:
+        """Employer statistics, computed once per user and shared through the context"""
+        summaries = self.context.setdefault('employer_summaries', {})
+        if obj.pk not in summaries:
+            summaries[obj.pk] = employer_summary(obj)
+        return summaries[obj.pk]
+
     def get_total_posted_jobs(self, obj: CustomUser) -> int:
         """Get total posted jobs for employers"""
-        if obj.role in ['employer', 'admin']:
-            return obj.jobs.count()
-        return None
+        return self.get_employer_summary(obj)['total_jobs_posted']
+
     def get_total_applications_received(self, obj: CustomUser) -> int:
         """Get total applications received for employers"""
-        if obj.role in ['employer', 'admin']:
-            return Application.objects.filter(job__employer=obj).count()
-        return None
+        return self.get_employer_summary(obj)['total_applications_received']
+
     def get_recent_jobs(self, obj: CustomUser) -> list:
         """Get recent jobs posted by employers"""
-        if obj.role in ['employer', 'admin']:
-            recent = obj.jobs.order_by('-created_at')[:5]
-            return [
-                {
-                    'id': job.id,
-                    'title': job.title,
-                    'company': job.company,
-                    'applications_count': job.applications.count()
-                }
-                for job in recent
-            ]
-        return None
+        return [
+            {
+                'id': job.id,
+                'title': job.title,
+                'company': job.company,
+                'applications_count': job.application_count
+            }
+            for job in self.get_employer_summary(obj)['recent_jobs']
+        ]
+
+
+class JobSeekerProfileSerializer(UserProfileSerializer):
+    """Detailed job seeker profile with application history"""
+    total_applications = serializers.SerializerMethodField()
+    application_status_summary = serializers.SerializerMethodField()
+    recent_applications = serializers.SerializerMethodField()
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + [
+            'total_applications', 'application_status_summary', 'recent_applications'
+        ]
+
+    def get_job_seeker_summary(self, obj: CustomUser) -> dict:
+        """Job seeker statistics, computed once per user and shared through the context"""
+        summaries = self.context.setdefault('job_seeker_summaries', {})
+        if obj.pk not in summaries:
+            summaries[obj.pk] = job_seeker_summary(obj)
+        return summaries[obj.pk]
+
+    def get_total_applications(self, obj: CustomUser) -> int:
+        """Get total applications for job seekers"""
+        return self.get_job_seeker_summary(obj)['total_applications']
+
+    def get_application_status_summary(self, obj: CustomUser) -> dict:
+        """Get application status summary for job seekers"""
+        return self.get_job_seeker_summary(obj)['status_summary']
+
+    def get_recent_applications(self, obj: CustomUser) -> list:
+        """Get recent applications for job seekers"""
+        return [
+            {
+                'id': app.id,
+                'job_title': app.job.title,
+                'company': app.job.company,
+                'status': app.status,
+                'applied_at': app.applied_at
+            }
+            for app in self.get_job_seeker_summary(obj)['recent_applications']
+        ]
+
+
+def profile_serializer_class(user):
+    """The detail serializer carrying the statistics relevant to the user's role"""
+    if user.role in ['employer', 'admin']:
+        return EmployerProfileSerializer
+    if user.role == 'job_seeker':
+        return JobSeekerProfileSerializer
+    return UserProfileSerializer
     
 
 class PasswordChangeSerializer(serializers.Serializer):
@@ -415,6 +451,10 @@ class UserStatisticsSerializer(serializers.Serializer):
     active_users_today = serializers.IntegerField()
     new_users_this_week = serializers.IntegerField()
     new_users_this_month = serializers.IntegerField()
+    inactive_users = serializers.IntegerField()
+    statistics_by_role = serializers.DictField()
+    growth_metrics = serializers.ListField(child=serializers.DictField(), required=False)
+    computed_at = serializers.DateTimeField()
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom JWT token serializer with additional user data"""
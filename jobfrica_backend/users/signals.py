@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobfrica_backend.caching import bump_user_version
+from .models import CustomUser, UserProfile
+
+
+@receiver(post_save, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_user_version([instance.pk], 'profile'))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_user_version([instance.user_id], 'profile'))
@@ -0,0 +1,166 @@
+from collections import Counter
+from datetime import datetime, time
+
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from applications.models import Application
+from jobfrica_backend.timeseries import bucket_start, bucket_starts
+from jobs.models import Job
+from .models import CustomUser, DailySignupRollup, PlatformStatistics
+
+STATISTICS_PK = 1
+# pg_advisory_xact_lock() key serializing refreshes, including the first one,
+# when there is no row yet for select_for_update() to lock
+STATISTICS_LOCK_ID = 0x75736572_73746174
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def platform_totals(today):
+    """Every per-role total in one pass over the users table."""
+    has_jobs = Exists(Job.objects.filter(employer=OuterRef('pk')))
+    has_applications = Exists(Application.objects.filter(applicant=OuterRef('pk')))
+    return CustomUser.objects.aggregate(
+        total_users=Count('pk'),
+        total_employers=Count('pk', filter=Q(role='employer')),
+        total_job_seekers=Count('pk', filter=Q(role='job_seeker')),
+        total_admins=Count('pk', filter=Q(role='admin')),
+        active_employers=Count('pk', filter=Q(role='employer', is_active=True)),
+        active_job_seekers=Count('pk', filter=Q(role='job_seeker', is_active=True)),
+        inactive_users=Count('pk', filter=Q(is_active=False)),
+        active_users_today=Count('pk', filter=Q(last_login__gte=_start_of(today))),
+        employers_with_jobs=Count('pk', filter=Q(has_jobs, role='employer')),
+        job_seekers_with_applications=Count('pk', filter=Q(has_applications, role='job_seeker')),
+    )
+
+
+def _first_since(queryset, owner, timestamp, moment):
+    """Distinct `owner`s with a row in `queryset` from `moment` on and none before it."""
+    earlier = queryset.model.objects.filter(**{owner: OuterRef(owner), f'{timestamp}__lt': moment})
+    return (
+        queryset.filter(~Exists(earlier), **{f'{timestamp}__gte': moment})
+        .order_by()
+        .values(owner)
+        .distinct()
+        .count()
+    )
+
+
+def incremental_totals(current, today, signups):
+    """
+    `current`'s totals moved on by the per-role `signups` since its refresh.
+
+    Inactive users and today's logins are recounted through their own indexes, and
+    employers and job seekers who posted or applied for the first time since
+    `current` are added to theirs, so no query scans the whole users table.
+    Deleted users and role changes need a full refresh.
+    """
+    inactive = Counter(dict(
+        CustomUser.objects.filter(is_active=False).order_by()
+        .values('role').annotate(total=Count('pk')).values_list('role', 'total')
+    ))
+    totals = {
+        'total_users': current.total_users + sum(signups.values()),
+        'total_employers': current.total_employers + signups['employer'],
+        'total_job_seekers': current.total_job_seekers + signups['job_seeker'],
+        'total_admins': current.total_admins + signups['admin'],
+        'inactive_users': sum(inactive.values()),
+        'active_users_today': CustomUser.objects.filter(last_login__gte=_start_of(today)).count(),
+        'employers_with_jobs': current.employers_with_jobs + _first_since(
+            Job.objects.filter(employer__role='employer'), 'employer', 'created_at', current.computed_at,
+        ),
+        'job_seekers_with_applications': current.job_seekers_with_applications + _first_since(
+            Application.objects.filter(applicant__role='job_seeker'), 'applicant', 'applied_at', current.computed_at,
+        ),
+    }
+    totals['active_employers'] = totals['total_employers'] - inactive['employer']
+    totals['active_job_seekers'] = totals['total_job_seekers'] - inactive['job_seeker']
+    return totals
+
+
+def refresh_platform_statistics(full=False, if_missing=False):
+    """
+    Recompute the platform statistics snapshot and the daily signup rollups.
+
+    Signups are rolled up incrementally: only days from the last watermark on are
+    recounted, using the date_joined index, and the totals move by the difference
+    (see incremental_totals()). Pass `full=True` to rebuild every day and total,
+    e.g. after users were deleted or changed role. With `if_missing`, an existing
+    snapshot, possibly computed while waiting for the lock, is returned as is.
+    Concurrent refreshes run one after the other.
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [STATISTICS_LOCK_ID])
+        current = PlatformStatistics.objects.filter(pk=STATISTICS_PK).first()
+        if current is not None and if_missing:
+            return current
+        since = None if full or current is None else current.signups_watermark
+
+        users = CustomUser.objects.all()
+        rollups = DailySignupRollup.objects.all()
+        if since is not None:
+            users = users.filter(date_joined__gte=_start_of(since))
+            rollups = rollups.filter(date__gte=since)
+        signups = list(
+            users.annotate(day=TruncDate('date_joined'))
+            .order_by()
+            .values('day', 'role')
+            .annotate(total=Count('pk'))
+        )
+        # Signups per role since the watermark, less those the snapshot already counted
+        new_signups = Counter()
+        for row in signups:
+            new_signups[row['role']] += row['total']
+        if since is not None:
+            for role, count in rollups.values_list('role', 'count'):
+                new_signups[role] -= count
+
+        rollups.delete()
+        DailySignupRollup.objects.bulk_create(
+            DailySignupRollup(date=row['day'], role=row['role'], count=row['total'])
+            for row in signups
+        )
+
+        totals = platform_totals(today) if since is None else incremental_totals(current, today, new_signups)
+        statistics, _ = PlatformStatistics.objects.update_or_create(
+            pk=STATISTICS_PK,
+            defaults={
+                **totals,
+                'signups_watermark': today,
+                'computed_at': timezone.now(),
+            },
+        )
+    return statistics
+
+
+def get_platform_statistics():
+    """The current snapshot, computing the first one on demand."""
+    return (
+        PlatformStatistics.objects.filter(pk=STATISTICS_PK).first()
+        or refresh_platform_statistics(if_missing=True)
+    )
+
+
+def signups_since(day):
+    return DailySignupRollup.objects.filter(date__gte=day).aggregate(total=Sum('count'))['total'] or 0
+
+
+def signup_histogram(period='day', buckets=30):
+    """Zero-filled signups per bucket read from the daily rollups, oldest first."""
+    starts = bucket_starts(period, buckets)
+    counts = Counter()
+    rows = (
+        DailySignupRollup.objects.filter(date__gte=starts[0])
+        .values('date')
+        .annotate(total=Sum('count'))
+    )
+    for row in rows:
+        counts[bucket_start(row['date'], period)] += row['total']
+    return [{'date': start.isoformat(), 'new_users': counts[start]} for start in starts]
@@ -1,3 +1,289 @@
-from django.test import TestCase
+import io
+import threading
+import time
+from datetime import date, datetime, time as datetime_time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from jobfrica_backend.caching import bump_model_version, stale_while_revalidate
+from jobfrica_backend.timeseries import date_histogram
+from jobs.models import Job, JobCategory
+from .dashboard import PUBLIC_DASHBOARD_KEY, public_dashboard
+from .models import CustomUser, DailySignupRollup, PlatformStatistics
+from .statistics import get_platform_statistics, refresh_platform_statistics
 
 # Create your tests here.
+class EmployerDashboardQueryTest(TestCase):
+    """The employer dashboard must cost a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        self.seekers = [
+            CustomUser.objects.create(email=f'seeker{i}@example.com', role='job_seeker')
+            for i in range(3)
+        ]
+        self.category = JobCategory.objects.create(name='Engineering')
+
+    def add_jobs(self, count):
+        for i in range(count):
+            job = Job.objects.create(
+                employer=self.employer, category=self.category, title=f'Job {i}',
+                description='Build APIs.', company='Acme', location='Lagos',
+                job_type='full_time', experience_level='mid',
+            )
+            for seeker in self.seekers:
+                Application.objects.create(job=job, applicant=seeker, status='under_review')
+
+    def get_dashboard(self):
+        # A fresh user instance, so nothing is served from a previous request's caches
+        self.client.force_authenticate(CustomUser.objects.get(pk=self.employer.pk))
+        # profile, employer totals, recent jobs, recent applications
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/auth/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_dashboard_query_count_is_pinned(self):
+        self.add_jobs(1)
+        self.get_dashboard()
+
+        self.add_jobs(8)
+        data = self.get_dashboard()
+        statistics = data['statistics']
+        self.assertEqual(statistics['total_jobs_posted'], 9)
+        self.assertEqual(statistics['active_jobs'], 9)
+        self.assertEqual(statistics['total_applications_received'], 27)
+        self.assertEqual(statistics['pending_applications'], 27)
+        self.assertEqual(len(statistics['job_performance']), 5)
+        self.assertEqual(data['user']['total_posted_jobs'], 9)
+        self.assertEqual(data['user']['total_applications_received'], 27)
+        self.assertEqual([job['id'] for job in data['user']['recent_jobs']],
+                         [job['job_id'] for job in statistics['job_performance']])
+
+
+class DateHistogramTest(TestCase):
+    def joined_at(self, *moments):
+        for n, moment in enumerate(moments):
+            user = CustomUser.objects.create(email=f'user{n}@example.com', role='job_seeker')
+            CustomUser.objects.filter(pk=user.pk).update(date_joined=moment)
+
+    def test_gaps_are_zero_filled(self):
+        now = timezone.now()
+        self.joined_at(now, now, now - timedelta(days=2), now - timedelta(days=30))
+        today = timezone.localdate()
+        histogram = date_histogram(CustomUser.objects.all(), 'date_joined', buckets=5, count_key='new_users')
+        self.assertEqual(histogram, [
+            {'date': (today - timedelta(days=n)).isoformat(), 'new_users': count}
+            for n, count in zip(range(4, -1, -1), [0, 0, 1, 0, 2])
+        ])
+
+    def test_weeks_and_months_start_on_their_first_day(self):
+        self.joined_at(timezone.now())
+        for period, first_day in (('week', lambda day: day.weekday() == 0), ('month', lambda day: day.day == 1)):
+            with self.subTest(period=period):
+                histogram = date_histogram(CustomUser.objects.all(), 'date_joined', period, buckets=6)
+                self.assertEqual(len(histogram), 6)
+                self.assertTrue(all(first_day(date.fromisoformat(bucket['date'])) for bucket in histogram))
+                self.assertEqual([bucket['count'] for bucket in histogram], [0] * 5 + [1])
+
+    def test_days_end_at_midnight_in_the_requested_time_zone(self):
+        tokyo, honolulu = ZoneInfo('Asia/Tokyo'), ZoneInfo('Pacific/Honolulu')
+        today = timezone.localdate(timezone=tokyo)
+        midnight = timezone.make_aware(datetime.combine(today, datetime_time.min), tokyo)
+        self.joined_at(midnight - timedelta(minutes=30), midnight + timedelta(minutes=30))
+
+        histogram = date_histogram(CustomUser.objects.all(), 'date_joined', buckets=2, tzinfo=tokyo)
+        self.assertEqual([bucket['count'] for bucket in histogram], [1, 1])
+
+        # Both moments fall on the same Honolulu day, 19 hours behind Tokyo
+        histogram = date_histogram(CustomUser.objects.all(), 'date_joined', buckets=3, tzinfo=honolulu)
+        counts = {bucket['date']: bucket['count'] for bucket in histogram}
+        self.assertEqual(counts[(today - timedelta(days=1)).isoformat()], 2)
+        self.assertEqual(sum(counts.values()), 2)
+
+    def test_one_query_whatever_the_window(self):
+        now = timezone.now()
+        self.joined_at(*(now - timedelta(days=n * 7) for n in range(10)))
+        with self.assertNumQueries(1):
+            histogram = date_histogram(CustomUser.objects.all(), 'date_joined', buckets=366)
+        self.assertEqual(len(histogram), 366)
+        self.assertEqual(sum(bucket['count'] for bucket in histogram), 10)
+
+    def test_unknown_period(self):
+        with self.assertRaises(ValueError):
+            date_histogram(CustomUser.objects.all(), 'date_joined', 'year')
+
+
+class PlatformStatisticsTest(TestCase):
+    def join(self, email, days_ago, role='job_seeker'):
+        user = CustomUser.objects.create(email=email, role=role)
+        CustomUser.objects.filter(pk=user.pk).update(date_joined=timezone.now() - timedelta(days=days_ago))
+        return user
+
+    def rollups(self):
+        return {
+            (rollup.date, rollup.role): rollup.count
+            for rollup in DailySignupRollup.objects.all()
+        }
+
+    def test_first_refresh_then_incremental_watermark(self):
+        today = timezone.localdate()
+        self.join('old@example.com', 10)
+        self.join('boss@example.com', 10, role='employer')
+        self.join('recent@example.com', 0)
+
+        statistics = get_platform_statistics()
+        self.assertEqual((statistics.total_users, statistics.total_employers), (3, 1))
+        self.assertEqual(statistics.signups_watermark, today)
+        self.assertEqual(self.rollups()[(today - timedelta(days=10), 'employer')], 1)
+        # Served from the snapshot from now on
+        self.assertEqual(get_platform_statistics().computed_at, statistics.computed_at)
+
+        # Days before the watermark are final, so a refresh leaves them alone...
+        DailySignupRollup.objects.filter(date=today - timedelta(days=10), role='job_seeker').update(count=42)
+        self.join('another@example.com', 0)
+        statistics = refresh_platform_statistics()
+        self.assertEqual(statistics.total_users, 4)
+        self.assertEqual(self.rollups()[(today, 'job_seeker')], 2)
+        self.assertEqual(self.rollups()[(today - timedelta(days=10), 'job_seeker')], 42)
+
+        # ...until a full rebuild
+        refresh_platform_statistics(full=True)
+        self.assertEqual(self.rollups()[(today - timedelta(days=10), 'job_seeker')], 1)
+
+
+    def test_incremental_totals_match_a_full_recount(self):
+        seeker = self.join('old@example.com', 10)
+        employer = self.join('boss@example.com', 10, role='employer')
+        category = JobCategory.objects.create(name='Engineering')
+        refresh_platform_statistics()
+
+        self.join('new@example.com', 0)
+        leaver = self.join('leaver@example.com', 0, role='employer')
+        CustomUser.objects.filter(pk=leaver.pk).update(is_active=False)
+        CustomUser.objects.filter(pk=seeker.pk).update(last_login=timezone.now())
+        job = Job.objects.create(
+            employer=employer, category=category, title='Backend Developer', description='APIs.',
+            company='Acme', location='Lagos', job_type='full_time', experience_level='mid',
+        )
+        Application.objects.create(job=job, applicant=seeker)
+
+        with CaptureQueriesContext(connection) as queries:
+            incremental = refresh_platform_statistics()
+        # Every query on the users table goes through an index condition
+        self.assertFalse([
+            query['sql'] for query in queries
+            if 'FROM "users"' in query['sql'] and 'WHERE' not in query['sql']
+        ])
+        fields = [field.name for field in PlatformStatistics._meta.fields if field.name not in ('id', 'computed_at')]
+        incremental = {field: getattr(incremental, field) for field in fields}
+        full = refresh_platform_statistics(full=True)
+        self.assertEqual(incremental, {field: getattr(full, field) for field in fields})
+        self.assertEqual(
+            (full.total_users, full.inactive_users, full.active_users_today, full.employers_with_jobs,
+             full.job_seekers_with_applications),
+            (4, 1, 1, 1, 1),
+        )
+
+
+class ConcurrentFirstRefreshTest(TransactionTestCase):
+    def test_concurrent_first_requests(self):
+        CustomUser.objects.create(email='seeker@example.com', role='job_seeker')
+        barrier = threading.Barrier(4)
+        results, errors = [], []
+
+        def request():
+            try:
+                barrier.wait()
+                results.append(get_platform_statistics().pk)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(PlatformStatistics.objects.count(), 1)
+        self.assertEqual(DailySignupRollup.objects.get().count, 1)
+
+
+class StaleWhileRevalidateTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def build(self):
+        self.calls += 1
+        return self.calls
+
+    def cached(self, **kwargs):
+        return stale_while_revalidate('test:swr', self.build, fresh_for=60, stale_for=60, models=(Job,), **kwargs)
+
+    def wait_for(self, value):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if cache.get('test:swr')['value'] == value and cache.get('test:swr:rebuilding') is None:
+                return
+            time.sleep(0.01)
+        self.fail(f'entry never became {value}')
+
+    def test_missing_fresh_and_stale(self):
+        # Missing: built in the request
+        self.assertEqual(self.cached(), 1)
+        # Fresh: served as is
+        self.assertEqual(self.cached(), 1)
+        self.assertEqual(self.calls, 1)
+
+        # Stale: still served while the rebuild thread refreshes it
+        bump_model_version(Job)
+        self.assertEqual(self.cached(), 1)
+        self.wait_for(2)
+        self.assertEqual(self.cached(), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_missing_while_another_worker_builds(self):
+        cache.add('test:swr:rebuilding', 1)
+        # Nobody stores the entry in time, so the caller builds it itself
+        self.assertEqual(self.cached(wait=0.1), 1)
+
+    def test_failed_rebuild_releases_the_lock(self):
+        self.assertEqual(self.cached(), 1)
+
+        def broken():
+            raise RuntimeError('database down')
+
+        bump_model_version(Job)
+        with self.assertLogs('jobfrica_backend.caching', 'ERROR'):
+            stale_while_revalidate('test:swr', broken, fresh_for=60, stale_for=60, models=(Job,))
+            deadline = time.monotonic() + 5
+            while cache.get('test:swr:rebuilding') is not None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertIsNone(cache.get('test:swr:rebuilding'))
+        self.assertEqual(self.cached(), 1)
+        self.wait_for(2)
+
+    def test_public_dashboard(self):
+        employer = CustomUser.objects.create(email='employer@example.com', role='employer')
+        Job.objects.create(
+            employer=employer, category=JobCategory.objects.create(name='Engineering'), title='Backend Developer',
+            description='APIs.', company='Acme', location='Lagos', job_type='full_time', experience_level='mid',
+        )
+        self.assertEqual(public_dashboard()['platform_statistics']['total_jobs'], 1)
+        cache.delete(PUBLIC_DASHBOARD_KEY)
+        call_command('refresh_public_dashboard', stdout=io.StringIO())
+        self.assertEqual(cache.get(PUBLIC_DASHBOARD_KEY)['value']['recent_jobs'][0]['title'], 'Backend Developer')
@@ -8,7 +8,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, update_session_auth_hash
 from django.db.models import Q, Count, Avg
-from django.db import models
+from django.db import models, ProgrammingError, transaction
 from django.utils import timezone
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.exceptions import TokenError
@@ -16,8 +16,6 @@ from django.contrib.auth import authenticate, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.db.models import Q, Count, F
 from datetime import timedelta
@@ -29,7 +27,12 @@ from jobs.models import Job
 from applications.models import Application
 import logging
 from .permissions import IsAdmin
-from .serializers import ( UserStatisticsSerializer, UserProfileSerializer, 
+from .dashboard import employer_summary, job_seeker_summary, public_dashboard
+from .statistics import get_platform_statistics, signup_histogram, signups_since
+from jobfrica_backend.timeseries import date_histogram, histogram_params
+from jobfrica_backend.caching import ConditionalGetMixin
+from notifications.outbox import queue_email
+from .serializers import ( UserStatisticsSerializer, UserProfileSerializer, profile_serializer_class,
                           UserRegistrationSerializer, CustomTokenObtainPairSerializer,
                           PasswordChangeSerializer, UserLoginSerializer, UserLogoutSerializer,
                           ResendVerificationEmailSerializer, EmailVerificationSerializer, 
@@ -60,14 +63,10 @@ class UserRegistrationView(generics.CreateAPIView):
         # Validate
         serializer.is_valid(raise_exception=True)
         
-        # Save user
-        user = serializer.save()
-        
-        # Send welcome email (don't let email failure break registration)
-        try:
+        # Save user and queue the welcome email together, so neither exists without the other
+        with transaction.atomic():
+            user = serializer.save()
             self.send_welcome_email(user)
-        except Exception as e:
-            logger.error(f"Failed to send welcome email to {user.email}: {str(e)}")
         
         # Generate tokens for auto-login
         refresh = RefreshToken.for_user(user)
@@ -103,30 +102,12 @@ class UserRegistrationView(generics.CreateAPIView):
         return cleaned
     
     def send_welcome_email(self, user):
-        """Send welcome email to newly registered user"""
-        subject = 'Welcome to Job Board Platform'
-        
-        # Create email context
-        context = {
-            'user': user,
+        """Queue the welcome email for a newly registered user (see notifications.outbox)"""
+        queue_email(user, 'Welcome to Job Board Platform', 'welcome', {
             'verification_link': self.get_verification_link(user),
             'login_url': f"{settings.FRONTEND_URL}/login",
             'support_email': settings.DEFAULT_FROM_EMAIL,
-        }
-        
-        # Render email templates
-        html_message = render_to_string('emails/welcome.html', context)
-        plain_message = render_to_string('emails/welcome.txt', context)
-        
-        # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        })
     
     def get_verification_link(self, user):
         """Generate email verification link"""
@@ -158,7 +139,7 @@ class UserLoginView(generics.CreateAPIView):
         
         refresh = RefreshToken.for_user(user)
         
-        # Get user's role-specific data
+        # Statistics are left to the profile and dashboard endpoints
         user_data = UserProfileSerializer(user).data
         
         return Response({
@@ -214,10 +195,14 @@ class UserLogoutView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
-class CurrentUserProfileView(generics.RetrieveUpdateAPIView):
+class CurrentUserProfileView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """Get and update current user profile"""
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
+    conditional_user_scopes = ('profile', 'jobs', 'applications')
+    
+    def get_serializer_class(self):
+        return profile_serializer_class(self.request.user)
     
     def get_object(self):
         return self.request.user
@@ -262,30 +247,16 @@ class PasswordResetRequestView(generics.GenericAPIView):
             token = default_token_generator.make_token(user)
             uid = urlsafe_base64_encode(force_bytes(user.pk))
             
-            # Send password reset email
+            # Queue password reset email
             reset_link = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}"
-            
-            subject = 'Password Reset Request'
-            message = render_to_string('emails/password_reset.html', {
-                'user': user,
+            queue_email(user, 'Password Reset Request', 'password_reset', {
                 'reset_link': reset_link,
-                'expiry_hours': 24,
+                'expiry_hours': settings.PASSWORD_RESET_TIMEOUT // 3600,
             })
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                html_message=message,
-                fail_silently=False,
-            )
-            
         except CustomUser.DoesNotExist:
             # Don't reveal that user doesn't exist
             pass
-        except Exception as e:
-            logger.error(f"Failed to send password reset email: {str(e)}")
         
         return Response({
             'message': 'If an account exists with this email, you will receive a password reset link.'
@@ -318,26 +289,11 @@ class PasswordResetConfirmView(generics.GenericAPIView):
                 'error': 'Invalid or expired reset link'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set new password
-        user.set_password(serializer.validated_data['new_password'])
-        user.save()
-        
-        # Send confirmation email
-        try:
-            subject = 'Password Reset Successful'
-            message = render_to_string('emails/password_reset_success.html', {
-                'user': user,
-            })
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                html_message=message,
-                fail_silently=False,
-            )
-        except Exception as e:
-            logger.error(f"Failed to send password reset confirmation email: {str(e)}")
+        # Set new password and queue the confirmation email with it
+        with transaction.atomic():
+            user.set_password(serializer.validated_data['new_password'])
+            user.save()
+            queue_email(user, 'Password Reset Successful', 'password_reset_success')
         
         return Response({
             'message': 'Password reset successful. You can now login with your new password.'
@@ -408,24 +364,12 @@ class ResendVerificationEmailView(generics.GenericAPIView):
             token = default_token_generator.make_token(user)
             uid = urlsafe_base64_encode(force_bytes(user.pk))
             
-            # Send verification email
+            # Queue verification email
             verification_link = f"{settings.FRONTEND_URL}/verify-email/{uid}/{token}/"
-            
-            subject = 'Resend Email Verification'
-            message = render_to_string('emails/verify_email.html', {
-                'user': user,
+            queue_email(user, 'Resend Email Verification', 'verify_email', {
                 'verification_link': verification_link,
             })
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                html_message=message,
-                fail_silently=False,
-            )
-            
             return Response(status=status.HTTP_200_OK)
         except CustomUser.DoesNotExist:
             # Don't reveal whether email exists for security
@@ -434,22 +378,11 @@ class ResendVerificationEmailView(generics.GenericAPIView):
             }, status=status.HTTP_200_OK)
     
     def send_verification_email(self, user, verification_link):
-        """Send verification email to user"""
-        subject = 'Email Verification'
-        message = render_to_string('emails/verify_email.html', {
-            'user': user,
+        """Queue verification email to user"""
+        queue_email(user, 'Email Verification', 'verify_email', {
             'verification_link': verification_link,
         })
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            html_message=message,
-            fail_silently=False,
-        )
-        
 
 class UserDashboardView(APIView):
     """
@@ -460,37 +393,35 @@ class UserDashboardView(APIView):
     
     def get(self, request):
         user = request.user
+        context = {'employer_summaries': {}, 'job_seeker_summaries': {}}
         
         dashboard_data = {
-            'user': UserProfileSerializer(user).data,
+            'user': profile_serializer_class(user)(user, context=context).data,
             'statistics': {}
         }
         
         if user.role == 'employer':
-            # Employer dashboard data
+            # Employer dashboard data, sharing the summary the profile already computed
+            summary = context['employer_summaries'].get(user.pk) or employer_summary(user)
             dashboard_data['statistics'] = {
-                'total_jobs_posted': Job.objects.filter(employer=user).count(),
-                'active_jobs': Job.objects.filter(employer=user, status='open').count(),
-                'total_applications_received': Application.objects.filter(
-                    job__employer=user
-                ).count(),
-                'pending_applications': Application.objects.filter(
-                    job__employer=user,
-                    status='under_review'
-                ).count(),
+                'total_jobs_posted': summary['total_jobs_posted'],
+                'active_jobs': summary['active_jobs'],
+                'total_applications_received': summary['total_applications_received'],
+                'pending_applications': summary['pending_applications'],
                 'recent_applications': self.get_recent_applications_for_employer(user),
-                'job_performance': self.get_job_performance(user),
+                'job_performance': self.get_job_performance(summary['recent_jobs']),
             }
             
-        elif user.role == 'jobseeker':
-            # Job seeker dashboard data
+        elif user.role == 'job_seeker':
+            # Job seeker dashboard data, sharing the summary the profile already computed
+            summary = context['job_seeker_summaries'].get(user.pk) or job_seeker_summary(user)
             dashboard_data['statistics'] = {
-                'total_applications': user.applications.count(),
-                'pending_applications': user.applications.filter(status='under_review').count(),
-                'shortlisted_applications': user.applications.filter(status='shortlisted').count(),
-                'rejected_applications': user.applications.filter(status='rejected').count(),
+                'total_applications': summary['total_applications'],
+                'pending_applications': summary['status_summary'].get('under_review', 0),
+                'shortlisted_applications': summary['status_summary'].get('shortlisted', 0),
+                'rejected_applications': summary['status_summary'].get('rejected', 0),
                 'recent_applications': self.get_recent_applications_for_jobseeker(user),
-                'application_timeline': self.get_application_timeline(user),
+                'application_timeline': self.get_application_timeline(user, **histogram_params(request)),
             }
             
         elif user.role == 'admin':
@@ -527,36 +458,24 @@ class UserDashboardView(APIView):
         return [{
             'id': app.id,
             'job_title': app.job.title,
-            'company': app.job.company_name,
+            'company': app.job.company,
             'applied_at': app.applied_at,
             'status': app.status
         } for app in applications]
     
-    def get_job_performance(self, user):
+    def get_job_performance(self, jobs):
         """Get job posting performance metrics"""
-        jobs = user.jobs.annotate(
-            application_count=Count('applications')
-        )
-        
         return [{
             'job_id': job.id,
             'title': job.title,
             'views': getattr(job, 'views', 0),
             'applications': job.application_count,
             'status': job.status
-        } for job in jobs[:5]]
+        } for job in jobs]
     
-    def get_application_timeline(self, user):
+    def get_application_timeline(self, user, **histogram):
         """Get application timeline for job seeker"""
-        timeline = []
-        for i in range(30):
-            date = timezone.now().date() - timedelta(days=i)
-            count = user.applications.filter(applied_at__date=date).count()
-            timeline.append({
-                'date': date.isoformat(),
-                'applications': count
-            })
-        return list(reversed(timeline))
+        return date_histogram(user.applications.all(), 'applied_at', count_key='applications', **histogram)
     
     def get_recent_users(self):
         """Get recently registered users for admin"""
@@ -589,35 +508,11 @@ class PublicDashboardView(APIView):
     serializer_class = PublicuserDashboardSerializer
     
     def get(self, request):
-        # Basic platform statistics
-        from jobs.models import Job
         try:
-            total_jobs = Job.objects.count()
-        
-            # Use a subquery or direct Job model filtering
-            total_companies = CustomUser.objects.filter(
-                role='employer', 
-                is_active=True,
-                id__in=Job.objects.filter(status='open').values('employer')
-            ).distinct().count()
-            
-            # Recent job postings
-            recent_jobs = self.get_recent_jobs()
-            
-            dashboard_data = {
-                'platform_statistics': {
-                    'total_jobs': total_jobs,
-                    'total_companies': total_companies,
-                    'new_jobs_today': Job.objects.filter(
-                        created_at__date=timezone.now().date(),
-                    ).count(),
-                },
-                'recent_jobs': recent_jobs,
-            }
-            
-            return Response(dashboard_data)
-        except Exception as e:
-            # Graceful fallback if jobs table doesn't exist
+            return Response(public_dashboard())
+        except ProgrammingError:
+            # The jobs tables have not been migrated yet
+            logger.exception("Public dashboard unavailable")
             return Response({
                 'platform_statistics': {
                     'total_jobs': 0,
@@ -627,25 +522,6 @@ class PublicDashboardView(APIView):
                 'recent_jobs': [],
                 'message': 'Platform data is being initialized'
             })
-        
-    def get_recent_jobs(self):
-        """Get recently posted jobs"""
-        from jobs.models import Job
-        try:
-            jobs = Job.objects.filter(
-                status='open'
-            ).select_related('employer').order_by('-created_at')[:10]
-            
-            return [{
-                'id': job.id,
-                'title': job.title,
-                'company_name': job.employer.company_name,
-                'location': job.location,
-                'posted_at': job.created_at,
-                'status': job.status,
-            } for job in jobs]
-        except Exception as e:
-            return [] # Graceful fallback if jobs table doesn't exist
 
 class CombinedDashboardView(APIView):
     """
@@ -712,65 +588,45 @@ class UserStatisticsView(APIView):
     serializer_class = UserStatisticsSerializer
     permission_classes = [IsAdmin]
     def get(self, request):
-        # Calculate statistics
-        today = timezone.now().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
+        # Read the precomputed rollup; computed_at tells how fresh it is
+        snapshot = get_platform_statistics()
+        today = timezone.localdate()
         
         stats = {
-            'total_users': CustomUser.objects.count(),
-            'total_employers': CustomUser.objects.filter(role='employer').count(),
-            'total_job_seekers': CustomUser.objects.filter(role='jobseeker').count(),
-            'total_admins': CustomUser.objects.filter(role='admin').count(),
-            'active_users_today': CustomUser.objects.filter(
-                last_login__date=today
-            ).count(),
-            'new_users_this_week': CustomUser.objects.filter(
-                date_joined__gte=week_ago
-            ).count(),
-            'new_users_this_month': CustomUser.objects.filter(
-                date_joined__gte=month_ago
-            ).count(),
-            'inactive_users': CustomUser.objects.filter(is_active=False).count(),
+            'total_users': snapshot.total_users,
+            'total_employers': snapshot.total_employers,
+            'total_job_seekers': snapshot.total_job_seekers,
+            'total_admins': snapshot.total_admins,
+            'active_users_today': snapshot.active_users_today,
+            'new_users_this_week': signups_since(today - timedelta(days=7)),
+            'new_users_this_month': signups_since(today - timedelta(days=30)),
+            'inactive_users': snapshot.inactive_users,
             
             # Role-based statistics
             'statistics_by_role': {
                 'employers': {
-                    'total': CustomUser.objects.filter(role='employer').count(),
-                    'active': CustomUser.objects.filter(role='employer', is_active=True).count(),
-                    'with_jobs': CustomUser.objects.filter(
-                        role='employer',
-                        jobs__isnull=False
-                    ).distinct().count(),
+                    'total': snapshot.total_employers,
+                    'active': snapshot.active_employers,
+                    'with_jobs': snapshot.employers_with_jobs,
                 },
                 'job_seekers': {
-                    'total': CustomUser.objects.filter(role='jobseeker').count(),
-                    'active': CustomUser.objects.filter(role='jobseeker', is_active=True).count(),
-                    'with_applications': CustomUser.objects.filter(
-                        role='jobseeker',
-                        applications__isnull=False
-                    ).distinct().count(),
+                    'total': snapshot.total_job_seekers,
+                    'active': snapshot.active_job_seekers,
+                    'with_applications': snapshot.job_seekers_with_applications,
                 }
             },
             
             # Growth metrics
-            'growth_metrics': self.get_growth_metrics(),
+            'growth_metrics': self.get_growth_metrics(**histogram_params(request)),
+            'computed_at': snapshot.computed_at,
         }
         
         serializer = UserStatisticsSerializer(stats)
         return Response(serializer.data)
     
-    def get_growth_metrics(self):
+    def get_growth_metrics(self, period='day', buckets=30, tzinfo=None):
         """Calculate user growth metrics"""
-        today = timezone.now().date()
-        metrics = []
-        
-        for i in range(30):
-            date = today - timedelta(days=i)
-            count = CustomUser.objects.filter(date_joined__date=date).count()
-            metrics.append({
-                'date': date.isoformat(),
-                'new_users': count
-            })
-        
-        return list(reversed(metrics))
+        if tzinfo is not None:
+            # The rollups are bucketed by server day; other time zones are counted live
+            return date_histogram(CustomUser.objects.all(), 'date_joined', period, buckets, tzinfo, count_key='new_users')
+        return signup_histogram(period, buckets)